@@ -0,0 +1,89 @@
+"""
+Moves finished requests, with their donations, out of the live collections.
+
+Requests delivered or cancelled more than ARCHIVE_AFTER_DAYS ago go to
+requests_archive and their donations to donations_archive, ARCHIVE_BATCH_SIZE
+requests at a time. A batch is copied server-side with $merge and only then deleted
+from the live collections, so a pass that dies halfway leaves documents in both
+places (the next pass finishes the move), never in neither.
+
+GET /v1/requests/{id} and the exports also read the archive; list pages, clusters,
+delta sync and the in-memory indexes only ever see live requests. One worker per
+deploy runs a pass every ARCHIVE_INTERVAL_S.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from app import repository
+from app.db import FINISHED_STATUSES, acquire_lock
+
+log = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "7"))  # 0 = keep everything live
+ARCHIVE_INTERVAL_S = float(os.getenv("ARCHIVE_INTERVAL_S", "600"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+class Archiver:
+    def __init__(self):
+        self.requests = 0
+        self.donations = 0
+        self.passes = 0
+        self.last_pass_ms = 0.0
+
+    async def archive_batch(self, cutoff: datetime) -> int:
+        """Move up to ARCHIVE_BATCH_SIZE requests finished before cutoff; returns how many left the live collection."""
+        finished = {"status": {"$in": FINISHED_STATUSES}, "updated_at": {"$lt": cutoff}}
+        docs = await repository.find_requests(finished, {"_id": 1}, [("updated_at", 1)], ARCHIVE_BATCH_SIZE)
+        if not docs:
+            return 0
+        ids = {"$in": [d["_id"] for d in docs]}
+        # donations first: a request still in the live collection is what brings a half-done batch back
+        await repository.copy_to_archive("donations", {"request_id": ids})
+        await repository.copy_to_archive("requests", {"_id": ids})
+        self.donations += await repository.delete_many("donations", {"request_id": ids})
+        moved = await repository.delete_many("requests", {"_id": ids, **finished})
+        self.requests += moved
+        return moved
+
+    async def run_pass(self) -> int:
+        started = time.perf_counter()
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ARCHIVE_AFTER_DAYS)
+        total = 0
+        while True:
+            moved = await self.archive_batch(cutoff)
+            total += moved
+            if moved < ARCHIVE_BATCH_SIZE:
+                break
+        self.passes += 1
+        self.last_pass_ms = round((time.perf_counter() - started) * 1000, 1)
+        return total
+
+    def stats(self) -> dict:
+        return {
+            "after_days": ARCHIVE_AFTER_DAYS,
+            "passes": self.passes,
+            "requests": self.requests,
+            "donations": self.donations,
+            "last_pass_ms": self.last_pass_ms,
+        }
+
+    async def run(self):
+        """Lifespan task: a pass every ARCHIVE_INTERVAL_S from whichever worker holds the lock."""
+        if ARCHIVE_AFTER_DAYS <= 0:
+            return
+        while True:
+            try:
+                if await acquire_lock("archiver", int(ARCHIVE_INTERVAL_S)):
+                    moved = await self.run_pass()
+                    if moved:
+                        log.info("archived %d finished requests in %.0fms", moved, self.last_pass_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("archive pass failed")
+            await asyncio.sleep(ARCHIVE_INTERVAL_S)
+
+archiver = Archiver()
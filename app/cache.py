@@ -0,0 +1,140 @@
+"""Small in-process caching helpers shared by the API and the LLM intake path."""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """LRU cache with a per-entry time-to-live. Not thread-safe; meant for the event loop."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one underlying call."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.get(key) is t and self._inflight.pop(key))
+        # shield: one caller going away must not cancel the call the others wait on
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable):
+        """Make later callers start a fresh call instead of joining the one in flight."""
+        self._inflight.pop(key, None)
+
+    def forget_all(self):
+        self._inflight.clear()
+
+class ReadThroughCache:
+    """
+    TTLCache filled by an async loader, for data invalidated by writes elsewhere.
+
+    Concurrent misses share one load. Each load in flight holds a token for its key;
+    invalidating the key drops the token, so a load that started before the write is
+    returned to its callers but not stored, and later callers start a fresh load
+    instead of joining it. Loads for other keys are unaffected.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.local = TTLCache(maxsize, ttl)
+        self.flights = SingleFlight()
+        self._loading: Dict[Hashable, object] = {}  # key -> token of the load allowed to store
+        self.invalidations = 0
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        token = self._loading[key] = object()
+        try:
+            value = await load()
+        finally:
+            current = self._loading.get(key)
+            if current is token:
+                del self._loading[key]
+        if value is not None and current is token:
+            self.local.set(key, value)
+        return value
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.local.get(key)
+        if value is None:
+            value = await self.flights.do(key, lambda: self._load(key, load))
+        return value
+
+    def invalidate(self, key: Hashable):
+        self._loading.pop(key, None)
+        self.invalidations += 1
+        self.local.invalidate(key)
+        self.flights.forget(key)
+
+    def clear(self):
+        self._loading.clear()
+        self.invalidations += 1
+        self.local.clear()
+        self.flights.forget_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "coalesced": self.flights.coalesced,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,50 @@
+"""Map card shape shared by list responses and pushed events."""
+
+CARD_FIELDS = [
+    "id", "category", "urgency_window", "severity", "status", "lat", "lng",
+    "estimated_total", "requester_afford", "funding_goal", "funded_amount",
+    "progress", "rank_score", "created_at",
+]
+
+# Fields to_card() reads from a stored request
+CARD_SOURCE_PROJ = {
+    "category": 1, "urgency_window": 1, "severity": 1, "status": 1,
+    "location": 1, "estimated_total": 1, "requester_afford": 1,
+    "funding_goal": 1, "funded_amount": 1, "progress": 1,
+    "rank_score": 1, "created_at": 1,
+}
+
+# The same card built inside Mongo ($project stage), so list pages skip per-document Python work
+CARD_PROJ = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "category": 1, "urgency_window": 1, "severity": 1, "status": 1,
+    "lat": "$location.lat",
+    "lng": "$location.lng",
+    "estimated_total": 1, "requester_afford": 1,
+    "funding_goal": 1, "funded_amount": 1, "progress": 1,
+    "rank_score": {"$ifNull": ["$rank_score", 0.0]},
+    "created_at": 1,
+}
+
+def to_card(d: dict) -> dict:
+    return {
+        "id": str(d["_id"]),
+        "category": d["category"],
+        "urgency_window": d["urgency_window"],
+        "severity": d["severity"],
+        "status": d["status"],
+        "lat": d["location"]["lat"],
+        "lng": d["location"]["lng"],
+        "estimated_total": float(d["estimated_total"]),
+        "requester_afford": float(d["requester_afford"]),
+        "funding_goal": float(d["funding_goal"]),
+        "funded_amount": float(d["funded_amount"]),
+        "progress": float(d["progress"]),
+        "rank_score": float(d.get("rank_score", 0.0)),
+        "created_at": d["created_at"],
+    }
+
+def to_columns(cards: list) -> dict:
+    """Parallel arrays per field; much smaller than an array of objects once gzipped."""
+    return {f: [c[f] for c in cards] for f in CARD_FIELDS}
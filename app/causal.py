@@ -0,0 +1,77 @@
+"""
+Read-your-writes for reads routed to secondaries (MONGO_READ_ROUTING).
+
+Writes always go to the primary. A routed read may land on a secondary that is up
+to MONGO_MAX_STALENESS_S behind, so:
+
+- write_clock, a command listener on the async client, keeps the newest
+  operationTime/$clusterTime from write replies this worker has seen;
+- after a write, the route stamps that time on the device (note_write);
+- a routed read for a stamped device runs in a causally consistent session advanced
+  to the stamp, so the secondary waits until it has applied the write;
+- loads into the shared detail/cluster caches use floor=True (the worker's newest
+  write), so a cache refilled right after an invalidation can't hold older data.
+
+Stamps live in the worker that handled the write. A device whose next read goes to
+another worker only gets the maxStalenessSeconds bound.
+"""
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.cache import TTLCache
+
+CAUSAL_STAMP_TTL_S = float(os.getenv("CAUSAL_STAMP_TTL_S", "300"))
+CAUSAL_STAMPS_MAX = 100000
+
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+Stamp = Tuple[Any, dict]  # (operationTime, $clusterTime document)
+
+class WriteClock(monitoring.CommandListener):
+    """Newest cluster time seen in a write reply. Events arrive on driver threads, hence the lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latest: Optional[Stamp] = None
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in WRITE_COMMANDS:
+            return
+        op_time, cluster_time = event.reply.get("operationTime"), event.reply.get("$clusterTime")
+        if op_time is None or cluster_time is None:
+            return  # standalone server: nothing to be causal about
+        with self._lock:
+            if self.latest is None or op_time > self.latest[0]:
+                self.latest = (op_time, cluster_time)
+
+    def failed(self, event):
+        pass
+
+write_clock = WriteClock()
+stamps = TTLCache(CAUSAL_STAMPS_MAX, CAUSAL_STAMP_TTL_S)
+
+def note_write(device: Optional[str]):
+    # called after the write is awaited, so the listener has already seen its reply
+    if device and write_clock.latest is not None:
+        stamps.set(device, write_clock.latest)
+
+@asynccontextmanager
+async def read_session(device: Optional[str] = None, floor: bool = False):
+    """Causally consistent session for a routed read, or None when there is nothing to wait for."""
+    from app import db
+
+    stamp = write_clock.latest if floor else stamps.get(device) if device else None
+    if stamp is None or db.MONGO_READ_ROUTING == "primary":
+        yield None
+        return
+    async with await db.get_async_client().start_session(causal_consistency=True) as session:
+        session.advance_operation_time(stamp[0])
+        session.advance_cluster_time(stamp[1])
+        yield session
@@ -0,0 +1,99 @@
+"""
+Pre-aggregated map clusters per web-mercator tile for GET /v1/requests/clusters.
+
+Requests are bucketed by a geohash prefix picked so a tile spans roughly
+CLUSTER_GRID cells per side. Each tile result is cached, and an event for a request
+drops the cached tiles that contain it at every zoom level. Re-ranking clears the cache.
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import repository
+from app.cache import ReadThroughCache
+from app.causal import read_session
+from app.etag import dump_json, etag_for
+from app.events import Event, bus
+from app.geo import GEOHASH_PRECISION, bbox_filter, geohash_cell_deg, tile_bbox, tile_of
+
+CLUSTER_GRID = int(os.getenv("CLUSTER_GRID", "8"))
+CLUSTER_CACHE_SIZE = int(os.getenv("CLUSTER_CACHE_SIZE", "2048"))
+CLUSTER_CACHE_TTL_S = float(os.getenv("CLUSTER_CACHE_TTL_S", "60"))
+MAX_ZOOM = 20
+ACTIVE_STATUSES = ["open", "funded"]
+CLUSTER_STATUSES = ["active", "open", "funded", "claimed", "delivered"]
+
+TileKey = Tuple[int, int, int, str]
+Entry = Tuple[bytes, str]
+
+def cell_precision(z: int) -> int:
+    """Shortest geohash whose cells fit CLUSTER_GRID times across a tile at zoom z."""
+    tile_deg = 360.0 / 2 ** z
+    for p in range(1, GEOHASH_PRECISION + 1):
+        if geohash_cell_deg(p)[1] <= tile_deg / CLUSTER_GRID:
+            return p
+    return GEOHASH_PRECISION
+
+def cluster_pipeline(z: int, x: int, y: int, status: str) -> List[dict]:
+    q: Dict[str, Any] = bbox_filter(tile_bbox(z, x, y))
+    q["status"] = {"$in": ACTIVE_STATUSES} if status == "active" else status
+    q["geohash"] = {"$exists": True}
+    gap = {"$max": [0, {"$subtract": ["$funding_goal", "$funded_amount"]}]}
+    return [
+        {"$match": q},
+        {"$group": {
+            "_id": {"cell": {"$substrCP": ["$geohash", 0, cell_precision(z)]}, "category": "$category"},
+            "count": {"$sum": 1},
+            "max_rank_score": {"$max": "$rank_score"},
+            "funding_gap": {"$sum": gap},
+            "lat": {"$sum": "$location.lat"},
+            "lng": {"$sum": "$location.lng"},
+        }},
+        {"$group": {
+            "_id": "$_id.cell",
+            "count": {"$sum": "$count"},
+            "max_rank_score": {"$max": "$max_rank_score"},
+            "funding_gap": {"$sum": "$funding_gap"},
+            "lat": {"$sum": "$lat"},
+            "lng": {"$sum": "$lng"},
+            "categories": {"$push": {"k": "$_id.category", "v": "$count"}},
+        }},
+        {"$sort": {"count": -1}},
+    ]
+
+def to_cluster(g: dict) -> dict:
+    return {
+        "geohash": g["_id"],
+        # marker at the centroid of its members, not the cell center
+        "lat": round(g["lat"] / g["count"], 6),
+        "lng": round(g["lng"] / g["count"], 6),
+        "count": g["count"],
+        "max_rank_score": float(g.get("max_rank_score") or 0.0),
+        "funding_gap": round(float(g["funding_gap"]), 2),
+        "categories": {c["k"]: c["v"] for c in g["categories"]},
+    }
+
+async def _load(key: TileKey) -> Entry:
+    z, x, y, status = key
+    async with read_session(floor=True) as session:
+        groups = await repository.aggregate_requests(cluster_pipeline(z, x, y, status), None, routed=True, session=session)
+    body = dump_json({"z": z, "x": x, "y": y, "clusters": [to_cluster(g) for g in groups]})
+    return body, etag_for(body)
+
+class ClusterCache(ReadThroughCache):
+    async def get(self, z: int, x: int, y: int, status: str) -> Entry:
+        key = (z, x, y, status)
+        return await self.get_or_load(key, lambda: _load(key))
+
+    def invalidate_point(self, lat: float, lng: float):
+        # the event only carries the new state, so every status variant goes
+        for z in range(MAX_ZOOM + 1):
+            x, y = tile_of(lat, lng, z)
+            for status in CLUSTER_STATUSES:
+                self.invalidate((z, x, y, status))
+
+    def on_event(self, event: Event):
+        card = event["request"]
+        self.invalidate_point(card["lat"], card["lng"])
+
+cluster_cache = ClusterCache(CLUSTER_CACHE_SIZE, CLUSTER_CACHE_TTL_S)
+bus.add_listener(cluster_cache.on_event)
@@ -0,0 +1,86 @@
+"""Opaque tokens handed to clients for resuming list queries."""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+def encode_token(data: Dict[str, Any]) -> str:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_token(token: str) -> Dict[str, Any]:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    data = json.loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("malformed token")
+    return data
+
+def _ms(dt: datetime) -> int:
+    # BSON dates are millisecond precision; PyMongo hands them back naive UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+def _from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
+
+def encode_watermark(updated_at: datetime, last_id: ObjectId) -> str:
+    return encode_token({"u": _ms(updated_at), "i": str(last_id)})
+
+def decode_watermark(token: str) -> Tuple[datetime, ObjectId]:
+    data = decode_token(token)
+    return _from_ms(int(data["u"])), ObjectId(data["i"])
+
+def after_watermark(updated_at: datetime, last_id: ObjectId) -> Dict[str, Any]:
+    # strictly after (updated_at, _id) in (updated_at, _id) order
+    return {"$or": [
+        {"updated_at": {"$gt": updated_at}},
+        {"updated_at": updated_at, "_id": {"$gt": last_id}},
+    ]}
+
+# keyset orders for list pages, all descending; _id makes every position unique
+PAGE_KEYS = {
+    "rank": ["rank_score", "created_at", "_id"],
+    "new": ["created_at", "_id"],
+}
+
+def _enc(key: str, v: Any) -> Any:
+    if key == "created_at":
+        return _ms(v)
+    if key == "_id":
+        return str(v)
+    return v
+
+def _dec(key: str, v: Any) -> Any:
+    if key == "created_at":
+        return _from_ms(int(v))
+    if key == "_id":
+        return ObjectId(v)
+    return float(v)
+
+def encode_page_token(sort: str, last: Dict[str, Any], at: Optional[datetime] = None) -> str:
+    data: Dict[str, Any] = {"s": sort, "v": [_enc(k, last[k]) for k in PAGE_KEYS[sort]]}
+    if at is not None:
+        # live ranking: later pages are scored at the same instant as the first
+        data["t"] = _ms(at)
+    return encode_token(data)
+
+def decode_page_token(token: str, sort: str) -> Tuple[List[Any], Optional[datetime]]:
+    data = decode_token(token)
+    keys = PAGE_KEYS[sort]
+    if data.get("s") != sort or len(data["v"]) != len(keys):
+        raise ValueError("token belongs to a different sort")
+    at = _from_ms(int(data["t"])) if "t" in data else None
+    return [_dec(k, v) for k, v in zip(keys, data["v"])], at
+
+def before_keyset(keys: List[str], values: List[Any]) -> Dict[str, Any]:
+    # strictly after the last row in (k1 desc, k2 desc, ...) order:
+    # k1 < v1 OR (k1 == v1 AND k2 < v2) OR ...
+    branches = []
+    for i, k in enumerate(keys):
+        branch = {keys[j]: values[j] for j in range(i)}
+        branch[k] = {"$lt": values[i]}
+        branches.append(branch)
+    return {"$or": branches}
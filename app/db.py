@@ -1,6 +1,23 @@
+"""
+Mongo clients, created on first use rather than at import.
+
+Importing this module never touches the network, so workers and scripts start
+immediately; the API creates its client in the lifespan and reconciles indexes
+from one worker in the background (see reconcile_indexes).
+"""
 import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
 from dotenv import load_dotenv
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import DuplicateKeyError
+from pymongo.read_preferences import Nearest, PrimaryPreferred, ReadPreference, Secondary, SecondaryPreferred
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+
+from app.causal import write_clock
+from app.metrics import mongo_listener
 
 # Load variables from .env (project root)
 load_dotenv()
@@ -8,24 +25,171 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "mutual_aid")
 
-if not MONGO_URI:
-    raise RuntimeError("MONGO_URI is not set. Add it to your .env file.")
+# Async driver tuning (request handlers)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "8000"))         # server selection / connect
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN", "majority")   # "majority" or a node count
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "leader")   # leader: one worker per deploy; off: migrations only
+INDEX_LOCK_TTL_S = int(os.getenv("INDEX_LOCK_TTL_S", "300"))
+
+# Where routed reads (lists, details, clusters, exports) go; writes and read-after-write paths always use the primary
+MONGO_READ_ROUTING = os.getenv("MONGO_READ_ROUTING", "primary")    # primary|primaryPreferred|secondaryPreferred|secondary|nearest
+MONGO_MAX_STALENESS_S = int(os.getenv("MONGO_MAX_STALENESS_S", "90"))  # skip secondaries further behind; 90 is the server minimum, -1 = no bound
+
+_READ_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondaryPreferred": SecondaryPreferred,
+    "secondary": Secondary,
+    "nearest": Nearest,
+}
+
+def _mongo_uri() -> str:
+    if not MONGO_URI:
+        raise RuntimeError("MONGO_URI is not set. Add it to your .env file.")
+    return MONGO_URI
+
+def _write_concern(w: str):
+    return int(w) if w.isdigit() else w
+
+def routed_read_preference():
+    if MONGO_READ_ROUTING == "primary":
+        return ReadPreference.PRIMARY
+    mode = _READ_MODES.get(MONGO_READ_ROUTING)
+    if mode is None:
+        raise RuntimeError(f"Unknown MONGO_READ_ROUTING={MONGO_READ_ROUTING!r}")
+    return mode(max_staleness=MONGO_MAX_STALENESS_S)
+
+_client: Optional[MongoClient] = None
+_async_client: Optional[AsyncIOMotorClient] = None
+_async_collections: Dict[Tuple[str, bool], AsyncIOMotorCollection] = {}
+
+def get_client() -> MongoClient:
+    """Blocking client for scripts and migrations."""
+    global _client
+    if _client is None:
+        _client = MongoClient(_mongo_uri(), serverSelectionTimeoutMS=MONGO_TIMEOUT_MS)
+    return _client
+
+def get_db():
+    return get_client()[DB_NAME]
+
+def get_async_client() -> AsyncIOMotorClient:
+    """Non-blocking client used by the API routes (see app/repository.py)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncIOMotorClient(
+            _mongo_uri(),
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            w=_write_concern(MONGO_WRITE_CONCERN),
+            event_listeners=[mongo_listener, write_clock],
+        )
+    return _async_client
+
+def get_async_db():
+    return get_async_client()[DB_NAME]
+
+def async_collection(name: str, routed: bool = False) -> AsyncIOMotorCollection:
+    """Collection handle; routed=True reads with MONGO_READ_ROUTING instead of from the primary."""
+    # handles are cached; building one per query costs more than the dict lookup
+    key = (name, routed and MONGO_READ_ROUTING != "primary")
+    col = _async_collections.get(key)
+    if col is None:
+        col = get_async_db()[name]
+        if key[1]:
+            col = col.with_options(read_preference=routed_read_preference())
+        _async_collections[key] = col
+    return col
+
+def close_clients():
+    global _client, _async_client
+    for c in (_client, _async_client):
+        if c is not None:
+            c.close()
+    _client = _async_client = None
+    _async_collections.clear()
+
+# Statuses a request can still change from; delivered/cancelled are terminal and move
+# to the archive collections after ARCHIVE_AFTER_DAYS (see app/archive.py).
+LIVE_STATUSES = ["open", "funded", "claimed"]
+FINISHED_STATUSES = ["delivered", "cancelled"]
+ARCHIVE_COLLECTIONS = {"requests": "requests_archive", "donations": "donations_archive"}
+
+# $in in a partial filter needs MongoDB 6.0+
+_LIVE_ONLY = {"partialFilterExpression": {"status": {"$in": LIVE_STATUSES}}}
+_FINISHED_ONLY = {"partialFilterExpression": {"status": {"$in": FINISHED_STATUSES}}}
+
+# (keys, create_index options)
+REQUEST_INDEXES = [
+    # list pages: equality on status, then the full keyset order so Mongo never sorts in memory.
+    # Live requests only; a status-less list page asks for LIVE_STATUSES so it can use these.
+    ([("status", ASCENDING), ("rank_score", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+     {**_LIVE_ONLY, "name": "live_status_rank_created"}),
+    ([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+     {**_LIVE_ONLY, "name": "live_status_created"}),
+    # exports by created_at range, any status
+    ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    # full, not partial: $geoNear fails outright when its query can match documents the geo index skips
+    ([("geo", GEOSPHERE), ("status", ASCENDING)], {}),
+    # delta sync watermark; has to see requests turning delivered
+    ([("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+    # the archiver's scan, and status=delivered|cancelled list pages (few documents, sorted in memory)
+    ([("status", ASCENDING), ("updated_at", ASCENDING)], {**_FINISHED_ONLY, "name": "finished_status_updated"}),
+]
 
-# Optional: add server selection timeout so failures show fast
-client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=8000)
+DONATION_INDEXES = [
+    ([("request_id", ASCENDING), ("created_at", DESCENDING)], {}),
+]
 
-db = client[DB_NAME]
+ARCHIVE_REQUEST_INDEXES = [
+    ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+]
 
-requests_col = db["requests"]
-donations_col = db["donations"]
+def _index_plan():
+    yield "requests", REQUEST_INDEXES
+    yield "donations", DONATION_INDEXES
+    yield ARCHIVE_COLLECTIONS["requests"], ARCHIVE_REQUEST_INDEXES
+    yield ARCHIVE_COLLECTIONS["donations"], DONATION_INDEXES
 
 def ensure_indexes():
-    # Requests
-    requests_col.create_index([("status", ASCENDING)])
-    requests_col.create_index([("rank_score", DESCENDING)])
-    requests_col.create_index([("location.lat", ASCENDING), ("location.lng", ASCENDING)])
+    """Blocking index reconciliation, for app.migrations and the bench scripts."""
+    db = get_db()
+    for name, indexes in _index_plan():
+        for keys, options in indexes:
+            db[name].create_index(keys, **options)
 
-    # Donations
-    donations_col.create_index([("request_id", ASCENDING), ("created_at", DESCENDING)])
+async def acquire_lock(name: str, ttl_s: int) -> bool:
+    """
+    Best-effort deploy-wide lock: the first worker to claim an expired (or missing)
+    lock document wins; the others get a duplicate key error on the upsert.
+    """
+    col = async_collection("locks")
+    now = datetime.now(timezone.utc)
+    try:
+        await col.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"owner": f"{socket.gethostname()}:{os.getpid()}", "expires_at": now + timedelta(seconds=ttl_s)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
 
-ensure_indexes()
+async def reconcile_indexes() -> str:
+    """Create missing indexes from one worker; returns what happened for /readyz."""
+    if MONGO_ENSURE_INDEXES == "off":
+        return "skipped"
+    if not await acquire_lock("ensure_indexes", INDEX_LOCK_TTL_S):
+        return "other_worker"
+    # already-existing indexes are a no-op; new ones build without blocking reads/writes (4.2+)
+    for name, indexes in _index_plan():
+        for keys, options in indexes:
+            await async_collection(name).create_index(keys, **options)
+    return "done"
@@ -0,0 +1,230 @@
+"""
+Near-duplicate detection for new requests.
+
+Every open/funded request that is not itself a flagged duplicate is kept as a
+MinHash signature of its normalized text (character 4-grams) plus item names, so
+near-copies match the original rather than each other. Signatures are split into
+LSH bands, and the band buckets are keyed by a coarse lat/lng cell, so a lookup
+only touches requests in the cells around the new one that share at least one
+band. Candidates are then scored by signature agreement (an estimate of Jaccard
+similarity) and distance.
+
+Signatures use one-permutation hashing (each shingle hashed once and binned, empty
+bins filled from their neighbour) so building one is linear in the text length.
+Shingles go through the built-in str hash, which is salted per process; the index
+is rebuilt from Mongo in each worker, so nothing depends on it being stable.
+"""
+import asyncio
+import logging
+import math
+import os
+from array import array
+from operator import eq
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from app import repository
+from app.events import Event, bus
+from app.llm.cache import normalize_text
+from app.nearby import distance_km
+
+log = logging.getLogger(__name__)
+
+DEDUP_MODE = os.getenv("DEDUP_MODE", "flag")  # flag|merge|off
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.75"))
+DEDUP_RADIUS_KM = float(os.getenv("DEDUP_RADIUS_KM", "1.0"))
+DEDUP_CELL_DEG = float(os.getenv("DEDUP_CELL_DEG", "0.05"))
+DEDUP_RELOAD_S = float(os.getenv("DEDUP_RELOAD_S", "300"))
+DEDUP_STATUSES = ["open", "funded"]
+
+SIG_BINS = 64
+BAND_ROWS = 4
+BANDS = SIG_BINS // BAND_ROWS  # 16 bands of 4: pairs at J=0.75 share a band ~99.8% of the time, at J=0.3 ~12%
+SHINGLE = 4
+_MASK32 = 0xFFFFFFFF
+_KM_PER_DEG = math.pi * 6371.0088 / 180.0
+
+Cell = Tuple[int, int]
+Bucket = Union[str, List[str]]  # a lone id until a second one lands in the bucket
+
+def shingles(text: str, items: Iterable[str] = ()) -> set:
+    t = normalize_text(text)
+    out = {t[i:i + SHINGLE] for i in range(max(1, len(t) - SHINGLE + 1))}
+    out.update("\x00" + normalize_text(name) for name in items)
+    return out
+
+def signature(text: str, items: Iterable[str] = ()) -> array:
+    bins = [-1] * SIG_BINS
+    for s in shingles(text, items):
+        h = hash(s)
+        b = h % SIG_BINS
+        v = (h >> 6) & _MASK32
+        if bins[b] < 0 or v < bins[b]:
+            bins[b] = v
+    filled = [i for i, v in enumerate(bins) if v >= 0]
+    if not filled:
+        return array("I", [0] * SIG_BINS)
+    # densify: an empty bin borrows the next filled bin to its right (wrapping), offset by the
+    # distance, so two texts only agree on it when they agree on the borrowed bin and the gap
+    nxt = filled[0] + SIG_BINS
+    for i in range(SIG_BINS - 1, -1, -1):
+        if bins[i] >= 0:
+            nxt = i
+        else:
+            bins[i] = (bins[nxt % SIG_BINS] + (nxt - i) * 0x9E3779B1) & _MASK32
+    return array("I", bins)
+
+def similarity(a: array, b: array) -> float:
+    return sum(map(eq, a, b)) / SIG_BINS
+
+class DedupIndex:
+    def __init__(self, cell_deg: float = DEDUP_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cols = int(round(360.0 / cell_deg))
+        self._buckets: Dict[int, Bucket] = {}
+        self._entries: Dict[str, Tuple[float, float, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return math.floor(lat / self.cell_deg), math.floor((lng + 180.0) / self.cell_deg) % self._cols
+
+    def _keys(self, cell: Cell, sig: array) -> List[int]:
+        return [hash((cell, b, tuple(sig[b * BAND_ROWS:(b + 1) * BAND_ROWS]))) for b in range(BANDS)]
+
+    def add(self, rid: str, lat: float, lng: float, sig: array):
+        self.remove(rid)
+        self._entries[rid] = (lat, lng, sig)
+        for key in self._keys(self._cell(lat, lng), sig):
+            cur = self._buckets.get(key)
+            if cur is None:
+                self._buckets[key] = rid
+            elif isinstance(cur, list):
+                cur.append(rid)
+            else:
+                self._buckets[key] = [cur, rid]
+
+    def remove(self, rid: str):
+        entry = self._entries.pop(rid, None)
+        if entry is None:
+            return
+        lat, lng, sig = entry
+        for key in self._keys(self._cell(lat, lng), sig):
+            cur = self._buckets.get(key)
+            if isinstance(cur, list):
+                cur.remove(rid)
+                if len(cur) == 1:
+                    self._buckets[key] = cur[0]
+            elif cur == rid:
+                del self._buckets[key]
+
+    def _cells_near(self, lat: float, lng: float, radius_km: float) -> List[Cell]:
+        row, col = self._cell(lat, lng)
+        dr = math.ceil(radius_km / (self.cell_deg * _KM_PER_DEG))
+        cos_lat = max(0.01, math.cos(math.radians(min(89.0, abs(lat) + radius_km / _KM_PER_DEG))))
+        dc = min(self._cols // 2, math.ceil(radius_km / (self.cell_deg * _KM_PER_DEG * cos_lat)))
+        return [(r, c % self._cols) for r in range(row - dr, row + dr + 1) for c in range(col - dc, col + dc + 1)]
+
+    def find(self, lat: float, lng: float, sig: array, threshold: float = DEDUP_THRESHOLD,
+             radius_km: float = DEDUP_RADIUS_KM) -> Optional[Tuple[str, float, float]]:
+        """Most similar indexed request within radius_km at or above threshold: (id, similarity, distance_km)."""
+        seen = set()
+        for cell in self._cells_near(lat, lng, radius_km):
+            for key in self._keys(cell, sig):
+                cur = self._buckets.get(key)
+                if isinstance(cur, list):
+                    seen.update(cur)
+                elif cur is not None:
+                    seen.add(cur)
+        best = None
+        for rid in seen:
+            elat, elng, esig = self._entries[rid]
+            sim = similarity(sig, esig)
+            if sim < threshold or (best is not None and sim <= best[1]):
+                continue
+            d = distance_km(lat, lng, elat, elng)
+            if d <= radius_km:
+                best = (rid, sim, d)
+        return best
+
+def _doc_signature(d: dict) -> array:
+    return signature(d.get("raw_text", ""), [it["name"] for it in d.get("items") or []])
+
+class DedupService:
+    """Owns the live index, like NearbyService: periodic rebuilds with local changes replayed on top."""
+
+    def __init__(self):
+        self.index: Optional[DedupIndex] = None
+        self._replay: Optional[list] = None
+        self.flagged = 0
+        self.merged = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def _apply(self, op: tuple):
+        if op[0] == "add":
+            self.index.add(*op[1:])
+        else:
+            self.index.remove(op[1])
+
+    def _record(self, op: tuple):
+        if self._replay is not None:
+            self._replay.append(op)
+        if self.index is not None:
+            self._apply(op)
+
+    def check(self, lat: float, lng: float, sig: array) -> Optional[Tuple[str, float, float]]:
+        if self.index is None:
+            return None
+        return self.index.find(lat, lng, sig)
+
+    def add(self, rid: str, lat: float, lng: float, sig: array):
+        self._record(("add", rid, lat, lng, sig))
+
+    def remove(self, rid: str):
+        self._record(("remove", rid))
+
+    async def reload(self):
+        fresh = DedupIndex()
+        self._replay = []
+        try:
+            proj = {"raw_text": 1, "items.name": 1, "location": 1}
+            q = {"status": {"$in": DEDUP_STATUSES}, "duplicate_of": {"$exists": False}}
+            async for d in repository.iter_requests(q, proj, 1000):
+                fresh.add(str(d["_id"]), d["location"]["lat"], d["location"]["lng"], _doc_signature(d))
+            replay, self.index = self._replay, fresh
+            for op in replay:
+                self._apply(op)
+        finally:
+            self._replay = None
+
+    def on_event(self, event: Event):
+        # creations are added by create_request (events carry no text); only drop requests that left the open set
+        card = event["request"]
+        if card["status"] not in DEDUP_STATUSES:
+            self.remove(card["id"])
+
+    def stats(self) -> dict:
+        return {
+            "mode": DEDUP_MODE,
+            "indexed": len(self.index) if self.index is not None else None,
+            "flagged": self.flagged,
+            "merged": self.merged,
+        }
+
+    async def run(self):
+        """Lifespan task: initial load, then periodic rebuilds (which also pick up other workers' requests)."""
+        while True:
+            try:
+                await self.reload()
+                log.info("dedup index loaded: %d open requests", len(self.index))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("dedup index load failed")
+            await asyncio.sleep(DEDUP_RELOAD_S)
+
+dedup = DedupService()
+bus.add_listener(dedup.on_event)
@@ -0,0 +1,85 @@
+"""
+Read-through cache for GET /v1/requests/{id}.
+
+Entries are the serialized detail body plus its ETag, keyed by request id, in an
+LRU bounded by DETAIL_CACHE_SIZE. Every bus event for a request (created, donated,
+claimed, delivered) drops its entry, and a re-rank pass clears the cache.
+
+Staleness:
+- the worker that made a write never serves the old body afterwards (emit() runs
+  listeners before the route returns, in both event modes);
+- other workers see the write once their change stream delivers it with
+  EVENTS_SOURCE=changestream, or after DETAIL_CACHE_TTL_S with EVENTS_SOURCE=local;
+- rank fields rewritten by another worker's /ai/rank can lag by DETAIL_CACHE_TTL_S.
+  In live rank mode the age term moves one rounding step (0.001) every ~3.6 minutes,
+  so the default TTL keeps cached scores within one step.
+
+Loads follow MONGO_READ_ROUTING, causally after the newest write this worker has
+seen, so an entry refilled after an invalidation is never older than that write.
+"""
+import os
+from typing import Optional, Tuple
+
+from bson import ObjectId
+
+from app import repository
+from app.cache import ReadThroughCache
+from app.causal import read_session
+from app.etag import dump_json, etag_for
+from app.events import Event, bus
+from app.ranking import RANK_MODE
+from app.triage import rank_reason_text, rank_score
+
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", "4096"))
+DETAIL_CACHE_TTL_S = float(os.getenv("DETAIL_CACHE_TTL_S", "30"))
+
+Entry = Tuple[bytes, str]
+
+def detail_payload(d: dict) -> dict:
+    if RANK_MODE == "live" and d["status"] in ["open", "funded"]:
+        prog = float(d["progress"])
+        d["rank_score"] = rank_score(d["urgency_window"], int(d["severity"]), prog, d["created_at"])
+        d["rank_reason"] = rank_reason_text(d["urgency_window"], int(d["severity"]), prog, d["created_at"])
+    return {
+        "request": {
+            "id": str(d["_id"]),
+            "raw_text": d["raw_text"],
+            "category": d["category"],
+            "urgency_window": d["urgency_window"],
+            "severity": d["severity"],
+            "status": d["status"],
+            "lat": d["location"]["lat"],
+            "lng": d["location"]["lng"],
+            "items": d.get("items", []),
+            "estimated_total": float(d["estimated_total"]),
+            "requester_afford": float(d["requester_afford"]),
+            "funding_goal": float(d["funding_goal"]),
+            "funded_amount": float(d["funded_amount"]),
+            "progress": float(d["progress"]),
+            "rank_score": float(d.get("rank_score", 0.0)),
+            "rank_reason": d.get("rank_reason", ""),
+            "claim": d.get("claim"),
+            "duplicate_of": str(d["duplicate_of"]) if d.get("duplicate_of") else None,
+            "created_at": d["created_at"],
+            "updated_at": d["updated_at"],
+        }
+    }
+
+async def _load(rid: ObjectId) -> Optional[Entry]:
+    # floor: the shared entry must not predate a write this worker has already acknowledged
+    async with read_session(floor=True) as session:
+        d = await repository.get_request(rid, routed=True, session=session, archived=True)
+    if not d:
+        return None
+    body = dump_json(detail_payload(d))
+    return body, etag_for(body)
+
+class DetailCache(ReadThroughCache):
+    async def get(self, rid: ObjectId) -> Optional[Entry]:
+        return await self.get_or_load(str(rid), lambda: _load(rid))
+
+    def on_event(self, event: Event):
+        self.invalidate(event["request"]["id"])
+
+detail_cache = DetailCache(DETAIL_CACHE_SIZE, DETAIL_CACHE_TTL_S)
+bus.add_listener(detail_cache.on_event)
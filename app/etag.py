@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in tags or etag in tags or ("W/" + etag) in tags
+
+def _default(o: Any) -> Any:
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError
+
+def dump_json(payload: Any) -> bytes:
+    # Mongo hands back naive datetimes that are UTC; label them so clients don't read local time
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_NAIVE_UTC)
+
+def json_with_etag(payload: Any, if_none_match: Optional[str], etag_source: Any = None) -> Response:
+    """
+    JSON response carrying a strong ETag, or a bodyless 304 when the client already has it.
+
+    etag_source lets callers hash only the stable part of a payload (e.g. without a
+    freshly minted sync token); it defaults to the payload itself.
+    """
+    body = dump_json(payload)
+    etag = etag_for(body if etag_source is None else dump_json(etag_source))
+    return etag_response(body, etag, if_none_match)
+
+def etag_response(body: bytes, etag: str, if_none_match: Optional[str]) -> Response:
+    """Response for an already serialized body, e.g. one served from a cache."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,179 @@
+"""
+Pub/sub for request changes (created, donated, claimed, delivered, updated).
+
+Routes call emit() after a successful write. Stream subscribers register a viewport
+and are kept in a coarse lat/lng grid, so an event only looks at subscribers whose
+viewport overlaps its cell instead of checking every open connection.
+
+With EVENTS_SOURCE=changestream, emit() only runs the local listeners and events are
+fed from a MongoDB change stream instead, so each worker also sees writes made by the others.
+"""
+import asyncio
+import logging
+import math
+import os
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app import repository
+from app.cards import to_card
+from app.geo import BBox, bbox_contains, lng_ranges
+
+log = logging.getLogger(__name__)
+
+EVENTS_SOURCE = os.getenv("EVENTS_SOURCE", "local")  # local|changestream
+EVENT_CELL_DEG = float(os.getenv("EVENT_CELL_DEG", "0.5"))
+SUBSCRIBER_QUEUE_SIZE = 256
+_MAX_CELLS_PER_SUB = 4096  # wider viewports go on the "everywhere" list
+
+EVENT_TYPES = ["created", "donated", "claimed", "delivered", "updated"]
+
+Cell = Tuple[int, int]
+Event = Dict[str, Any]
+
+class Subscriber:
+    def __init__(self, bbox: Optional[BBox]):
+        self.bbox = bbox
+        self.cells: Optional[List[Cell]] = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, lat: float, lng: float) -> bool:
+        return self.bbox is None or bbox_contains(self.bbox, lat, lng)
+
+    def offer(self, event: Optional[Event]):
+        if self.queue.full():
+            # slow consumer: drop the oldest event and let the client know it should refetch
+            self.queue.get_nowait()
+            self.overflowed = True
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.offer(None)
+
+class EventBus:
+    def __init__(self, cell_deg: float = EVENT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Cell, Set[Subscriber]] = {}
+        self._everywhere: Set[Subscriber] = set()
+        self._listeners: List[Callable[[Event], None]] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._everywhere) + len({s for subs in self._cells.values() for s in subs})
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _cells_for(self, bbox: Optional[BBox]) -> Optional[List[Cell]]:
+        if bbox is None:
+            return None
+        minLat, minLng, maxLat, maxLng = bbox
+        d = self.cell_deg
+        rows = range(math.floor(minLat / d), math.floor(maxLat / d) + 1)
+        cols = [c for w, e in lng_ranges(minLng, maxLng) for c in range(math.floor(w / d), math.floor(e / d) + 1)]
+        if len(rows) * len(cols) > _MAX_CELLS_PER_SUB:
+            return None
+        return [(r, c) for r in rows for c in cols]
+
+    def _index(self, sub: Subscriber):
+        sub.cells = self._cells_for(sub.bbox)
+        if sub.cells is None:
+            self._everywhere.add(sub)
+            return
+        for cell in sub.cells:
+            self._cells.setdefault(cell, set()).add(sub)
+
+    def _unindex(self, sub: Subscriber):
+        self._everywhere.discard(sub)
+        for cell in sub.cells or []:
+            subs = self._cells.get(cell)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._cells[cell]
+        sub.cells = None
+
+    def subscribe(self, bbox: Optional[BBox]) -> Subscriber:
+        sub = Subscriber(bbox)
+        self._index(sub)
+        return sub
+
+    def move(self, sub: Subscriber, bbox: Optional[BBox]):
+        self._unindex(sub)
+        sub.bbox = bbox
+        self._index(sub)
+
+    def unsubscribe(self, sub: Subscriber):
+        self._unindex(sub)
+
+    def add_listener(self, fn: Callable[[Event], None]):
+        """
+        Register an in-process callback that sees every event (cache invalidation etc.).
+
+        Listeners may see the same change twice, so they must be idempotent.
+        """
+        self._listeners.append(fn)
+
+    def notify(self, event: Event):
+        for fn in self._listeners:
+            try:
+                fn(event)
+            except Exception:
+                log.exception("event listener failed")
+
+    def publish(self, event: Event):
+        self.notify(event)
+
+        card = event["request"]
+        lat, lng = card["lat"], card["lng"]
+        for sub in chain(self._cells.get(self._cell(lat, lng), ()), self._everywhere):
+            if sub.wants(lat, lng):
+                sub.offer(event)
+
+bus = EventBus()
+
+def make_event(kind: str, doc: dict) -> Event:
+    return {"type": kind, "request": to_card(doc)}
+
+def emit(kind: str, doc: dict):
+    """Publish a change made by this worker (listeners only when a change stream feeds the bus)."""
+    event = make_event(kind, doc)
+    if EVENTS_SOURCE == "local":
+        bus.publish(event)
+    else:
+        # caches in this worker must drop their copy before the write returns;
+        # the change stream delivers the event again later
+        bus.notify(event)
+
+def _change_kind(change: dict) -> Optional[str]:
+    if change["operationType"] == "insert":
+        return "created"
+    fields = (change.get("updateDescription") or {}).get("updatedFields") or {}
+    status = fields.get("status")
+    if status in ["claimed", "delivered"]:
+        return status
+    if "funded_amount" in fields:
+        return "donated"
+    if "duplicate_count" in fields:
+        return "updated"
+    return None
+
+async def watch_changes(target: EventBus = bus):
+    """Feed the bus from a MongoDB change stream (requires a replica set), resuming after errors."""
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update"]}}}]
+    resume_token = None
+    while True:
+        try:
+            async with repository.watch_requests(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                async for change in stream:
+                    resume_token = change["_id"]
+                    kind = _change_kind(change)
+                    doc = change.get("fullDocument")
+                    if kind and doc:
+                        target.publish(make_event(kind, doc))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("change stream interrupted; resuming")
+            await asyncio.sleep(1.0)
@@ -0,0 +1,181 @@
+"""
+Streaming exports of requests and donations for ops/reporting dumps.
+
+Rows come off a Mongo cursor EXPORT_BATCH_SIZE at a time and leave as NDJSON or
+CSV chunks of roughly EXPORT_CHUNK_BYTES, so memory stays flat however many rows
+match. Donation totals per request are joined in the same aggregation. Archived
+rows (see app/archive.py) follow the live ones, each part newest first. Device
+tokens (donors, helpers) never leave: dumps carry a hashed device_ref instead.
+
+The archiver copies before it deletes, so a row can sit in both collections. Each
+dump picks a cut-off when it starts: rows archived at or before it come from the
+archive and are filtered out of the live part by a $lookup, later ones count as
+live. A row the archiver moves after the cut-off but before the live cursor gets
+to it is missed; with the default ARCHIVE_AFTER_DAYS that is a finished request
+crossing the 7-day mark during the dump.
+"""
+import csv
+import hashlib
+import io
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+
+from app import repository
+from app.db import ARCHIVE_COLLECTIONS
+from app.etag import dump_json
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+REQUEST_EXPORT_FIELDS = [
+    "id", "created_at", "updated_at", "status", "category", "urgency_window", "severity",
+    "lat", "lng", "estimated_total", "requester_afford", "funding_goal", "funded_amount",
+    "progress", "rank_score", "helper_ref", "claimed_at", "donation_total", "donation_count", "raw_text",
+]
+DONATION_EXPORT_FIELDS = ["id", "request_id", "donor_ref", "amount", "created_at"]
+DEVICE_REF_FIELDS = ["helper_ref", "donor_ref"]
+
+def created_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    rng = {}
+    if start:
+        rng["$gte"] = start
+    if end:
+        rng["$lt"] = end
+    return {"created_at": rng} if rng else {}
+
+def not_archived(archive: str, cutoff: datetime) -> List[dict]:
+    # drops live rows whose archive copy is the one this dump streams; one _id lookup per row
+    return [
+        {"$lookup": {
+            "from": archive,
+            "localField": "_id",
+            "foreignField": "_id",
+            "pipeline": [{"$match": {"archived_at": {"$lte": cutoff}}}, {"$project": {"_id": 1}}],
+            "as": "archived",
+        }},
+        {"$match": {"archived": {"$size": 0}}},
+    ]
+
+def requests_export_pipeline(q: dict, donations: str = "donations", after_sort: List[dict] = ()) -> List[dict]:
+    return [
+        {"$match": q},
+        # matches the (status,) created_at desc, _id desc indexes, so no in-memory sort
+        {"$sort": {"created_at": -1, "_id": -1}},
+        *after_sort,
+        # one grouped lookup per request instead of N+1 queries; served by the (request_id, created_at) index
+        {"$lookup": {
+            "from": donations,
+            "localField": "_id",
+            "foreignField": "request_id",
+            "pipeline": [{"$group": {"_id": None, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}}],
+            "as": "donations",
+        }},
+        {"$project": {
+            "_id": 0,
+            "id": {"$toString": "$_id"},
+            "created_at": 1, "updated_at": 1, "status": 1, "category": 1,
+            "urgency_window": 1, "severity": 1,
+            "lat": "$location.lat", "lng": "$location.lng",
+            "estimated_total": 1, "requester_afford": 1, "funding_goal": 1,
+            "funded_amount": 1, "progress": 1, "rank_score": 1,
+            "helper_ref": "$claim.helper_id", "claimed_at": "$claim.claimed_at",
+            "donation_total": {"$ifNull": [{"$first": "$donations.total"}, 0]},
+            "donation_count": {"$ifNull": [{"$first": "$donations.count"}, 0]},
+            "raw_text": 1,
+        }},
+    ]
+
+DONATION_EXPORT_PROJ = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "request_id": {"$toString": "$request_id"},
+    "donor_ref": "$donor_id", "amount": 1, "created_at": 1,
+}
+
+def donations_export_pipeline(q: dict, after_sort: List[dict] = ()) -> List[dict]:
+    return [
+        {"$match": q},
+        {"$sort": {"created_at": -1, "_id": -1}},
+        *after_sort,
+        {"$project": DONATION_EXPORT_PROJ},
+    ]
+
+def _csv_value(v: Any) -> Any:
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        # Mongo returns naive UTC; match the NDJSON output's explicit offset
+        return (v if v.tzinfo else v.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(v, ObjectId):
+        return str(v)
+    return v
+
+async def ndjson_chunks(rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    buf = bytearray()
+    async for row in rows:
+        buf += dump_json(row)
+        buf += b"\n"
+        if len(buf) >= EXPORT_CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+async def csv_chunks(rows: AsyncIterator[dict], fields: List[str]) -> AsyncIterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(fields)
+    async for row in rows:
+        writer.writerow([_csv_value(row.get(f)) for f in fields])
+        if out.tell() >= EXPORT_CHUNK_BYTES:
+            yield out.getvalue().encode()
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode()
+
+def _stream(collection: str, pipeline: List[dict]) -> AsyncIterator[dict]:
+    # a dump is a snapshot anyway; a bounded-stale secondary is the right place for the long scan
+    return repository.stream_aggregate(collection, pipeline, EXPORT_BATCH_SIZE, routed=True)
+
+async def _chain(*parts: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    for part in parts:
+        async for row in part:
+            yield row
+
+def request_rows(q: dict, archived: bool) -> AsyncIterator[dict]:
+    if not archived:
+        return _stream("requests", requests_export_pipeline(q))
+    archive = ARCHIVE_COLLECTIONS["requests"]
+    cutoff = datetime.now(timezone.utc)
+    live = _stream("requests", requests_export_pipeline(q, after_sort=not_archived(archive, cutoff)))
+    moved = _stream(archive, requests_export_pipeline(
+        {**q, "archived_at": {"$lte": cutoff}}, ARCHIVE_COLLECTIONS["donations"]))
+    return _chain(live, moved)
+
+def donation_rows(q: dict, archived: bool) -> AsyncIterator[dict]:
+    if not archived:
+        return _stream("donations", donations_export_pipeline(q))
+    archive = ARCHIVE_COLLECTIONS["donations"]
+    cutoff = datetime.now(timezone.utc)
+    live = _stream("donations", donations_export_pipeline(q, not_archived(archive, cutoff)))
+    moved = _stream(archive, donations_export_pipeline({**q, "archived_at": {"$lte": cutoff}}))
+    return _chain(live, moved)
+
+def device_ref(token: str) -> str:
+    # device tokens authorize claim/delivered, so dumps carry a one-way reference instead
+    return hashlib.sha256(("device:" + token).encode()).hexdigest()[:16]
+
+async def _without_device_tokens(rows: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    async for row in rows:
+        for f in DEVICE_REF_FIELDS:
+            if row.get(f):
+                row[f] = device_ref(row[f])
+        yield row
+
+def export_stream(rows: AsyncIterator[dict], fmt: str, fields: List[str]) -> AsyncIterator[bytes]:
+    rows = _without_device_tokens(rows)
+    return csv_chunks(rows, fields) if fmt == "csv" else ndjson_chunks(rows)
@@ -0,0 +1,96 @@
+"""
+Donation writes.
+
+Each donation is two writes, not one transaction: the donation record first, then
+one atomic pipeline update on the request (funded_amount, progress, status and rank
+fields together). If the update never lands, the record is still there to find and
+retry; a request that turns out not to be fundable gets its records removed. With
+DONATE_COMBINE_MS > 0, donations that arrive for a request while a write to it is
+already in flight are buffered for that long and applied as a single $add, so one
+viral request doesn't serialize thousands of writes on its document.
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app import repository
+from app.events import emit
+from app.ranking import funding_update
+
+DONATE_COMBINE_MS = float(os.getenv("DONATE_COMBINE_MS", "0"))  # 0 = every donation writes on its own
+
+FUNDABLE_STATUSES = ["open", "funded"]
+
+Donation = Tuple[str, float, datetime]  # donor, amount, created_at
+
+async def apply_donations(rid: ObjectId, donations: List[Donation]) -> Optional[Dict[str, Any]]:
+    """Apply one or more donations to a request; returns the updated request, or None if not fundable."""
+    now = datetime.now(timezone.utc)
+    total = round(sum(amount for _, amount, _ in donations), 2)
+    # record first: a failed update leaves a donation without its total, never a total without its donation
+    ids = await repository.insert_donations(rid, donations)
+    updated = await repository.update_request(
+        {"_id": rid, "status": {"$in": FUNDABLE_STATUSES}},
+        funding_update(total, now),
+    )
+    if not updated:
+        await repository.delete_many("donations", {"_id": {"$in": ids}})
+        return None
+    emit("donated", updated)
+    return updated
+
+class _Batch:
+    def __init__(self):
+        self.donations: List[Donation] = []
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class DonationCombiner:
+    def __init__(self, window_ms: float = DONATE_COMBINE_MS):
+        self.window_s = window_ms / 1000.0
+        self._batches: Dict[ObjectId, _Batch] = {}
+        self._busy: Dict[ObjectId, int] = {}
+        self.writes = 0
+        self.donations = 0
+
+    async def donate(self, rid: ObjectId, donor: str, amount: float) -> Optional[Dict[str, Any]]:
+        donation = (donor, amount, datetime.now(timezone.utc))
+        self.donations += 1
+        # only requests that already have a write in flight are worth buffering
+        if self.window_s <= 0 or (rid not in self._busy and rid not in self._batches):
+            return await self._write(rid, [donation])
+
+        batch = self._batches.get(rid)
+        if batch is None:
+            batch = self._batches[rid] = _Batch()
+            asyncio.get_running_loop().call_later(self.window_s, self._flush, rid)
+        batch.donations.append(donation)
+        return await asyncio.shield(batch.future)
+
+    def _flush(self, rid: ObjectId):
+        batch = self._batches.pop(rid, None)
+        if batch is not None:
+            asyncio.ensure_future(self._write_batch(rid, batch))
+
+    async def _write_batch(self, rid: ObjectId, batch: _Batch):
+        try:
+            batch.future.set_result(await self._write(rid, batch.donations))
+        except Exception as e:
+            batch.future.set_exception(e)
+
+    async def _write(self, rid: ObjectId, donations: List[Donation]) -> Optional[Dict[str, Any]]:
+        self.writes += 1
+        self._busy[rid] = self._busy.get(rid, 0) + 1
+        try:
+            return await apply_donations(rid, donations)
+        finally:
+            self._busy[rid] -= 1
+            if not self._busy[rid]:
+                del self._busy[rid]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"donations": self.donations, "writes": self.writes, "window_ms": self.window_s * 1000.0}
+
+donation_combiner = DonationCombiner()
@@ -0,0 +1,138 @@
+import math
+from typing import Dict, List, Tuple
+
+BBox = Tuple[float, float, float, float]  # minLat, minLng, maxLat, maxLng
+
+# Polygon edges on a 2dsphere index are great-circle arcs, not parallels, so wide boxes
+# are split into strips and their north/south edges densified to stay close to the viewport.
+_MAX_STRIP_DEG = 90.0
+_EDGE_STEP_DEG = 5.0
+_MAX_LAT = 89.99
+# widest box accepted in already-wrapped form (minLng > maxLng)
+_MAX_WRAPPED_SPAN_DEG = 180.0
+
+def to_point(lat: float, lng: float) -> Dict:
+    return {"type": "Point", "coordinates": [float(lng), float(lat)]}
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells, enough for cluster grids up to zoom 20
+
+def geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    out = []
+    bits, ch, even = 0, 0, True
+    while len(out) < precision:
+        # bits alternate lng, lat, lng, ... starting with longitude
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            bit = lng >= mid
+            lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bit = lat >= mid
+            lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+        ch = (ch << 1) | bit
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_GEOHASH_ALPHABET[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+def geohash_cell_deg(precision: int) -> Tuple[float, float]:
+    """(lat, lng) size in degrees of a geohash cell of this length."""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def tile_bbox(z: int, x: int, y: int) -> BBox:
+    """Web-mercator (slippy map) tile z/x/y as a lat/lng box."""
+    n = 2 ** z
+    def lat(yy: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * yy / n))))
+    return lat(y + 1), x / n * 360.0 - 180.0, lat(y), (x + 1) / n * 360.0 - 180.0
+
+def tile_of(lat: float, lng: float, z: int) -> Tuple[int, int]:
+    n = 2 ** z
+    x = min(n - 1, int((lng + 180.0) / 360.0 * n))
+    r = math.radians(max(-85.0511, min(85.0511, lat)))
+    y = min(n - 1, max(0, int((1 - math.asinh(math.tan(r)) / math.pi) / 2 * n)))
+    return x, y
+
+def wrap_lng(lng: float) -> float:
+    return ((lng + 180.0) % 360.0) - 180.0
+
+def parse_bbox(s: str) -> BBox:
+    """
+    Parse "minLat,minLng,maxLat,maxLng".
+
+    Leaflet reports unwrapped longitudes (e.g. 170..190 across the antimeridian),
+    so they are wrapped into -180..180; minLng > maxLng then means the box crosses it.
+    A box that arrives already wrapped (170,-170) is taken the same way, up to
+    _MAX_WRAPPED_SPAN_DEG wide; anything wider is far more likely swapped corners.
+    """
+    minLat, minLng, maxLat, maxLng = [float(x) for x in s.split(",")]
+    if minLat >= maxLat or minLng == maxLng:
+        raise ValueError("empty bbox")
+    if minLng > maxLng:
+        maxLng += 360.0
+        if maxLng - minLng > _MAX_WRAPPED_SPAN_DEG:
+            raise ValueError("bbox corners swapped")
+    # polygon vertices at the poles would collapse into duplicates
+    minLat, maxLat = max(-_MAX_LAT, minLat), min(_MAX_LAT, maxLat)
+    if maxLng - minLng >= 360.0:
+        return minLat, -180.0, maxLat, 180.0
+    return minLat, wrap_lng(minLng), maxLat, wrap_lng(maxLng)
+
+def parse_latlng(s: str) -> Tuple[float, float]:
+    lat, lng = [float(x) for x in s.split(",")]
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat,lng out of range")
+    return lat, lng
+
+def lng_ranges(minLng: float, maxLng: float) -> List[Tuple[float, float]]:
+    # minLng > maxLng means the viewport crosses the antimeridian
+    if minLng <= maxLng:
+        return [(minLng, maxLng)]
+    return [(minLng, 180.0), (-180.0, maxLng)]
+
+def bbox_contains(bbox: BBox, lat: float, lng: float) -> bool:
+    minLat, minLng, maxLat, maxLng = bbox
+    if not (minLat <= lat <= maxLat):
+        return False
+    if minLng <= maxLng:
+        return minLng <= lng <= maxLng
+    return lng >= minLng or lng <= maxLng
+
+def _strip(minLat: float, maxLat: float, w: float, e: float) -> List[List[float]]:
+    n = max(1, int((e - w) // _EDGE_STEP_DEG))
+    lngs = [w + (e - w) * i / n for i in range(n + 1)]
+    ring = [[x, minLat] for x in lngs] + [[x, maxLat] for x in reversed(lngs)]
+    ring.append(ring[0])
+    return [ring]
+
+def bbox_geometry(bbox: BBox) -> Dict:
+    """GeoJSON MultiPolygon covering a lat/lng box, antimeridian-aware."""
+    minLat, minLng, maxLat, maxLng = bbox
+    polys = []
+    for w, e in lng_ranges(minLng, maxLng):
+        while e - w > _MAX_STRIP_DEG:
+            polys.append(_strip(minLat, maxLat, w, w + _MAX_STRIP_DEG))
+            w += _MAX_STRIP_DEG
+        if e > w:
+            polys.append(_strip(minLat, maxLat, w, e))
+    return {"type": "MultiPolygon", "coordinates": polys}
+
+def bbox_filter(bbox: BBox) -> Dict:
+    return {"geo": {"$geoWithin": {"$geometry": bbox_geometry(bbox)}}}
+
+def near_stage(lat: float, lng: float, radius_km: float, q: Dict) -> Dict:
+    # must be the first stage of the pipeline; results come back nearest first
+    return {"$geoNear": {
+        "near": to_point(lat, lng),
+        "key": "geo",
+        "distanceField": "distance_m",
+        "maxDistance": radius_km * 1000.0,
+        "query": q,
+        "spherical": True,
+    }}
@@ -1,3 +1,4 @@
-from app.llm.intake import ai_invoke
+from app.llm.cache import intake_cache
+from app.llm.intake import ai_invoke, ai_invoke_many
 
-__all__ = ["ai_invoke"]
+__all__ = ["ai_invoke", "ai_invoke_many", "intake_cache"]
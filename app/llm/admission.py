@@ -0,0 +1,144 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from app.metrics import admission_shed, admission_slots, admission_wait
+
+T = TypeVar("T")
+
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "32"))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "128"))
+ADMISSION_WAIT_MS = float(os.getenv("ADMISSION_WAIT_MS", "1500"))
+DEVICE_RATE_PER_S = float(os.getenv("DEVICE_RATE_PER_S", "0.5"))
+DEVICE_BURST = float(os.getenv("DEVICE_BURST", "10"))
+DEVICE_BUCKETS_MAX = 10000
+
+class Shed(Exception):
+    """Raised instead of running the call; reason is device_rate, queue_full or wait_timeout."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class TokenBuckets:
+    """Per-key token buckets, refilled lazily on take. Least recently seen keys are dropped past max_keys."""
+
+    def __init__(self, rate: float = DEVICE_RATE_PER_S, burst: float = DEVICE_BURST, max_keys: int = DEVICE_BUCKETS_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key: str, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        ok = tokens >= cost
+        if ok:
+            tokens -= cost
+        # an evicted key comes back with a full bucket, so only keys idle long enough to refill should fall off
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return ok
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+class AdmissionController:
+    """
+    Bounds concurrent upstream intake calls per worker, plus a per-device request rate.
+
+    Up to max_inflight calls run at once; the next max_queue wait in FIFO order for
+    at most max_wait_ms. Anything beyond that, or still waiting when the budget runs
+    out, raises Shed straight away so the caller can answer from the fallback parser.
+    """
+
+    def __init__(self, max_inflight: int = ADMISSION_MAX_INFLIGHT, max_queue: int = ADMISSION_QUEUE,
+                 max_wait_ms: float = ADMISSION_WAIT_MS, devices: Optional[TokenBuckets] = None):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.devices = devices if devices is not None else TokenBuckets()
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed = {"device_rate": 0, "queue_full": 0, "wait_timeout": 0}
+
+    def _shed(self, reason: str) -> Shed:
+        self.shed[reason] += 1
+        admission_shed.inc(reason)
+        return Shed(reason)
+
+    def check_device(self, device: Optional[str], cost: float = 1.0):
+        """Charge one intake request to the device's bucket; anonymous callers only face the shared gate."""
+        if device and not self.devices.take(device, cost):
+            raise self._shed("device_rate")
+
+    async def _acquire(self):
+        if self.inflight < self.max_inflight and not self._waiters:
+            self.inflight += 1
+            admission_wait.observe(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._shed("queue_full")
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._waiters.append(fut)
+        timer = loop.call_later(self.max_wait_s, self._expire, fut)
+        started = time.perf_counter()
+        try:
+            admitted = await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled() and fut.result():
+                self._release()  # handed a slot just as we were cancelled; pass it on
+            elif fut in self._waiters:
+                self._waiters.remove(fut)
+            raise
+        finally:
+            timer.cancel()
+        admission_wait.observe(time.perf_counter() - started)
+        if not admitted:
+            raise self._shed("wait_timeout")
+
+    def _expire(self, fut: asyncio.Future):
+        if not fut.done():
+            self._waiters.remove(fut)
+            fut.set_result(False)
+
+    def _release(self):
+        # hand the slot straight to the oldest live waiter so inflight never dips below the cap under load
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.inflight -= 1
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        await self._acquire()
+        self.admitted += 1
+        try:
+            return await call()
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "devices_tracked": len(self.devices),
+        }
+
+intake_admission = AdmissionController()
+admission_slots.set_function(lambda: {
+    ("inflight",): intake_admission.inflight,
+    ("queued",): len(intake_admission._waiters),
+})
@@ -0,0 +1,82 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.llm.client import call_gemini, call_gemini_batch
+from app.llm.validators import clamp_and_sanitize
+
+INTAKE_BATCH_MAX = int(os.getenv("INTAKE_BATCH_MAX", "8"))
+INTAKE_BATCH_WAIT_MS = float(os.getenv("INTAKE_BATCH_WAIT_MS", "15"))
+
+class IntakeBatcher:
+    """
+    Collects intake texts arriving within a short window and sends them to Gemini
+    as one multi-item prompt.
+
+    Each caller gets its own sanitized draft back, or an exception if its item
+    (or the whole call) failed, so ai_invoke can fall back per item.
+    """
+
+    def __init__(self, max_batch: int = INTAKE_BATCH_MAX, max_wait_ms: float = INTAKE_BATCH_WAIT_MS):
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.items = 0
+        self.item_failures = 0
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((text, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        texts = [t for t, _ in batch]
+        try:
+            if len(batch) == 1:
+                raws = [await call_gemini(texts[0])]
+            else:
+                raws = await call_gemini_batch(texts)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), raw in zip(batch, raws):
+            if fut.done():
+                continue
+            try:
+                if raw is None:
+                    raise ValueError("item missing from batch reply")
+                fut.set_result(clamp_and_sanitize(raw))
+            except Exception as e:
+                self.item_failures += 1
+                fut.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "item_failures": self.item_failures,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "pending": len(self._pending),
+        }
+
+intake_batcher = IntakeBatcher()
@@ -0,0 +1,81 @@
+import os
+import time
+from typing import Any, Dict
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while the breaker is open."""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls go through; failures and slow calls (> slow_call_s) count up
+    open      -> calls are refused until reset_timeout_s has passed
+    half_open -> a single probe call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, failure_threshold: int = 5, slow_call_s: float = 8.0, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.slow_call_s = slow_call_s
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+            self.state = "half_open"
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def is_open(self) -> bool:
+        """True while allow() would refuse; unlike allow() it never claims the half-open probe."""
+        if self.state == "open":
+            return time.monotonic() - self.opened_at < self.reset_timeout_s
+        return self.state == "half_open" and self._probe_in_flight
+
+    def _trip(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.trips += 1
+
+    def record_success(self, elapsed_s: float):
+        if elapsed_s > self.slow_call_s:
+            # a latency spike counts against upstream health just like an error
+            self.record_failure()
+            return
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self._trip()
+
+    def abandon(self):
+        # call was cancelled before an outcome; free the half-open probe slot
+        self._probe_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+gemini_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+    slow_call_s=float(os.getenv("GEMINI_BREAKER_SLOW_S", "8")),
+    reset_timeout_s=float(os.getenv("GEMINI_BREAKER_RESET_S", "30")),
+)
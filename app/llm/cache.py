@@ -0,0 +1,104 @@
+import copy
+import hashlib
+import os
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.cache import SingleFlight, TTLCache
+from app.llm.client import get_model_name
+
+INTAKE_CACHE_SIZE = int(os.getenv("INTAKE_CACHE_SIZE", "2048"))
+INTAKE_CACHE_TTL_S = float(os.getenv("INTAKE_CACHE_TTL_S", "600"))
+INTAKE_CACHE_BACKEND = os.getenv("INTAKE_CACHE_BACKEND", "memory")  # memory|mongo
+
+_PUNCT = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different submissions share a key."""
+    t = unicodedata.normalize("NFKC", text).casefold()
+    t = _PUNCT.sub(" ", t)
+    return _SPACE.sub(" ", t).strip()
+
+class MongoBackend:
+    """Shared second-level cache so workers reuse each other's Gemini results."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._col = None
+
+    async def _collection(self):
+        if self._col is None:
+            from app.db import async_collection
+            col = async_collection("intake_cache")
+            await col.create_index("expires_at", expireAfterSeconds=0)
+            self._col = col
+        return self._col
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        col = await self._collection()
+        doc = await col.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return doc["draft"] if doc else None
+
+    async def set(self, key: str, draft: Dict[str, Any]):
+        col = await self._collection()
+        expires = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        await col.replace_one({"_id": key}, {"_id": key, "draft": draft, "expires_at": expires}, upsert=True)
+
+class IntakeCache:
+    """
+    Cache of sanitized Gemini drafts keyed by normalized text.
+
+    Concurrent misses for the same key share one upstream call. Only successful
+    model results are cached; fallback parses are never stored.
+    """
+
+    def __init__(self, maxsize: int = INTAKE_CACHE_SIZE, ttl: float = INTAKE_CACHE_TTL_S, shared: Optional[MongoBackend] = None):
+        self.local = TTLCache(maxsize, ttl)
+        self.shared = shared
+        self.flights = SingleFlight()
+        self.shared_hits = 0
+
+    def key(self, text: str) -> str:
+        raw = f"{get_model_name()}\x00{normalize_text(text)}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if self.shared is not None:
+            try:
+                draft = await self.shared.get(key)
+            except Exception:
+                draft = None
+            if draft is not None:
+                self.shared_hits += 1
+                self.local.set(key, draft)
+                return draft
+
+        draft = await compute()
+        self.local.set(key, draft)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, draft)
+            except Exception:
+                pass  # shared tier is best-effort
+        return draft
+
+    async def get_or_compute(self, text: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        key = self.key(text)
+        draft = self.local.get(key)
+        if draft is None:
+            draft = await self.flights.do(key, lambda: self._load(key, compute))
+        # callers decorate the draft (requester_afford), so never hand out the cached object
+        return copy.deepcopy(draft)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "shared_hits": self.shared_hits,
+            "coalesced": self.flights.coalesced,
+            "inflight": len(self.flights),
+        }
+
+intake_cache = IntakeCache(shared=MongoBackend(INTAKE_CACHE_TTL_S) if INTAKE_CACHE_BACKEND == "mongo" else None)
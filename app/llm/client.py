@@ -1,9 +1,20 @@
 import os
 import json
+import time
+import asyncio
 import httpx
-from typing import Optional
+from typing import List, Optional
 
+from app.llm.breaker import CircuitOpenError, gemini_breaker
 from app.llm.prompts import SYSTEM_PROMPT
+from app.metrics import gemini_duration
+
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_TIMEOUT_S = float(os.getenv("GEMINI_TIMEOUT_S", "20"))
+GEMINI_CONNECT_TIMEOUT_S = float(os.getenv("GEMINI_CONNECT_TIMEOUT_S", "3"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "50"))
+
+_http: Optional[httpx.AsyncClient] = None
 
 def get_api_key() -> Optional[str]:
     """Get Gemini API key from environment."""
@@ -13,6 +24,23 @@ def get_model_name() -> str:
     """Get Gemini model name from environment."""
     return os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+def get_http_client() -> httpx.AsyncClient:
+    """Shared pooled client (keep-alive, one TLS handshake per connection). Closed by the app lifespan."""
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            base_url=GEMINI_BASE_URL,
+            timeout=httpx.Timeout(GEMINI_TIMEOUT_S, connect=GEMINI_CONNECT_TIMEOUT_S),
+            limits=httpx.Limits(max_connections=GEMINI_MAX_CONNECTIONS, max_keepalive_connections=GEMINI_MAX_CONNECTIONS),
+        )
+    return _http
+
+async def close_http_client():
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
 def extract_json_from_response(text: str) -> dict:
     """
     Extract JSON object from Gemini response.
@@ -26,26 +54,30 @@ def extract_json_from_response(text: str) -> dict:
     candidate = text[start:end+1]
     return json.loads(candidate)
 
-async def call_gemini(prompt: str) -> dict:
-    """
-    Call Gemini API with the provided prompt.
-    Returns the parsed response data.
-    """
+def extract_json_array_from_response(text: str) -> list:
+    """Same as extract_json_from_response, for the [...] reply to a batch prompt."""
+    text = text.strip()
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end == -1 or end <= start:
+        raise ValueError("No JSON array found in model output")
+    candidate = text[start:end+1]
+    return json.loads(candidate)
+
+async def _generate(full_prompt: str) -> str:
+    """POST one prompt to generateContent (through the circuit breaker) and return the reply text."""
     api_key = get_api_key()
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found")
     
     model_name = get_model_name()
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent"
+    url = f"/v1beta/models/{model_name}:generateContent"
     
     headers = {
         "x-goog-api-key": api_key,
         "Content-Type": "application/json"
     }
 
-    # Combine system and user prompts
-    full_prompt = f"{SYSTEM_PROMPT}\n\nUser text:\n{prompt}\n\nReturn ONLY the JSON object."
-
     body = {
         "contents": [
             {
@@ -58,14 +90,73 @@ async def call_gemini(prompt: str) -> dict:
         }
     }
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        r = await client.post(url, headers=headers, json=body)
+    if not gemini_breaker.allow():
+        gemini_duration.observe(0.0, "circuit_open")
+        raise CircuitOpenError("Gemini circuit open")
+
+    started = time.perf_counter()
+    try:
+        r = await get_http_client().post(url, headers=headers, json=body)
         r.raise_for_status()
         data = r.json()
+    except asyncio.CancelledError:
+        gemini_breaker.abandon()
+        gemini_duration.observe(time.perf_counter() - started, "cancelled")
+        raise
+    except httpx.TimeoutException:
+        gemini_breaker.record_failure()
+        gemini_duration.observe(time.perf_counter() - started, "timeout")
+        raise
+    except Exception:
+        gemini_breaker.record_failure()
+        gemini_duration.observe(time.perf_counter() - started, "error")
+        raise
+    elapsed = time.perf_counter() - started
+    gemini_breaker.record_success(elapsed)
+    gemini_duration.observe(elapsed, "ok")
 
     # Extract text from Gemini response structure
     try:
-        content_text = data["candidates"][0]["content"]["parts"][0]["text"]
-        return extract_json_from_response(content_text)
+        return data["candidates"][0]["content"]["parts"][0]["text"]
     except Exception as e:
         raise ValueError(f"Failed to extract content from Gemini response: {e}")
+
+async def call_gemini(prompt: str) -> dict:
+    """
+    Call Gemini API with the provided prompt.
+    Returns the parsed response data.
+    """
+    # Combine system and user prompts
+    full_prompt = f"{SYSTEM_PROMPT}\n\nUser text:\n{prompt}\n\nReturn ONLY the JSON object."
+    content_text = await _generate(full_prompt)
+    return extract_json_from_response(content_text)
+
+async def call_gemini_batch(prompts: List[str]) -> List[Optional[dict]]:
+    """
+    Parse several user texts with one Gemini call.
+    Returns one raw draft per prompt, in order; None where the model skipped or mangled an item.
+    """
+    numbered = "\n".join(f"[{i}] {' '.join(p.split())}" for i, p in enumerate(prompts))
+    full_prompt = (
+        f"{SYSTEM_PROMPT}\n"
+        f"You will receive {len(prompts)} numbered user texts. Parse each one independently.\n"
+        f"Return ONLY a JSON array of {len(prompts)} objects in the same order, each with the schema above "
+        f"plus an \"index\" field holding the text's number.\n\n"
+        f"User texts:\n{numbered}\n\nReturn ONLY the JSON array."
+    )
+    content_text = await _generate(full_prompt)
+    items = extract_json_array_from_response(content_text)
+
+    out: List[Optional[dict]] = [None] * len(prompts)
+    positional = len(items) == len(prompts)
+    for pos, it in enumerate(items):
+        if not isinstance(it, dict):
+            continue
+        idx = it.get("index")
+        if not isinstance(idx, int) or not 0 <= idx < len(prompts):
+            if not positional:
+                continue
+            idx = pos
+        if out[idx] is None:
+            out[idx] = it
+    return out
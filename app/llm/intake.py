@@ -1,14 +1,32 @@
-from typing import Dict, Any
+import asyncio
+import os
+from typing import Callable, Dict, Any, List, Optional
 
-from app.llm.client import get_api_key, call_gemini
+from app.llm.admission import Shed, intake_admission
+from app.llm.batcher import intake_batcher
+from app.llm.breaker import CircuitOpenError, gemini_breaker
+from app.llm.cache import intake_cache
+from app.llm.client import get_api_key
 from app.llm.parsers import fallback_parse
-from app.llm.validators import clamp_and_sanitize
+from app.metrics import intake_total
 
-async def ai_invoke(text: str) -> Dict[str, Any]:
+# shed answers skipped the model because of load, not because it failed; say so in the score
+SHED_CONFIDENCE = float(os.getenv("ADMISSION_SHED_CONFIDENCE", "0.4"))
+
+def _shed_parse(text: str, reason: str) -> Dict[str, Any]:
+    intake_total.inc("fallback", "shed_" + reason)
+    result = fallback_parse(text)
+    result["confidence"] = min(result["confidence"], SHED_CONFIDENCE)
+    return result
+
+async def ai_invoke(text: str, device: Optional[str] = None) -> Dict[str, Any]:
     """
     Main AI intake function.
     
     Uses Gemini API if available, falls back to keyword parsing otherwise.
+    Under load (device over its rate, Gemini slots and queue full, or the queue
+    wait budget spent) the fallback answer comes back at once with lowered confidence.
+    Cached drafts are served without charging the device's rate.
     
     Returns:
         {
@@ -25,13 +43,54 @@ async def ai_invoke(text: str) -> Dict[str, Any]:
     """
     # Check if API key is available
     if not get_api_key():
+        intake_total.inc("fallback", "no_api_key")
         return fallback_parse(text)
 
-    # Try Gemini API
+    return await _invoke(text, lambda: intake_admission.check_device(device))
+
+def _charge_once(device: Optional[str]) -> Callable[[], None]:
+    # a whole ai_invoke_many list is one request against the device's rate, charged on its first miss
+    outcome: List[Optional[Shed]] = []
+
+    def charge():
+        if not outcome:
+            try:
+                intake_admission.check_device(device)
+                outcome.append(None)
+            except Shed as e:
+                outcome.append(e)
+        if outcome[0] is not None:
+            raise outcome[0]
+    return charge
+
+async def _compute(text: str, charge: Callable[[], None]) -> Dict[str, Any]:
+    # an open circuit would refuse the call anyway; don't hold a slot or a batch window for it
+    if gemini_breaker.is_open():
+        gemini_breaker.rejected += 1
+        raise CircuitOpenError("Gemini circuit open")
+    # only calls that reach Gemini count against the device; cache hits are free
+    charge()
+    return await intake_admission.run(lambda: intake_batcher.submit(text))
+
+async def _invoke(text: str, charge: Callable[[], None]) -> Dict[str, Any]:
+    # Try Gemini API (cached by normalized text, concurrent duplicates share one call,
+    # only cache misses are charged to the device and take an admission slot, distinct
+    # texts arriving together go out as one batched prompt; with the circuit open a
+    # miss falls back at once)
     try:
-        raw = await call_gemini(text)
-        draft = clamp_and_sanitize(raw)
+        draft = await intake_cache.get_or_compute(text, lambda: _compute(text, charge))
+        intake_total.inc("gemini", "ok")
         return {"draft": draft, "confidence": 0.8}
-    except Exception:
+    except Shed as e:
+        return _shed_parse(text, e.reason)
+    except Exception as e:
         # If Gemini fails for any reason, use fallback
+        intake_total.inc("fallback", type(e).__name__)
         return fallback_parse(text)
+
+async def ai_invoke_many(texts: List[str], device: Optional[str] = None) -> List[Dict[str, Any]]:
+    """ai_invoke for a list of texts; they share batches, and failures fall back per item."""
+    if not get_api_key():
+        return [await ai_invoke(t) for t in texts]
+    charge = _charge_once(device)
+    return list(await asyncio.gather(*(_invoke(t, charge) for t in texts)))
@@ -1,52 +1,190 @@
 import re
 import random
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set, Tuple
 
-def guess_category(text: str) -> str:
-    """Guess category from text keywords."""
-    t = text.lower()
-    if any(k in t for k in ["insulin", "medicine", "meds", "prescription", "pharmacy", "antibiotic", "inhaler"]):
-        return "meds"
-    if any(k in t for k in ["grocer", "food", "rice", "milk", "bread", "eggs", "vegetable", "grocery"]):
-        return "groceries"
-    if any(k in t for k in ["shelter", "evac", "no place", "homeless", "housing"]):
-        return "shelter"
-    if any(k in t for k in ["ride", "pickup", "drive", "car", "transport", "uber"]):
-        return "transport"
+# keyword -> (is_stem, signals it raises). Stems ("grocer", "evac") match any word starting
+# with them; everything else matches as a whole word, or one of its forms in _VARIANTS, so
+# "car" no longer matches "care"/"cares" and "now" no longer matches "know".
+_KEYWORDS: Dict[str, Tuple[bool, Tuple[str, ...]]] = {
+    # category: meds (insulin also marks a critical medical need)
+    "insulin": (False, ("cat:meds", "sev:critical_med")),
+    "medicine": (False, ("cat:meds",)),
+    "meds": (False, ("cat:meds",)),
+    "prescription": (False, ("cat:meds",)),
+    "pharmacy": (False, ("cat:meds",)),
+    "antibiotic": (False, ("cat:meds",)),
+    "inhaler": (False, ("cat:meds",)),
+    # category: groceries
+    "grocer": (True, ("cat:groceries",)),
+    "food": (False, ("cat:groceries",)),
+    "rice": (False, ("cat:groceries",)),
+    "milk": (False, ("cat:groceries",)),
+    "bread": (False, ("cat:groceries",)),
+    "eggs": (False, ("cat:groceries",)),
+    "vegetable": (False, ("cat:groceries",)),
+    # category: shelter (evac also marks an unsafe situation)
+    "shelter": (False, ("cat:shelter",)),
+    "evac": (True, ("cat:shelter", "sev:unsafe")),
+    "no place": (False, ("cat:shelter",)),
+    "homeless": (False, ("cat:shelter",)),
+    "housing": (False, ("cat:shelter",)),
+    # category: transport
+    "ride": (False, ("cat:transport",)),
+    "pickup": (False, ("cat:transport",)),
+    "drive": (False, ("cat:transport",)),
+    "car": (False, ("cat:transport",)),
+    "transport": (True, ("cat:transport",)),
+    "uber": (False, ("cat:transport",)),
+    # urgency
+    "asap": (False, ("urg:now",)),
+    "urgent": (True, ("urg:now",)),
+    "now": (False, ("urg:now",)),
+    "immediately": (False, ("urg:now",)),
+    "tonight": (False, ("urg:now",)),
+    "today": (False, ("urg:today",)),
+    "by end of day": (False, ("urg:today",)),
+    "this evening": (False, ("urg:today",)),
+    # severity
+    "oxygen": (False, ("sev:critical_med",)),
+    "dialysis": (False, ("sev:critical_med",)),
+    "heart": (False, ("sev:critical_med",)),
+    "seizure": (False, ("sev:critical_med",)),
+    "unsafe": (False, ("sev:unsafe",)),
+    "flood": (True, ("sev:unsafe",)),
+    "fire": (False, ("sev:unsafe",)),
+    "baby": (False, ("sev:infant",)),
+    "infant": (False, ("sev:infant",)),
+}
+
+# plurals and compounds worth matching; keywords not listed only match as written.
+# "heart" deliberately has none: "heartburn" is not a critical medical need.
+_VARIANTS: Dict[str, Tuple[str, ...]] = {
+    "medicine": ("medicines",),
+    "prescription": ("prescriptions",),
+    "pharmacy": ("pharmacies",),
+    "antibiotic": ("antibiotics",),
+    "inhaler": ("inhalers",),
+    "food": ("foods",),
+    "vegetable": ("vegetables",),
+    "shelter": ("shelters",),
+    "no place": ("no places",),
+    "ride": ("rides", "rideshare", "rideshares"),
+    "pickup": ("pickups",),
+    "drive": ("drives", "driver", "drivers"),
+    "car": ("cars", "carpool", "carpools"),
+    "seizure": ("seizures",),
+    "flood": ("floods",),
+    "fire": ("fires",),
+    "baby": ("babies",),
+    "infant": ("infants",),
+}
+
+def _trie_pattern(node: Dict[str, Any]) -> str:
+    # node: {char: child, "": terminal suffix}; emits a prefix-factored alternation so the
+    # regex engine follows one branch per character instead of retrying every keyword
+    alts = []
+    end = node.get("")
+    for ch in sorted(k for k in node if k):
+        alts.append((r"\s+" if ch == " " else re.escape(ch)) + _trie_pattern(node[ch]))
+    if end is not None:
+        alts.append(end)
+    if len(alts) == 1:
+        return alts[0]
+    return "(?:" + "|".join(alts) + ")"
+
+def _compile_keywords():
+    # Built once at import: one regex finds every keyword occurrence in a single scan,
+    # and the matched form maps back to its signals with a dict lookup.
+    forms: Dict[str, Set[str]] = {}
+    stems: Dict[str, Tuple[str, ...]] = {}
+    trie: Dict[str, Any] = {}
+    for kw, (stem, signals) in _KEYWORDS.items():
+        if stem:
+            stems[kw] = signals
+            variants = [(kw, r"\w*")]
+        else:
+            variants = [(form, r"\b") for form in (kw, *_VARIANTS.get(kw, ()))]
+        for form, tail in variants:
+            if not stem:
+                forms.setdefault(form, set()).update(signals)
+            node = trie
+            for ch in form:
+                node = node.setdefault(ch, {})
+            # a stem terminal wins over a whole-word terminal at the same node
+            if node.get("") != r"\w*":
+                node[""] = tail
+    pattern = re.compile(r"\b" + _trie_pattern(trie))
+    stem_lengths = sorted({len(k) for k in stems})
+    return pattern, forms, stems, stem_lengths
+
+_KEYWORD_RE, _FORMS, _STEMS, _STEM_LENGTHS = _compile_keywords()
+_SPACES = re.compile(r"\s+")
+_CATEGORY_ORDER = ["meds", "groceries", "shelter", "transport"]
+
+def scan_signals(text: str) -> Set[str]:
+    """Every keyword signal in the text, found in a single regex pass."""
+    signals: Set[str] = set()
+    for m in _KEYWORD_RE.findall(text.lower()):
+        hit = _FORMS.get(m) or _FORMS.get(_SPACES.sub(" ", m))
+        if hit:
+            signals.update(hit)
+            continue
+        for n in _STEM_LENGTHS:
+            sig = _STEMS.get(m[:n])
+            if sig:
+                signals.update(sig)
+    return signals
+
+def _category(signals: Set[str]) -> str:
+    for cat in _CATEGORY_ORDER:
+        if "cat:" + cat in signals:
+            return cat
     return "other"
 
-def guess_urgency(text: str) -> str:
-    """Guess urgency from text keywords."""
-    t = text.lower()
-    if any(k in t for k in ["asap", "urgent", "now", "immediately", "tonight"]):
+def _urgency(signals: Set[str]) -> str:
+    if "urg:now" in signals:
         return "now"
-    if any(k in t for k in ["today", "by end of day", "this evening"]):
+    if "urg:today" in signals:
         return "today"
     return "week"
 
-def guess_severity(category: str, text: str) -> int:
-    """Guess severity based on category and keywords."""
-    t = text.lower()
-    if category == "meds" and any(k in t for k in ["insulin", "oxygen", "dialysis", "heart", "seizure"]):
+def _severity(category: str, signals: Set[str]) -> int:
+    if category == "meds" and "sev:critical_med" in signals:
         return 5
-    if category in ["shelter"] and any(k in t for k in ["evac", "unsafe", "flood", "fire"]):
+    if category == "shelter" and "sev:unsafe" in signals:
         return 5
-    if "baby" in t or "infant" in t:
+    if "sev:infant" in signals:
         return 4
     if category == "meds":
         return 4
     return 2
 
+def guess_category(text: str) -> str:
+    """Guess category from text keywords."""
+    return _category(scan_signals(text))
+
+def guess_urgency(text: str) -> str:
+    """Guess urgency from text keywords."""
+    return _urgency(scan_signals(text))
+
+def guess_severity(category: str, text: str) -> int:
+    """Guess severity based on category and keywords."""
+    return _severity(category, scan_signals(text))
+
+_HEAD_SPLIT = re.compile(r"[:\-]\s*")
+_ITEM_SPLIT = re.compile(r",| and ")
+_NON_ITEM_CHARS = re.compile(r"[^a-zA-Z0-9\s]")
+
 def extract_items(text: str, category: str) -> List[Dict[str, Any]]:
     """Extract items from text using light heuristics."""
     t = text.strip()
     items = []
-    m = re.split(r"[:\-]\s*", t, maxsplit=1)
+    m = _HEAD_SPLIT.split(t, maxsplit=1)
     tail = m[1] if len(m) > 1 else t
-    parts = [p.strip() for p in re.split(r",| and ", tail) if p.strip()]
+    parts = [p.strip() for p in _ITEM_SPLIT.split(tail) if p.strip()]
     # limit to 6 items
     for p in parts[:6]:
-        name = re.sub(r"[^a-zA-Z0-9\s]", "", p).strip()
+        name = _NON_ITEM_CHARS.sub("", p).strip()
         if not name:
             continue
         items.append({"name": name[:60], "qty": 1, "unit": "unit", "notes": ""})
@@ -65,9 +203,10 @@ def estimate_price(category: str, items: List[Dict[str, Any]]) -> float:
 
 def fallback_parse(text: str) -> Dict[str, Any]:
     """Complete fallback parsing using keyword heuristics."""
-    cat = guess_category(text)
-    urg = guess_urgency(text)
-    sev = guess_severity(cat, text)
+    signals = scan_signals(text)
+    cat = _category(signals)
+    urg = _urgency(signals)
+    sev = _severity(cat, signals)
     items = extract_items(text, cat)
     price = estimate_price(cat, items)
     
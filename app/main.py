@@ -1,11 +1,63 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
+from app.archive import archiver
+from app.db import close_clients, get_async_client, reconcile_indexes
+from app.events import EVENTS_SOURCE, watch_changes
+from app.dedup import dedup
+from app.nearby import nearby
+from app.llm.client import close_http_client, get_http_client
+from app.metrics import MetricsMiddleware
 from app.routes.device import router as device_router
 from app.routes.requests import router as requests_router
 from app.routes.ai_routes import router as ai_router
+from app.routes.stream import router as stream_router
+from app.routes.metrics import router as metrics_router
+from app.routes.health import router as health_router
+from app.routes.helpers import router as helpers_router
+from app.routes.export import router as export_router
+
+log = logging.getLogger(__name__)
+
+async def _reconcile_indexes(app: FastAPI):
+    try:
+        app.state.indexes = await reconcile_indexes()
+    except Exception:
+        log.exception("index reconciliation failed")
+        app.state.indexes = "error"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # clients are created here, not at import; neither call waits on the network
+    get_async_client()
+    get_http_client()
 
-app = FastAPI(title="Mutual Aid API", version="1.0")
+    # index builds run in the background so the worker serves (and /healthz answers) right away
+    app.state.indexes = "pending"
+    tasks = [
+        asyncio.create_task(_reconcile_indexes(app)),
+        asyncio.create_task(nearby.run()),
+        asyncio.create_task(dedup.run()),
+        asyncio.create_task(archiver.run()),
+    ]
+    if EVENTS_SOURCE == "changestream":
+        tasks.append(asyncio.create_task(watch_changes()))
+    yield
+    for t in tasks:
+        t.cancel()
+    await close_http_client()
+    close_clients()
+
+app = FastAPI(title="Mutual Aid API", version="1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# map pages of up to 1000 cards compress ~5-10x
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +67,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# added last so it wraps everything (CORS preflights included) and times the full response
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(device_router, prefix="/v1", tags=["device"])
 app.include_router(ai_router, prefix="/v1", tags=["ai"])
+app.include_router(stream_router, prefix="/v1", tags=["stream"])
+app.include_router(helpers_router, prefix="/v1", tags=["helpers"])
+app.include_router(export_router, prefix="/v1", tags=["export"])
 app.include_router(requests_router, prefix="/v1", tags=["requests"])
+app.include_router(metrics_router, tags=["metrics"])
+app.include_router(health_router, tags=["health"])
@@ -0,0 +1,182 @@
+"""
+In-process metrics in the Prometheus text format, served at GET /metrics.
+
+Counters and histograms are plain dicts keyed by label values behind a lock, so
+recording a sample is a dict lookup plus a bisect. PyMongo command events arrive on
+driver threads, hence the locks; everything else records from the event loop.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+# seconds; covers sub-ms Mongo commands up to slow Gemini calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["_Metric"] = []
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join('%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"')) for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for labels, v in items:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {v}")
+        return lines
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (+Inf last)..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, seconds: float, *labels: str):
+        i = bisect_left(self.buckets, seconds)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[i] += 1
+            row[-1] += seconds
+
+    def count(self, *labels: str) -> int:
+        row = self._values.get(labels)
+        return sum(row[:-1]) if row else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        names = self.label_names + ("le",)
+        for labels, row in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {row[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+class Gauge(_Metric):
+    """Sampled at scrape time from a callback returning {label values: value}."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._fn: Callable[[], Dict[Tuple[str, ...], float]] = dict
+
+    def set_function(self, fn: Callable[[], Dict[Tuple[str, ...], float]]):
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, v in self._fn().items():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {v}")
+        return lines
+
+def render() -> str:
+    return "\n".join(line for m in _registry for line in m.render()) + "\n"
+
+http_duration = Histogram("http_request_duration_seconds", "HTTP request latency by route template.", ["method", "route", "status"])
+mongo_duration = Histogram("mongo_command_duration_seconds", "MongoDB command latency.", ["collection", "command", "outcome"])
+gemini_duration = Histogram("gemini_request_duration_seconds", "Gemini generateContent latency by outcome.", ["outcome"])
+intake_total = Counter("intake_results_total", "Intake parses by source (gemini or fallback) and reason.", ["source", "reason"])
+rank_job_duration = Histogram("rank_job_duration_seconds", "Duration of full re-rank passes.", buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+rank_job_changed = Counter("rank_job_changed_total", "Requests whose rank fields a re-rank pass rewrote.")
+admission_wait = Histogram("intake_admission_wait_seconds", "Time intake calls waited for a Gemini slot.", buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+admission_shed = Counter("intake_admission_shed_total", "Intake calls answered by the fallback parser because of load.", ["reason"])
+admission_slots = Gauge("intake_admission_slots", "Intake calls running against Gemini and waiting for a slot.", ["state"])
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering like BaseHTTPMiddleware)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router stores the matched route in the scope; label by its template, never the raw path
+            route = scope.get("route")
+            http_duration.observe(
+                time.perf_counter() - started,
+                scope["method"], getattr(route, "path", "<unmatched>"), str(status[0]),
+            )
+
+class MongoCommandListener(monitoring.CommandListener):
+    # commands whose target collection is under a different key than the command name
+    _COLLECTION_KEYS = {"getMore": "collection"}
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, int], Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        name = event.command_name
+        coll = event.command.get(self._COLLECTION_KEYS.get(name, name))
+        with self._lock:
+            self._pending[(event.request_id, event.operation_id or 0)] = (coll if isinstance(coll, str) else "", name)
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            coll, name = self._pending.pop((event.request_id, event.operation_id or 0), ("", event.command_name))
+        mongo_duration.observe(event.duration_micros / 1e6, coll, name, outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+mongo_listener = MongoCommandListener()
@@ -0,0 +1,58 @@
+"""
+One-off data migrations. Safe to re-run.
+
+    python -m app.migrations
+"""
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from app.db import ensure_indexes, get_db
+from app.geo import geohash, to_point
+
+def backfill_geo(batch_size: int = 1000) -> int:
+    """Add the GeoJSON `geo` point and `geohash` to requests created before they existed."""
+    q = {"$or": [{"geo": {"$exists": False}}, {"geohash": {"$exists": False}}], "location": {"$exists": True}}
+    requests_col = get_db()["requests"]
+    cursor = requests_col.find(q, {"location": 1}).batch_size(batch_size)
+    updated = 0
+    ops = []
+    for d in cursor:
+        loc = d["location"]
+        ops.append(UpdateOne({"_id": d["_id"]}, {"$set": {
+            "geo": to_point(loc["lat"], loc["lng"]),
+            "geohash": geohash(loc["lat"], loc["lng"]),
+        }}))
+        if len(ops) >= batch_size:
+            updated += requests_col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += requests_col.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+LEGACY_INDEXES = (
+    # lat/lng range index replaced by the 2dsphere index on `geo`
+    "location.lat_1_location.lng_1",
+    # single-field status/rank indexes are prefixes of the keyset compound indexes
+    "status_1", "rank_score_-1",
+    # full keyset indexes replaced by their live-only partial versions; status-less
+    # list pages now filter on the live statuses, so the rank-first one has no users
+    "status_1_rank_score_-1_created_at_-1__id_-1", "status_1_created_at_-1__id_-1",
+    "rank_score_-1_created_at_-1__id_-1",
+)
+
+def drop_legacy_indexes():
+    for name in LEGACY_INDEXES:
+        try:
+            get_db()["requests"].drop_index(name)
+        except OperationFailure:
+            pass
+
+def main():
+    print(f"backfill_geo: {backfill_geo()} documents updated")
+    # deploys running with MONGO_ENSURE_INDEXES=off build indexes here instead;
+    # built before the drop so list pages always have an index to use
+    ensure_indexes()
+    drop_legacy_indexes()
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,12 @@ class AInvokeOut(BaseModel):
     request_draft: Dict[str, Any]
     confidence: float = Field(ge=0.0, le=1.0)
 
+class AInvokeBatchIn(BaseModel):
+    items: List[AInvokeIn] = Field(min_length=1, max_length=100)
+
+class AInvokeBatchOut(BaseModel):
+    results: List[AInvokeOut]
+
 class CreateRequestIn(BaseModel):
     raw_text: str = Field(min_length=1, max_length=500)
     category: Category
@@ -57,6 +63,7 @@ class RequestDetailOut(RequestCardOut):
     created_at: datetime
     updated_at: datetime
     claim: Optional[Dict[str, Any]] = None
+    duplicate_of: Optional[str] = None
 
 class DonateIn(BaseModel):
     amount: float = Field(gt=0.0, le=2000.0)
@@ -71,4 +78,7 @@ class DeviceOut(BaseModel):
     device_token: str
 
 class RankOut(BaseModel):
-    updated: int
+    updated: int  # kept for older clients; same as changed
+    scanned: int
+    changed: int
+    elapsed_ms: float
@@ -0,0 +1,197 @@
+"""
+In-memory spatial index of claimable (funded) requests for GET /v1/helpers/nearby.
+
+Requests sit in a lat/lng grid; a lookup walks rings of cells outward from the
+helper and stops once no unvisited cell can beat the current k-th best. Results are
+ordered by a blend of distance and rank_score (lower cost is better):
+
+    cost = distance_km / NEARBY_DISTANCE_SCALE_KM - NEARBY_RANK_WEIGHT * rank_score
+
+The index is loaded at startup, kept current by bus events (donated/claimed/
+delivered/created), and rebuilt every NEARBY_RELOAD_S to pick up re-ranks and,
+with EVENTS_SOURCE=local, writes made by other workers.
+"""
+import asyncio
+import heapq
+import logging
+import math
+import os
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from app import repository
+from app.cards import CARD_SOURCE_PROJ, to_card
+from app.events import Event, bus
+
+log = logging.getLogger(__name__)
+
+NEARBY_CELL_DEG = float(os.getenv("NEARBY_CELL_DEG", "0.02"))  # ~2.2 km; dense metros want small cells
+NEARBY_DISTANCE_SCALE_KM = float(os.getenv("NEARBY_DISTANCE_SCALE_KM", "5"))
+NEARBY_RANK_WEIGHT = float(os.getenv("NEARBY_RANK_WEIGHT", "1.0"))
+NEARBY_RELOAD_S = float(os.getenv("NEARBY_RELOAD_S", "300"))
+NEARBY_MAX_KM = 100.0
+CLAIMABLE_STATUS = "funded"
+
+_EARTH_KM = 6371.0088
+_KM_PER_DEG = math.pi * _EARTH_KM / 180.0
+
+Cell = Tuple[int, int]
+Entry = Tuple[float, str, float, float]  # (-rank_score, id, lat, lng), sorted best rank first
+
+def distance_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    # equirectangular; within 0.5% of great-circle distance at the <=100 km this serves
+    dlng = (lng2 - lng1 + 180.0) % 360.0 - 180.0
+    x = dlng * math.cos(math.radians((lat1 + lat2) / 2))
+    return _KM_PER_DEG * math.hypot(x, lat2 - lat1)
+
+def blend_cost(distance_km: float, rank_score: float) -> float:
+    return distance_km / NEARBY_DISTANCE_SCALE_KM - NEARBY_RANK_WEIGHT * rank_score
+
+class NearbyIndex:
+    def __init__(self, cell_deg: float = NEARBY_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cols = int(round(360.0 / cell_deg))
+        self._rows = int(round(180.0 / cell_deg))
+        self._cells: Dict[Cell, List[Entry]] = {}
+        self._cards: Dict[str, dict] = {}
+        self._where: Dict[str, Tuple[Cell, Entry]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        r = min(self._rows - 1, max(0, math.floor((lat + 90.0) / self.cell_deg)))
+        c = math.floor((lng + 180.0) / self.cell_deg) % self._cols
+        return r, c
+
+    def upsert(self, card: dict):
+        rid = card["id"]
+        if card["status"] != CLAIMABLE_STATUS:
+            self.remove(rid)
+            return
+        self.remove(rid)
+        cell = self._cell(card["lat"], card["lng"])
+        entry = (-card["rank_score"], rid, card["lat"], card["lng"])
+        insort(self._cells.setdefault(cell, []), entry)
+        self._where[rid] = (cell, entry)
+        self._cards[rid] = card
+
+    def remove(self, rid: str):
+        placed = self._where.pop(rid, None)
+        if placed is None:
+            return
+        cell, entry = placed
+        entries = self._cells[cell]
+        del entries[bisect_left(entries, entry)]
+        if not entries:
+            del self._cells[cell]
+        del self._cards[rid]
+
+    def _cell_min_km(self, lat: float, lng: float, cell: Cell) -> float:
+        """Lower bound on the distance from (lat, lng) to anything in the cell."""
+        row, col = cell
+        d = self.cell_deg
+        south, west = row * d - 90.0, col * d - 180.0
+        dlat = max(south - lat, 0.0, lat - (south + d))
+        # longitude offset to the nearer cell edge, either way round the globe
+        off = (lng - west) % 360.0
+        dlng = 0.0 if off <= d else min(off - d, 360.0 - off)
+        worst_lat = min(85.0, max(abs(south), abs(south + d)))
+        return _KM_PER_DEG * math.hypot(dlng * math.cos(math.radians(worst_lat)), dlat)
+
+    def _ring(self, center: Cell, r: int):
+        row0, col0 = center
+        for row in range(row0 - r, row0 + r + 1):
+            if not 0 <= row < self._rows:
+                continue
+            edge = row in (row0 - r, row0 + r)
+            # the full row on the top/bottom edge, only the two end cells in between
+            cols = range(col0 - r, col0 + r + 1) if edge else (col0 - r, col0 + r) if r else (col0,)
+            for col in cols:
+                cell = (row, col % self._cols)
+                entries = self._cells.get(cell)
+                if entries:
+                    yield cell, entries
+
+    def nearest(self, lat: float, lng: float, k: int, max_km: float = NEARBY_MAX_KM) -> List[Tuple[float, float, dict]]:
+        """Up to k (cost, distance_km, card) within max_km, cheapest first."""
+        center = self._cell(lat, lng)
+        best: List[Tuple[float, float, str]] = []  # min-heap on -cost, so best[0] is the worst kept
+        scale, weight = NEARBY_DISTANCE_SCALE_KM, NEARBY_RANK_WEIGHT
+        r = 0
+        while r <= self._cols // 2:
+            # every cell in ring r is at least (r - 1) cells away in lat or lng;
+            # lng degrees shrink toward the poles, so use the worst latitude the ring reaches
+            lat_edge = min(85.0, abs(lat) + (r + 1) * self.cell_deg)
+            ring_km = max(0, r - 1) * self.cell_deg * _KM_PER_DEG * math.cos(math.radians(lat_edge))
+            if ring_km > max_km:
+                break
+            # rank_score is at most 1, so nothing further out can cost less than this
+            if len(best) >= k and -best[0][0] <= ring_km / scale - weight:
+                break
+            for cell, entries in self._ring(center, r):
+                cell_km = self._cell_min_km(lat, lng, cell)
+                if cell_km > max_km:
+                    continue
+                # entries are sorted best rank first, so once the bound fails the rest of the cell can't win
+                for neg_rank, rid, elat, elng in entries:
+                    full = len(best) >= k
+                    if full and -best[0][0] <= cell_km / scale + weight * neg_rank:
+                        break
+                    d = distance_km(lat, lng, elat, elng)
+                    if d > max_km:
+                        continue
+                    item = (-(d / scale + weight * neg_rank), d, rid)
+                    if not full:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            r += 1
+        return [(-neg, d, self._cards[rid]) for neg, d, rid in sorted(best, reverse=True)]
+
+class NearbyService:
+    """Owns the live index: swaps in a freshly loaded one on reload, applies events in between."""
+
+    def __init__(self):
+        self.index: Optional[NearbyIndex] = None
+        self._replay: Optional[List[dict]] = None  # events seen while a reload is scanning
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    async def reload(self):
+        fresh = NearbyIndex()
+        self._replay = []
+        try:
+            cursor = repository.iter_requests({"status": CLAIMABLE_STATUS}, CARD_SOURCE_PROJ, 1000)
+            async for d in cursor:
+                fresh.upsert(to_card(d))
+            # no await from here to the swap, so nothing slips between replay and swap
+            for card in self._replay:
+                fresh.upsert(card)
+        finally:
+            self._replay = None
+        self.index = fresh
+
+    def on_event(self, event: Event):
+        card = event["request"]
+        if self._replay is not None:
+            self._replay.append(card)
+        if self.index is not None:
+            self.index.upsert(card)
+
+    async def run(self):
+        """Lifespan task: initial load, then periodic rebuilds."""
+        while True:
+            try:
+                await self.reload()
+                log.info("nearby index loaded: %d claimable requests", len(self.index))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("nearby index load failed")
+            await asyncio.sleep(NEARBY_RELOAD_S)
+
+nearby = NearbyService()
+bus.add_listener(nearby.on_event)
@@ -0,0 +1,160 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from app import repository
+from app.metrics import rank_job_changed, rank_job_duration
+from app.triage import AGE_CAP_H, URGENCY_WEIGHTS, W_AGE, W_GAP, W_SEVERITY, W_URGENCY, rank_batch
+
+RANKABLE_STATUSES = ["open", "funded"]
+RANK_BATCH_SIZE = int(os.getenv("RANK_BATCH_SIZE", "1000"))
+
+# "stored": sort on the persisted rank_score (refreshed by /ai/rank)
+# "live":   add the age term inside the query, so ordering never goes stale
+RANK_MODE = os.getenv("RANK_MODE", "stored")
+
+# Mongo's $round and Python's round() can settle a x.xxx5 tie on different sides, so a
+# score computed in an aggregation may differ from triage.rank_score by one step of 0.001
+SCORE_TOLERANCE = 1e-3
+
+# Mongo mirror of triage.rank_static, computed from the document's current fields
+_STATIC_FROM_FIELDS = {"$add": [
+    {"$multiply": [W_URGENCY, {"$switch": {
+        "branches": [{"case": {"$eq": ["$urgency_window", k]}, "then": v} for k, v in URGENCY_WEIGHTS.items()],
+        "default": 0.0,
+    }}]},
+    {"$multiply": [W_SEVERITY, {"$divide": [{"$subtract": ["$severity", 1]}, 4]}]},
+    {"$multiply": [W_GAP, {"$subtract": [1.0, {"$ifNull": ["$progress", 0.0]}]}]},
+]}
+# stored value when present (documents written before rank_static existed fall back)
+_STATIC_EXPR = {"$ifNull": ["$rank_static", _STATIC_FROM_FIELDS]}
+
+def _age_hours_expr(now: datetime) -> dict:
+    return {"$max": [0.0, {"$divide": [{"$divide": [{"$subtract": [now, "$created_at"]}, 1000.0]}, 3600.0]}]}
+
+def live_rank_expr(now: datetime, static: dict = _STATIC_EXPR) -> dict:
+    """Aggregation expression equal to triage.rank_score evaluated at `now` (within SCORE_TOLERANCE)."""
+    score = {"$add": [static, {"$multiply": [W_AGE, {"$min": [1.0, {"$divide": [_age_hours_expr(now), AGE_CAP_H]}]}]}]}
+    return {"$round": [{"$max": [0.0, {"$min": [1.0, score]}]}, 3]}
+
+def rank_reason_expr(now: datetime) -> dict:
+    """Aggregation expression equal to triage.rank_reason_text evaluated at `now`."""
+    parts = {"$filter": {
+        "input": [
+            {"$switch": {"branches": [
+                {"case": {"$eq": ["$urgency_window", "now"]}, "then": "time-critical"},
+                {"case": {"$eq": ["$urgency_window", "today"]}, "then": "needed today"},
+            ], "default": None}},
+            {"$cond": [{"$gte": ["$severity", 4]}, "high severity", None]},
+            {"$cond": [{"$lt": ["$progress", 0.5]}, "large funding gap", None]},
+            {"$cond": [{"$gte": [_age_hours_expr(now), 2]}, "waiting for help", None]},
+        ],
+        "cond": {"$ne": ["$$this", None]},
+    }}
+    joined = {"$reduce": {
+        "input": {"$slice": [parts, 3]},
+        "initialValue": "",
+        "in": {"$cond": [{"$eq": ["$$value", ""]}, "$$this", {"$concat": ["$$value", ", ", "$$this"]}]},
+    }}
+    return {"$let": {"vars": {"joined": joined}, "in": {"$cond": [{"$eq": ["$$joined", ""]}, "general need", "$$joined"]}}}
+
+def funding_update(amount: float, now: datetime) -> List[dict]:
+    """
+    Update pipeline for a donation: adds `amount` and recomputes progress, status and
+    the rank fields from the new total inside the same atomic write. The rank_score
+    written here is within SCORE_TOLERANCE of triage.rank_score; the next rerank pass
+    replaces it with the Python value.
+    """
+    no_goal = {"$lte": ["$funding_goal", 0]}
+    return [
+        {"$set": {"funded_amount": {"$add": ["$funded_amount", amount]}, "updated_at": now}},
+        {"$set": {
+            "progress": {"$cond": [no_goal, 1.0, {"$max": [0.0, {"$min": [1.0, {"$divide": ["$funded_amount", "$funding_goal"]}]}]}]},
+            "status": {"$cond": [{"$or": [no_goal, {"$gte": ["$funded_amount", "$funding_goal"]}]}, "funded", "$status"]},
+        }},
+        {"$set": {"rank_static": _STATIC_FROM_FIELDS}},
+        {"$set": {
+            "rank_score": live_rank_expr(now, static="$rank_static"),
+            "rank_reason": rank_reason_expr(now),
+        }},
+    ]
+
+def live_rank_pipeline(q: dict, proj: dict, limit: int, now: datetime, after: Optional[dict] = None) -> List[dict]:
+    # `after` is a keyset filter on the computed rank_score, so it can only run after $addFields
+    return [
+        {"$match": q},
+        {"$addFields": {"rank_score": live_rank_expr(now)}},
+        *([{"$match": after}] if after else []),
+        {"$sort": {"rank_score": -1, "created_at": -1, "_id": -1}},
+        {"$limit": limit},
+        {"$project": proj},
+    ]
+
+_RANK_FIELDS = {
+    "status": 1, "urgency_window": 1, "severity": 1, "progress": 1, "created_at": 1,
+    "rank_score": 1, "rank_reason": 1, "rank_static": 1,
+}
+
+def _rank_chunk(docs: List[dict], now: datetime) -> List[UpdateOne]:
+    scores, reasons, statics = rank_batch(
+        [d["urgency_window"] for d in docs],
+        [int(d["severity"]) for d in docs],
+        [float(d.get("progress", 0.0)) for d in docs],
+        [d["created_at"] for d in docs],
+        now,
+    )
+    ops = []
+    for d, rscore, rreason, rstatic in zip(docs, scores, reasons, statics):
+        # only touch documents whose ranking actually moved
+        if d.get("rank_score") == rscore and d.get("rank_reason") == rreason and d.get("rank_static") == rstatic:
+            continue
+        # scored from what was read; a donate or status change since then wins over this write
+        ops.append(UpdateOne(
+            {"_id": d["_id"], "status": d["status"], "progress": d.get("progress", {"$exists": False})},
+            {"$set": {"rank_score": rscore, "rank_reason": rreason, "rank_static": rstatic, "updated_at": now}},
+        ))
+    return ops
+
+async def _flush(chunk: List[dict], now: datetime) -> int:
+    ops = _rank_chunk(chunk, now)
+    if not ops:
+        return 0
+    return await repository.bulk_update_requests(ops)
+
+async def rerank_all(batch_size: int = RANK_BATCH_SIZE) -> Dict[str, float]:
+    """
+    Recompute rank fields for every open/funded request.
+
+    Documents are scored a chunk at a time and only changed ones are written back,
+    with one unordered bulk write per chunk.
+    """
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    scanned = 0
+    changed = 0
+
+    cursor = repository.iter_requests({"status": {"$in": RANKABLE_STATUSES}}, _RANK_FIELDS, batch_size)
+    chunk = []
+    async for d in cursor:
+        chunk.append(d)
+        if len(chunk) < batch_size:
+            continue
+        scanned += len(chunk)
+        changed += await _flush(chunk, now)
+        chunk = []
+
+    if chunk:
+        scanned += len(chunk)
+        changed += await _flush(chunk, now)
+
+    elapsed = time.perf_counter() - started
+    rank_job_duration.observe(elapsed)
+    rank_job_changed.inc(amount=changed)
+    return {
+        "scanned": scanned,
+        "changed": changed,
+        "elapsed_ms": round(elapsed * 1000.0, 1),
+    }
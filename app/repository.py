@@ -0,0 +1,74 @@
+"""
+Async data access for requests and donations.
+
+Route handlers go through these functions instead of touching collections directly,
+so every Mongo round-trip awaits on the event loop rather than pinning a threadpool thread.
+
+Reads default to the primary. routed=True lets a read follow MONGO_READ_ROUTING (see
+app/db.py); pass a session from app.causal.read_session to keep it causally after a write.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.db import ARCHIVE_COLLECTIONS, async_collection
+
+SortSpec = Sequence[Tuple[str, int]]
+
+async def insert_request(doc: Dict[str, Any]) -> ObjectId:
+    res = await async_collection("requests").insert_one(doc)
+    return res.inserted_id
+
+async def get_request(rid: ObjectId, routed: bool = False, session=None, archived: bool = False) -> Optional[Dict[str, Any]]:
+    d = await async_collection("requests", routed).find_one({"_id": rid}, session=session)
+    if d is None and archived:
+        # the archiver copies before it deletes, so the primary always has one or the other
+        d = await async_collection(ARCHIVE_COLLECTIONS["requests"]).find_one({"_id": rid})
+    return d
+
+async def find_requests(q: dict, proj: dict, sort: SortSpec, limit: int) -> List[Dict[str, Any]]:
+    cursor = async_collection("requests").find(q, proj).sort(list(sort)).limit(limit)
+    return await cursor.to_list(length=limit)
+
+async def aggregate_requests(pipeline: List[dict], limit: Optional[int], routed: bool = False, session=None) -> List[Dict[str, Any]]:
+    return await async_collection("requests", routed).aggregate(pipeline, session=session).to_list(length=limit)
+
+def watch_requests(pipeline: List[dict], **kwargs):
+    # change stream; caller uses it as an async context manager
+    return async_collection("requests").watch(pipeline, **kwargs)
+
+def stream_aggregate(collection: str, pipeline: List[dict], batch_size: int, routed: bool = False):
+    # async cursor for exports; rows arrive batch_size at a time, never all at once
+    return async_collection(collection, routed).aggregate(pipeline, batchSize=batch_size, allowDiskUse=True)
+
+def iter_requests(q: dict, proj: dict, batch_size: int):
+    # async cursor; caller drives it with `async for`
+    return async_collection("requests").find(q, proj).batch_size(batch_size)
+
+async def update_request(q: dict, update: dict) -> Optional[Dict[str, Any]]:
+    return await async_collection("requests").find_one_and_update(q, update, return_document=ReturnDocument.AFTER)
+
+async def bulk_update_requests(ops: list) -> int:
+    res = await async_collection("requests").bulk_write(ops, ordered=False)
+    return res.modified_count
+
+async def insert_donations(rid: ObjectId, donations: Sequence[Tuple[str, float, datetime]]) -> List[ObjectId]:
+    res = await async_collection("donations").insert_many([
+        {"request_id": rid, "donor_id": donor, "amount": amount, "created_at": created_at}
+        for donor, amount, created_at in donations
+    ], ordered=False)
+    return res.inserted_ids
+
+async def copy_to_archive(collection: str, q: dict) -> None:
+    # server-side copy; running it again for the same documents just replaces the earlier copies
+    await async_collection(collection).aggregate([
+        {"$match": q},
+        {"$set": {"archived_at": "$$NOW"}},
+        {"$merge": {"into": ARCHIVE_COLLECTIONS[collection], "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]).to_list(length=None)
+
+async def delete_many(collection: str, q: dict) -> int:
+    res = await async_collection(collection).delete_many(q)
+    return res.deleted_count
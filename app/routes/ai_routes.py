@@ -1,12 +1,19 @@
-from fastapi import APIRouter
-from app.models import AInvokeIn, AInvokeOut
-from app.llm import ai_invoke
+from fastapi import APIRouter, Header
+from app.models import AInvokeIn, AInvokeOut, AInvokeBatchIn, AInvokeBatchOut
+from app.llm import ai_invoke, ai_invoke_many, intake_cache
+from app.llm.admission import intake_admission
+from app.llm.batcher import intake_batcher
+from app.llm.breaker import gemini_breaker
+from app.archive import archiver
+from app.clusters import cluster_cache
+from app.dedup import dedup
+from app.details import detail_cache
 
 router = APIRouter()
 
 @router.post("/ai/invoke", response_model=AInvokeOut)
-async def invoke(payload: AInvokeIn):
-    result = await ai_invoke(payload.text)
+async def invoke(payload: AInvokeIn, x_device_token: str | None = Header(default=None, alias="X-Device-Token")):
+    result = await ai_invoke(payload.text, x_device_token)
 
     draft = result["draft"]
     # include affordability (frontend needs it)
@@ -16,3 +23,28 @@ async def invoke(payload: AInvokeIn):
         request_draft=draft,
         confidence=float(result["confidence"])
     )
+
+@router.post("/ai/invoke_batch", response_model=AInvokeBatchOut)
+async def invoke_batch(payload: AInvokeBatchIn, x_device_token: str | None = Header(default=None, alias="X-Device-Token")):
+    # bulk import path: same cache/batching/fallback as /ai/invoke, results in input order
+    results = await ai_invoke_many([it.text for it in payload.items], x_device_token)
+
+    out = []
+    for it, result in zip(payload.items, results):
+        draft = result["draft"]
+        draft["requester_afford"] = float(it.requester_afford)
+        out.append(AInvokeOut(request_draft=draft, confidence=float(result["confidence"])))
+    return AInvokeBatchOut(results=out)
+
+@router.get("/ai/stats")
+def ai_stats():
+    return {
+        "intake_cache": intake_cache.stats(),
+        "intake_batcher": intake_batcher.stats(),
+        "gemini_breaker": gemini_breaker.stats(),
+        "intake_admission": intake_admission.stats(),
+        "detail_cache": detail_cache.stats(),
+        "cluster_cache": cluster_cache.stats(),
+        "dedup": dedup.stats(),
+        "archive": archiver.stats(),
+    }
@@ -0,0 +1,77 @@
+import os
+import secrets
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.export import (
+    DONATION_EXPORT_FIELDS, REQUEST_EXPORT_FIELDS, created_range,
+    donation_rows, export_stream, request_rows,
+)
+from app.geo import bbox_filter, parse_bbox
+
+router = APIRouter()
+
+# full dumps include raw request text; exports stay off until this is set, and callers send it as X-Export-Token
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN")
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+def require_export_token(token: str | None):
+    if not EXPORT_TOKEN:
+        raise HTTPException(status_code=503, detail="exports are disabled; set EXPORT_TOKEN")
+    if not (token and secrets.compare_digest(token, EXPORT_TOKEN)):
+        raise HTTPException(status_code=403, detail="export token required")
+
+def check_format(fmt: str) -> str:
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson|csv")
+    return fmt
+
+def streaming(chunks, fmt: str, name: str) -> StreamingResponse:
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+@router.get("/export/requests")
+async def export_requests(
+    format: str = Query(default="ndjson", description="ndjson|csv"),
+    status: str | None = Query(default=None),
+    bbox: str | None = Query(default=None, description="minLat,minLng,maxLat,maxLng"),
+    start: datetime | None = Query(default=None, description="created_at >= start (ISO 8601)"),
+    end: datetime | None = Query(default=None, description="created_at < end (ISO 8601)"),
+    archived: bool = Query(default=True, description="also stream archived requests, after the live ones"),
+    x_export_token: str | None = Header(default=None, alias="X-Export-Token"),
+):
+    require_export_token(x_export_token)
+    fmt = check_format(format)
+    q = created_range(start, end)
+    if status:
+        q["status"] = status
+    if bbox:
+        try:
+            q.update(bbox_filter(parse_bbox(bbox)))
+        except Exception:
+            raise HTTPException(status_code=400, detail="bbox must be minLat,minLng,maxLat,maxLng")
+    chunks = export_stream(request_rows(q, archived), fmt, REQUEST_EXPORT_FIELDS)
+    return streaming(chunks, fmt, "requests")
+
+@router.get("/export/donations")
+async def export_donations(
+    format: str = Query(default="ndjson", description="ndjson|csv"),
+    request_id: str | None = Query(default=None),
+    start: datetime | None = Query(default=None, description="created_at >= start (ISO 8601)"),
+    end: datetime | None = Query(default=None, description="created_at < end (ISO 8601)"),
+    archived: bool = Query(default=True, description="also stream archived donations, after the live ones"),
+    x_export_token: str | None = Header(default=None, alias="X-Export-Token"),
+):
+    require_export_token(x_export_token)
+    fmt = check_format(format)
+    q = created_range(start, end)
+    if request_id:
+        if not ObjectId.is_valid(request_id):
+            raise HTTPException(status_code=400, detail="invalid id")
+        q["request_id"] = ObjectId(request_id)
+    chunks = export_stream(donation_rows(q, archived), fmt, DONATION_EXPORT_FIELDS)
+    return streaming(chunks, fmt, "donations")
@@ -0,0 +1,27 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse
+
+from app.db import get_async_client
+
+router = APIRouter()
+
+READY_PING_TIMEOUT_S = 1.0
+
+@router.get("/healthz")
+def healthz():
+    # liveness: the process is up and serving; never touches the database
+    return {"status": "ok", "pid": os.getpid()}
+
+@router.get("/readyz")
+async def readyz(request: Request):
+    # readiness: only route traffic here once Mongo answers
+    try:
+        await asyncio.wait_for(get_async_client().admin.command("ping"), READY_PING_TIMEOUT_S)
+        db = "ok"
+    except Exception as e:
+        db = type(e).__name__
+    body = {"status": "ok" if db == "ok" else "unavailable", "db": db, "indexes": request.app.state.indexes}
+    return ORJSONResponse(body, status_code=200 if db == "ok" else 503)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Query
+
+from app import repository
+from app.cards import CARD_SOURCE_PROJ, to_card
+from app.geo import near_stage
+from app.nearby import CLAIMABLE_STATUS, NEARBY_MAX_KM, blend_cost, nearby
+
+router = APIRouter()
+
+async def _nearest_from_db(lat: float, lng: float, k: int, radius_km: float):
+    # only used until the in-memory index has loaded; over-fetch so the blend can reorder
+    pipeline = [
+        near_stage(lat, lng, radius_km, {"status": CLAIMABLE_STATUS}),
+        {"$limit": k * 5},
+        {"$project": {**CARD_SOURCE_PROJ, "distance_m": 1}},
+    ]
+    docs = await repository.aggregate_requests(pipeline, k * 5)
+    scored = []
+    for d in docs:
+        card = to_card(d)
+        dist = d["distance_m"] / 1000.0
+        scored.append((blend_cost(dist, card["rank_score"]), dist, card))
+    scored.sort(key=lambda t: t[0])
+    return scored[:k]
+
+@router.get("/helpers/nearby")
+async def helpers_nearby(
+    lat: float = Query(ge=-90.0, le=90.0),
+    lng: float = Query(ge=-180.0, le=180.0),
+    k: int = Query(default=10, ge=1, le=50),
+    radius_km: float = Query(default=25.0, gt=0.0, le=NEARBY_MAX_KM),
+):
+    if nearby.ready:
+        hits = nearby.index.nearest(lat, lng, k, radius_km)
+    else:
+        hits = await _nearest_from_db(lat, lng, k, radius_km)
+    return {"requests": [
+        {**card, "distance_km": round(dist, 3), "score": round(-cost, 4)}
+        for cost, dist, card in hits
+    ]}
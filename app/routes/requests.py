@@ -1,14 +1,28 @@
 from fastapi import APIRouter, Header, HTTPException, Query
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import os
 from bson import ObjectId
-from pymongo import ReturnDocument
 
-from app.db import requests_col, donations_col
+from app import repository
+from app.causal import note_write, read_session
+from app.cards import CARD_PROJ, CARD_SOURCE_PROJ, to_card, to_columns
+from app.clusters import CLUSTER_STATUSES, MAX_ZOOM, cluster_cache
+from app.cursors import PAGE_KEYS, after_watermark, before_keyset, decode_page_token, decode_watermark, encode_page_token, encode_watermark
+from app.db import LIVE_STATUSES
+from app.dedup import DEDUP_MODE, DEDUP_STATUSES, dedup, signature
+from app.details import detail_cache
+from app.etag import etag_response, json_with_etag
+from app.events import emit
+from app.funding import donation_combiner
+from app.geo import bbox_filter, geohash, near_stage, parse_bbox, parse_latlng, to_point
 from app.models import CreateRequestIn, RequestDetailOut, DonateIn, DonateOut, RankOut, ClaimOut
-from app.triage import compute_funding_goal, progress_ratio, rank_score, rank_reason_text
+from app.triage import compute_funding_goal, progress_ratio, rank_score, rank_reason_text, rank_static
+from app.ranking import RANK_MODE, live_rank_expr, live_rank_pipeline, rerank_all
 
 router = APIRouter()
 
+DELTA_SETTLE_MS = int(os.getenv("DELTA_SETTLE_MS", "1000"))
+
 def require_device(x_device_token: str | None) -> str:
     if not x_device_token:
         raise HTTPException(status_code=400, detail="Missing X-Device-Token")
@@ -25,8 +39,29 @@ def public_location(loc: dict) -> dict:
     return {"lat": float(loc["lat"]), "lng": float(loc["lng"])}
 
 @router.post("/requests")
-def create_request(payload: CreateRequestIn, x_device_token: str | None = Header(default=None, alias="X-Device-Token")):
+async def create_request(payload: CreateRequestIn, x_device_token: str | None = Header(default=None, alias="X-Device-Token")):
     device = require_device(x_device_token)
+    lat, lng = payload.location.lat, payload.location.lng
+
+    sig, dup = None, None
+    if DEDUP_MODE != "off":
+        sig = signature(payload.raw_text, [it.name for it in payload.items])
+        dup = dedup.check(lat, lng, sig)
+    if dup and DEDUP_MODE == "merge":
+        existing = await repository.update_request(
+            {"_id": ObjectId(dup[0]), "status": {"$in": DEDUP_STATUSES}},
+            {"$inc": {"duplicate_count": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+        if existing:
+            note_write(device)
+            emit("updated", existing)
+            dedup.merged += 1
+            return {"request": {"id": dup[0], **{k: existing[k] for k in [
+                "status","funding_goal","funded_amount","progress","rank_score"
+            ]}}, "duplicate_of": dup[0], "merged": True}
+        # claimed or gone since the index last heard; create as usual
+        dedup.remove(dup[0])
+        dup = None
 
     funding_goal = compute_funding_goal(payload.estimated_total, payload.requester_afford)
     funded_amount = 0.0
@@ -37,6 +72,7 @@ def create_request(payload: CreateRequestIn, x_device_token: str | None = Header
     rreason = rank_reason_text(payload.urgency_window, payload.severity, prog, now)
 
     doc = {
+        "_id": ObjectId(),
         "created_at": now,
         "updated_at": now,
         "created_by": device,
@@ -48,6 +84,8 @@ def create_request(payload: CreateRequestIn, x_device_token: str | None = Header
         "items": [it.model_dump() for it in payload.items],
 
         "location": public_location(payload.location.model_dump()),
+        "geo": to_point(lat, lng),
+        "geohash": geohash(lat, lng),
         "status": "open",
 
         "estimated_total": round(float(payload.estimated_total), 2),
@@ -58,99 +96,163 @@ def create_request(payload: CreateRequestIn, x_device_token: str | None = Header
 
         "rank_score": rscore,
         "rank_reason": rreason,
+        "rank_static": rank_static(payload.urgency_window, payload.severity, prog),
         "claim": None,
     }
-
-    res = requests_col.insert_one(doc)
-    return {"request": {"id": str(res.inserted_id), **{k: doc[k] for k in [
+    if dup:
+        doc["duplicate_of"] = ObjectId(dup[0])
+        doc["duplicate_score"] = round(dup[1], 3)
+        dedup.flagged += 1
+
+    # indexed before the insert awaits, so a retry racing this one in the same worker sees it;
+    # flagged duplicates stay out, so later copies match the original, not a chain of copies
+    rid = str(doc["_id"])
+    if sig is not None and not dup:
+        dedup.add(rid, lat, lng, sig)
+    try:
+        await repository.insert_request(doc)
+    except Exception:
+        dedup.remove(rid)
+        raise
+    note_write(device)
+    emit("created", doc)
+    return {"request": {"id": rid, **{k: doc[k] for k in [
         "status","funding_goal","funded_amount","progress","rank_score"
-    ]}}}
+    ]}}, "duplicate_of": dup[0] if dup else None, "merged": False}
+
+async def list_changes(q: dict, status: str | None, since: str, limit: int) -> dict:
+    # Delta sync: everything in view touched after the watermark, oldest first.
+    # Writes newer than DELTA_SETTLE_MS are held back so a slower concurrent write
+    # with an earlier updated_at can't land behind a watermark we already handed out.
+    # Always read from the primary: a lagging secondary could miss writes the watermark then skips.
+    try:
+        wm_at, wm_id = decode_watermark(since)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid since token")
+
+    settled = datetime.now(timezone.utc) - timedelta(milliseconds=DELTA_SETTLE_MS)
+    dq = {"$and": [q, after_watermark(wm_at, wm_id), {"updated_at": {"$lte": settled}}]}
+    proj = {**CARD_SOURCE_PROJ, "updated_at": 1}
+    docs = await repository.find_requests(dq, proj, [("updated_at", 1), ("_id", 1)], limit)
+
+    # same view as a full reload: without a status, requests that finished drop out
+    shown = [status] if status else LIVE_STATUSES
+    upserted, removed = [], []
+    for d in docs:
+        if d["status"] not in shown:
+            removed.append(str(d["_id"]))
+            continue
+        if RANK_MODE == "live" and d["status"] in ["open", "funded"]:
+            d["rank_score"] = rank_score(d["urgency_window"], int(d["severity"]), float(d["progress"]), d["created_at"])
+        upserted.append(to_card(d))
+
+    next_since = encode_watermark(docs[-1]["updated_at"], docs[-1]["_id"]) if docs else since
+    return {"requests": upserted, "removed": removed, "since": next_since, "more": len(docs) == limit}
 
 @router.get("/requests")
-def list_requests(
+async def list_requests(
     bbox: str | None = Query(default=None, description="minLat,minLng,maxLat,maxLng"),
-    status: str | None = Query(default=None, description="open|funded|claimed|delivered"),
+    status: str | None = Query(default=None, description="open|funded|claimed|delivered|cancelled; default open+funded+claimed"),
     sort: str = Query(default="rank", description="rank|new"),
     limit: int = Query(default=200, ge=1, le=1000),
+    near: str | None = Query(default=None, description="lat,lng; results sorted by distance"),
+    radius_km: float = Query(default=10.0, gt=0.0, le=500.0),
+    since: str | None = Query(default=None, description="sync token from a previous response; returns only changes"),
+    cursor: str | None = Query(default=None, description="'next' token from the previous page"),
+    format: str = Query(default="rows", description="rows|columns (parallel arrays per field)"),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    x_device_token: str | None = Header(default=None, alias="X-Device-Token"),
 ):
     q = {}
-    if status:
-        q["status"] = status
 
     if bbox:
         try:
-            minLat, minLng, maxLat, maxLng = [float(x) for x in bbox.split(",")]
+            q.update(bbox_filter(parse_bbox(bbox)))
         except Exception:
             raise HTTPException(status_code=400, detail="bbox must be minLat,minLng,maxLat,maxLng")
-        q["location.lat"] = {"$gte": minLat, "$lte": maxLat}
-        q["location.lng"] = {"$gte": minLng, "$lte": maxLng}
-
-    proj = {
-        "category": 1, "urgency_window": 1, "severity": 1, "status": 1,
-        "location": 1, "estimated_total": 1, "requester_afford": 1,
-        "funding_goal": 1, "funded_amount": 1, "progress": 1,
-        "rank_score": 1
-    }
 
-    cursor = requests_col.find(q, proj)
-    if sort == "new":
-        cursor = cursor.sort("created_at", -1)
+    if since:
+        return await list_changes(q, status, since, limit)
+
+    # no status means live requests: the app hides finished ones, and the list indexes only cover live ones
+    q["status"] = status or {"$in": LIVE_STATUSES}
+
+    center = None
+    if near:
+        try:
+            center = parse_latlng(near)
+        except Exception:
+            raise HTTPException(status_code=400, detail="near must be lat,lng")
+        # distance-sorted results are a single page; there is no keyset to continue from
+        if cursor:
+            raise HTTPException(status_code=400, detail="cursor cannot be combined with near")
+
+    sort = "new" if sort == "new" else "rank"
+    keys = PAGE_KEYS[sort]
+    now = datetime.now(timezone.utc)
+    after = None
+    if cursor:
+        try:
+            values, at = decode_page_token(cursor, sort)
+        except Exception:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        after = before_keyset(keys, values)
+        now = at or now
+
+    # sync token for the next poll; a little overlap is fine since upserts are idempotent
+    sync_since = encode_watermark(datetime.now(timezone.utc) - timedelta(milliseconds=DELTA_SETTLE_MS), ObjectId("0" * 24))
+
+    if center:
+        pipeline = [near_stage(center[0], center[1], radius_km, q), {"$limit": limit}]
+        if RANK_MODE == "live":
+            pipeline.append({"$addFields": {"rank_score": live_rank_expr(now)}})
+        pipeline.append({"$project": {**CARD_PROJ, "distance_km": {"$round": [{"$divide": ["$distance_m", 1000.0]}, 3]}}})
+    elif sort == "rank" and RANK_MODE == "live":
+        pipeline = live_rank_pipeline(q, CARD_PROJ, limit, now, after)
     else:
-        cursor = cursor.sort("rank_score", -1).sort("created_at", -1)
-
-    cursor = cursor.limit(limit)
-
-    out = []
-    for d in cursor:
-        out.append({
-            "id": str(d["_id"]),
-            "category": d["category"],
-            "urgency_window": d["urgency_window"],
-            "severity": d["severity"],
-            "status": d["status"],
-            "lat": d["location"]["lat"],
-            "lng": d["location"]["lng"],
-            "estimated_total": float(d["estimated_total"]),
-            "requester_afford": float(d["requester_afford"]),
-            "funding_goal": float(d["funding_goal"]),
-            "funded_amount": float(d["funded_amount"]),
-            "progress": float(d["progress"]),
-            "rank_score": float(d.get("rank_score", 0.0)),
-        })
-
-    return {"requests": out}
+        if after:
+            q = {"$and": [q, after]} if q else after
+        pipeline = [{"$match": q}, {"$sort": {k: -1 for k in keys}}, {"$limit": limit}, {"$project": CARD_PROJ}]
+    # pages may come from a secondary; a device that just wrote reads causally after its write
+    async with read_session(x_device_token) as session:
+        cards = await repository.aggregate_requests(pipeline, limit, routed=True, session=session)
+
+    page = {"columns": to_columns(cards)} if format == "columns" else {"requests": cards}
+    if cards and len(cards) == limit and not center:
+        last = {**cards[-1], "_id": ObjectId(cards[-1]["id"])}
+        page["next"] = encode_page_token(sort, last, now if sort == "rank" and RANK_MODE == "live" else None)
+
+    # ETag covers the page only, not the freshly minted sync token
+    return json_with_etag({**page, "since": sync_since}, if_none_match, etag_source=page)
+
+@router.get("/requests/clusters")
+async def list_clusters(
+    z: int = Query(ge=0, le=MAX_ZOOM),
+    x: int = Query(ge=0),
+    y: int = Query(ge=0),
+    status: str = Query(default="active", description="active (open+funded)|open|funded|claimed|delivered"),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+):
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail="tile out of range")
+    if status not in CLUSTER_STATUSES:
+        raise HTTPException(status_code=400, detail="unknown status")
+    body, etag = await cluster_cache.get(z, x, y, status)
+    return etag_response(body, etag, if_none_match)
 
 @router.get("/requests/{request_id}")
-def get_request(request_id: str):
-    d = requests_col.find_one({"_id": oid(request_id)})
-    if not d:
+async def get_request(
+    request_id: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+):
+    entry = await detail_cache.get(oid(request_id))
+    if not entry:
         raise HTTPException(status_code=404, detail="not found")
-    return {
-        "request": {
-            "id": str(d["_id"]),
-            "raw_text": d["raw_text"],
-            "category": d["category"],
-            "urgency_window": d["urgency_window"],
-            "severity": d["severity"],
-            "status": d["status"],
-            "lat": d["location"]["lat"],
-            "lng": d["location"]["lng"],
-            "items": d.get("items", []),
-            "estimated_total": float(d["estimated_total"]),
-            "requester_afford": float(d["requester_afford"]),
-            "funding_goal": float(d["funding_goal"]),
-            "funded_amount": float(d["funded_amount"]),
-            "progress": float(d["progress"]),
-            "rank_score": float(d.get("rank_score", 0.0)),
-            "rank_reason": d.get("rank_reason", ""),
-            "claim": d.get("claim"),
-            "created_at": d["created_at"],
-            "updated_at": d["updated_at"],
-        }
-    }
+    body, etag = entry
+    return etag_response(body, etag, if_none_match)
 
 @router.post("/requests/{request_id}/donate", response_model=DonateOut)
-def donate(
+async def donate(
     request_id: str,
     payload: DonateIn,
     x_device_token: str | None = Header(default=None, alias="X-Device-Token"),
@@ -159,73 +261,33 @@ def donate(
     rid = oid(request_id)
     amount = round(float(payload.amount), 2)
 
-    # 1) Insert donation record
-    donations_col.insert_one({
-        "request_id": rid,
-        "donor_id": donor,
-        "amount": amount,
-        "created_at": datetime.now(timezone.utc),
-    })
-
-    # 2) Atomically increment funded_amount
-    updated = requests_col.find_one_and_update(
-        {"_id": rid, "status": {"$in": ["open", "funded"]}},
-        {"$inc": {"funded_amount": amount}, "$set": {"updated_at": datetime.now(timezone.utc)}},
-        return_document=ReturnDocument.AFTER,
-    )
+    # funding total, progress, status and rank all change in one atomic write
+    updated = await donation_combiner.donate(rid, donor, amount)
     if not updated:
         raise HTTPException(status_code=404, detail="request not open/fundable")
-
-    goal = float(updated["funding_goal"])
-    funded = float(updated["funded_amount"])
-    prog = progress_ratio(funded, goal)
-
-    new_status = updated["status"]
-    if goal <= 0:
-        prog = 1.0
-        new_status = "funded"
-    elif funded >= goal:
-        new_status = "funded"
-
-    # 3) Set progress + possibly status, and recompute rank fields
-    rscore = rank_score(updated["urgency_window"], int(updated["severity"]), prog, updated["created_at"])
-    rreason = rank_reason_text(updated["urgency_window"], int(updated["severity"]), prog, updated["created_at"])
-
-    updated2 = requests_col.find_one_and_update(
-        {"_id": rid},
-        {"$set": {"progress": prog, "status": new_status, "rank_score": rscore, "rank_reason": rreason, "updated_at": datetime.now(timezone.utc)}},
-        return_document=ReturnDocument.AFTER,
-    )
+    note_write(donor)
 
     return DonateOut(request={
         "id": request_id,
-        "funded_amount": float(updated2["funded_amount"]),
-        "funding_goal": float(updated2["funding_goal"]),
-        "progress": float(updated2["progress"]),
-        "status": updated2["status"],
-        "rank_score": float(updated2.get("rank_score", 0.0)),
-        "rank_reason": updated2.get("rank_reason", "")
+        "funded_amount": float(updated["funded_amount"]),
+        "funding_goal": float(updated["funding_goal"]),
+        "progress": float(updated["progress"]),
+        "status": updated["status"],
+        "rank_score": float(updated.get("rank_score", 0.0)),
+        "rank_reason": updated.get("rank_reason", "")
     })
 
 @router.post("/ai/rank", response_model=RankOut)
-def ai_rank():
-    # Recompute rank_score for all OPEN requests (or open+funded if you want)
-    q = {"status": {"$in": ["open", "funded"]}}
-    cursor = requests_col.find(q, {"urgency_window": 1, "severity": 1, "progress": 1, "created_at": 1})
-    updated_count = 0
-    now = datetime.now(timezone.utc)
-
-    for d in cursor:
-        prog = float(d.get("progress", 0.0))
-        rscore = rank_score(d["urgency_window"], int(d["severity"]), prog, d["created_at"])
-        rreason = rank_reason_text(d["urgency_window"], int(d["severity"]), prog, d["created_at"])
-        requests_col.update_one({"_id": d["_id"]}, {"$set": {"rank_score": rscore, "rank_reason": rreason, "updated_at": now}})
-        updated_count += 1
-
-    return RankOut(updated=updated_count)
+async def ai_rank():
+    # Recompute rank_score for all open/funded requests, writing only the ones that changed
+    stats = await rerank_all()
+    if stats["changed"]:
+        detail_cache.clear()
+        cluster_cache.clear()
+    return RankOut(updated=stats["changed"], **stats)
 
 @router.post("/requests/{request_id}/claim", response_model=ClaimOut)
-def claim(
+async def claim(
     request_id: str,
     x_device_token: str | None = Header(default=None, alias="X-Device-Token"),
 ):
@@ -233,30 +295,31 @@ def claim(
     rid = oid(request_id)
 
     # Only allow claim if funded and not already claimed
-    updated = requests_col.find_one_and_update(
+    updated = await repository.update_request(
         {"_id": rid, "status": "funded", "claim": None},
         {"$set": {
             "status": "claimed",
             "claim": {"helper_id": helper, "claimed_at": datetime.now(timezone.utc)},
             "updated_at": datetime.now(timezone.utc)
         }},
-        return_document=ReturnDocument.AFTER,
     )
 
     if not updated:
         raise HTTPException(status_code=409, detail="not_claimable")
 
+    note_write(helper)
+    emit("claimed", updated)
     return ClaimOut(request={"id": request_id, "status": "claimed", "claim": updated["claim"]})
 
 @router.post("/requests/{request_id}/delivered")
-def delivered(
+async def delivered(
     request_id: str,
     x_device_token: str | None = Header(default=None, alias="X-Device-Token"),
 ):
     helper = require_device(x_device_token)
     rid = oid(request_id)
 
-    d = requests_col.find_one({"_id": rid})
+    d = await repository.get_request(rid)
     if not d:
         raise HTTPException(status_code=404, detail="not found")
 
@@ -264,12 +327,13 @@ def delivered(
     if not claim or claim.get("helper_id") != helper:
         raise HTTPException(status_code=403, detail="not_claiming_helper")
 
-    updated = requests_col.find_one_and_update(
+    updated = await repository.update_request(
         {"_id": rid, "status": "claimed"},
         {"$set": {"status": "delivered", "updated_at": datetime.now(timezone.utc)}},
-        return_document=ReturnDocument.AFTER,
     )
     if not updated:
         raise HTTPException(status_code=409, detail="wrong_state")
 
+    note_write(helper)
+    emit("delivered", updated)
     return {"request": {"id": request_id, "status": "delivered"}}
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.etag import dump_json
+from app.events import Subscriber, bus
+from app.geo import parse_bbox
+
+router = APIRouter()
+
+async def _receive_viewport(websocket: WebSocket, sub: Subscriber):
+    # clients move their viewport by sending {"bbox": "minLat,minLng,maxLat,maxLng"}
+    try:
+        async for text in websocket.iter_text():
+            # a malformed frame is answered and skipped; it must not end the receiver
+            try:
+                msg = json.loads(text)
+            except ValueError:
+                await websocket.send_json({"type": "error", "detail": "messages must be JSON"})
+                continue
+            try:
+                bus.move(sub, parse_bbox(msg["bbox"]) if msg.get("bbox") else None)
+            except Exception:
+                await websocket.send_json({"type": "error", "detail": "bbox must be minLat,minLng,maxLat,maxLng"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sub.close()
+
+@router.websocket("/requests/stream")
+async def stream_requests(websocket: WebSocket, bbox: str | None = None):
+    try:
+        box = parse_bbox(bbox) if bbox else None
+    except Exception:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    sub = bus.subscribe(box)
+    receiver = asyncio.create_task(_receive_viewport(websocket, sub))
+    try:
+        while True:
+            event = await sub.queue.get()
+            if event is None:
+                break
+            if sub.overflowed:
+                sub.overflowed = False
+                await websocket.send_json({"type": "resync"})
+            await websocket.send_text(dump_json(event).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        bus.unsubscribe(sub)
+        receiver.cancel()
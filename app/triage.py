@@ -1,4 +1,14 @@
 from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+URGENCY_WEIGHTS = {"now": 1.0, "today": 0.7, "week": 0.3}
+
+# rank_score term weights; app.ranking mirrors them in Mongo and app.triage_sim replays alternatives
+W_URGENCY = 0.45
+W_SEVERITY = 0.25
+W_GAP = 0.20
+W_AGE = 0.10
+AGE_CAP_H = 6.0  # the age term saturates after this many hours
 
 def _as_utc(dt: datetime) -> datetime:
     # PyMongo commonly returns naive UTC datetimes; normalize before arithmetic.
@@ -15,32 +25,55 @@ def progress_ratio(funded: float, goal: float) -> float:
     return max(0.0, min(1.0, funded / goal))
 
 def urgency_weight(urgency: str) -> float:
-    return {"now": 1.0, "today": 0.7, "week": 0.3}[urgency]
+    return URGENCY_WEIGHTS[urgency]
 
 def severity_weight(sev: int) -> float:
     return (sev - 1) / 4  # 1..5 -> 0..1
 
-def age_hours(created_at) -> float:
-    now = datetime.now(timezone.utc)
+def age_hours(created_at, now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
     delta = now - _as_utc(created_at)
     return max(0.0, delta.total_seconds() / 3600.0)
 
-def rank_score(urgency: str, severity: int, progress: float, created_at) -> float:
+def rank_static(urgency: str, severity: int, progress: float) -> float:
+    # time-independent part of rank_score; stored so the age term can be added at query time
+    return W_URGENCY*urgency_weight(urgency) + W_SEVERITY*severity_weight(severity) + W_GAP*(1.0 - progress)
+
+def rank_score(urgency: str, severity: int, progress: float, created_at, now: Optional[datetime] = None) -> float:
     # deterministic + explainable:
     # more urgent + more severe + less funded + older => higher
-    u = urgency_weight(urgency)
-    s = severity_weight(severity)
-    gap = 1.0 - progress
-    a = min(1.0, age_hours(created_at) / 6.0)  # saturate after 6 hours
-    score = 0.45*u + 0.25*s + 0.20*gap + 0.10*a
+    a = min(1.0, age_hours(created_at, now) / AGE_CAP_H)
+    score = rank_static(urgency, severity, progress) + W_AGE*a
     return round(max(0.0, min(1.0, score)), 3)
 
-def rank_reason_text(urgency: str, severity: int, progress: float, created_at) -> str:
+def _reason(urgency: str, severity: int, progress: float, age: float) -> str:
     parts = []
     if urgency == "now": parts.append("time-critical")
     elif urgency == "today": parts.append("needed today")
     if severity >= 4: parts.append("high severity")
     if progress < 0.5: parts.append("large funding gap")
-    if age_hours(created_at) >= 2: parts.append("waiting for help")
+    if age >= 2: parts.append("waiting for help")
     if not parts: parts.append("general need")
     return ", ".join(parts[:3])
+
+def rank_reason_text(urgency: str, severity: int, progress: float, created_at, now: Optional[datetime] = None) -> str:
+    return _reason(urgency, severity, progress, age_hours(created_at, now))
+
+def rank_batch(
+    urgencies: Sequence[str],
+    severities: Sequence[int],
+    progresses: Sequence[float],
+    created_ats: Sequence[datetime],
+    now: datetime,
+) -> Tuple[List[float], List[str], List[float]]:
+    # Column-wise version of rank_score/rank_reason_text/rank_static for a whole batch.
+    # Same arithmetic in the same order, so results match the scalar functions exactly.
+    now = _as_utc(now)
+    ages = [max(0.0, (now - _as_utc(c)).total_seconds() / 3600.0) for c in created_ats]
+    statics = [
+        W_URGENCY*URGENCY_WEIGHTS[u] + W_SEVERITY*((s - 1) / 4) + W_GAP*(1.0 - p)
+        for u, s, p in zip(urgencies, severities, progresses)
+    ]
+    scores = [round(max(0.0, min(1.0, st + W_AGE*min(1.0, a / AGE_CAP_H))), 3) for st, a in zip(statics, ages)]
+    reasons = [_reason(u, s, p, a) for u, s, p, a in zip(urgencies, severities, progresses, ages)]
+    return scores, reasons, statics
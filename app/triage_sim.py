@@ -0,0 +1,466 @@
+"""
+Offline replay of request ranking, for judging rank_score weight changes before shipping them.
+
+    python -m app.triage_sim --synthetic 1000000 --days 7
+    python -m app.triage_sim --mongo --since 2026-10-01 --days 7
+    python -m app.triage_sim --export requests.ndjson donations.ndjson
+    python -m app.triage_sim --synthetic 1000000 --compare 0.40,0.35,0.15,0.10,12
+
+Requests and donations are loaded into NumPy columns (`--export` reads the NDJSON
+dumps from GET /v1/export/*). Time then advances in --step-min ticks: each tick the
+open queue is scored with a vectorized rank_score, and the donations that arrived
+during the tick are poured into it from the top, i.e. donors fund the highest-ranked
+unfunded requests first. Requests leave the queue when funded or after --max-age-h.
+
+For each weight set it reports time-to-funded and share funded by severity, and two
+churn figures for the head of the queue (its top --top-k after a tick's donations,
+i.e. what donors see) by the time the next tick is ranked: turnover, the share pushed
+out of the top --top-k, and flips, the share of pairs still queued that swapped order.
+Vectorized scores are checked against triage.rank_score on a sample first; they must
+match exactly.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.triage import AGE_CAP_H, URGENCY_WEIGHTS, W_AGE, W_GAP, W_SEVERITY, W_URGENCY, rank_score
+
+URGENCIES = list(URGENCY_WEIGHTS)
+_URGENCY_W = np.array([URGENCY_WEIGHTS[u] for u in URGENCIES])
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US_PER_H = 3600 * 10**6
+
+class Weights(NamedTuple):
+    urgency: float = W_URGENCY
+    severity: float = W_SEVERITY
+    gap: float = W_GAP
+    age: float = W_AGE
+    age_cap_h: float = AGE_CAP_H
+
+    @classmethod
+    def parse(cls, spec: str) -> "Weights":
+        return cls(*(float(v) for v in spec.split(",")))
+
+    def label(self) -> str:
+        return "/".join(f"{v:g}" for v in self)
+
+PRODUCTION = Weights()
+
+class Dataset(NamedTuple):
+    created_us: np.ndarray    # int64, ascending
+    urgency: np.ndarray       # int8 index into URGENCIES
+    severity: np.ndarray      # int64, 1..5
+    goal: np.ndarray          # float64 funding goal
+    donation_us: np.ndarray   # int64, ascending
+    donation_amount: np.ndarray
+    donation_request: np.ndarray  # int64 row of the request donated to, -1 when unknown
+    start_us: int
+    end_us: int
+
+def to_us(dt: datetime) -> int:
+    dt = dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+def from_us(us: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=int(us))
+
+def round3(x: np.ndarray) -> np.ndarray:
+    """round(x, 3) elementwise, bit-for-bit equal to Python's round()."""
+    y = x * 1000.0
+    # round() rounds the exact binary value, but x*1000 can itself round onto a .5 the true
+    # product misses (0.0705000000000000071 * 1000 -> 70.5); recover the product's rounding
+    # error exactly (Dekker split; 1000 needs no split) and break those ties by its sign
+    c = 134217729.0 * x
+    hi = c - (c - x)
+    err = (hi * 1000.0 - y) + (x - hi) * 1000.0
+    fl = np.floor(y)
+    tie = (y - fl == 0.5) & (err != 0.0)
+    # exact ties go half-even in both round() and rint()
+    return np.where(tie, fl + (err > 0), np.rint(y)) / 1000.0
+
+def static_scores(urgency: np.ndarray, severity: np.ndarray, progress: np.ndarray, w: Weights = PRODUCTION) -> np.ndarray:
+    # same operations in the same order as triage.rank_static
+    return w.urgency*_URGENCY_W[urgency] + w.severity*((severity - 1) / 4) + w.gap*(1.0 - progress)
+
+def scores_at(static: np.ndarray, created_us: np.ndarray, now_us: int, w: Weights = PRODUCTION) -> np.ndarray:
+    """Vectorized triage.rank_score at now_us."""
+    ages = np.maximum(0.0, (now_us - created_us) / 1e6 / 3600.0)
+    return round3(np.maximum(0.0, np.minimum(1.0, static + w.age*np.minimum(1.0, ages / w.age_cap_h))))
+
+def progress_of(funded: np.ndarray, goal: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(goal <= 0, 1.0, np.maximum(0.0, np.minimum(1.0, funded / goal)))
+
+# --- loading -------------------------------------------------------------------
+
+def _columns(created: List[int], urgency: List[str], severity: List[int], goal: List[float],
+             d_us: List[int], d_amount: List[float], d_req: List[int], start_us: int, end_us: int) -> Dataset:
+    order = np.argsort(np.array(created, dtype=np.int64), kind="stable")
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    urg_index = {u: i for i, u in enumerate(URGENCIES)}
+    d_order = np.argsort(np.array(d_us, dtype=np.int64), kind="stable")
+    d_req = np.array(d_req, dtype=np.int64)[d_order]
+    return Dataset(
+        created_us=np.array(created, dtype=np.int64)[order],
+        urgency=np.array([urg_index[u] for u in urgency], dtype=np.int8)[order],
+        severity=np.array(severity, dtype=np.int64)[order],
+        goal=np.array(goal, dtype=np.float64)[order],
+        donation_us=np.array(d_us, dtype=np.int64)[d_order],
+        donation_amount=np.array(d_amount, dtype=np.float64)[d_order],
+        donation_request=np.where(d_req >= 0, remap[np.maximum(d_req, 0)], -1) if len(d_req) else d_req,
+        start_us=start_us,
+        end_us=end_us,
+    )
+
+def synthetic(n: int, days: float, funding_ratio: float = 0.8, seed: int = 1) -> Dataset:
+    """n requests spread over `days`, with donations worth funding_ratio of all goals."""
+    rng = np.random.default_rng(seed)
+    start = to_us(datetime(2026, 1, 5, tzinfo=timezone.utc))
+    end = start + int(days * 24 * _US_PER_H)
+    created = np.sort(rng.integers(start, end, n))
+    goal = np.round(rng.uniform(5.0, 200.0, n), 2)
+    amounts = np.round(rng.exponential(25.0, int(goal.sum() * funding_ratio / 25.0)) + 1.0, 2)
+    d_us = np.sort(rng.integers(start, end, len(amounts)))
+    return Dataset(
+        created_us=created,
+        urgency=rng.choice(len(URGENCIES), n, p=[0.2, 0.5, 0.3]).astype(np.int8),
+        severity=rng.choice([1, 2, 3, 4, 5], n, p=[0.1, 0.2, 0.3, 0.25, 0.15]),
+        goal=goal,
+        donation_us=d_us,
+        donation_amount=amounts,
+        donation_request=np.full(len(amounts), -1, dtype=np.int64),
+        start_us=start,
+        end_us=end,
+    )
+
+def from_mongo(since: datetime, days: float) -> Dataset:
+    from app.db import ARCHIVE_COLLECTIONS, get_db
+
+    db = get_db()
+    until = since + timedelta(days=days)
+    rng = {"created_at": {"$gte": since, "$lt": until}}
+    ids: Dict[object, int] = {}
+    created, urgency, severity, goal = [], [], [], []
+    proj = {"created_at": 1, "urgency_window": 1, "severity": 1, "funding_goal": 1}
+    # finished requests may have moved to the archive collections by now
+    for name in ("requests", ARCHIVE_COLLECTIONS["requests"]):
+        for d in db[name].find(rng, proj, batch_size=10000):
+            ids[d["_id"]] = len(created)
+            created.append(to_us(d["created_at"]))
+            urgency.append(d["urgency_window"])
+            severity.append(int(d["severity"]))
+            goal.append(float(d["funding_goal"]))
+    d_us, d_amount, d_req = [], [], []
+    for name in ("donations", ARCHIVE_COLLECTIONS["donations"]):
+        for d in db[name].find(rng, {"request_id": 1, "amount": 1, "created_at": 1}, batch_size=10000):
+            d_us.append(to_us(d["created_at"]))
+            d_amount.append(float(d["amount"]))
+            d_req.append(ids.get(d["request_id"], -1))
+    return _columns(created, urgency, severity, goal, d_us, d_amount, d_req, to_us(since), to_us(until))
+
+def from_export(requests_path: str, donations_path: str) -> Dataset:
+    import orjson
+
+    def rows(path):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line)
+
+    ids: Dict[str, int] = {}
+    created, urgency, severity, goal = [], [], [], []
+    for r in rows(requests_path):
+        ids[r["id"]] = len(created)
+        created.append(to_us(datetime.fromisoformat(r["created_at"])))
+        urgency.append(r["urgency_window"])
+        severity.append(int(r["severity"]))
+        goal.append(float(r["funding_goal"]))
+    d_us, d_amount, d_req = [], [], []
+    for r in rows(donations_path):
+        d_us.append(to_us(datetime.fromisoformat(r["created_at"])))
+        d_amount.append(float(r["amount"]))
+        d_req.append(ids.get(r["request_id"], -1))
+    if not created:
+        raise SystemExit("no requests in " + requests_path)
+    start = min(created + d_us)
+    return _columns(created, urgency, severity, goal, d_us, d_amount, d_req, start, max(created + d_us) + 1)
+
+# --- replay --------------------------------------------------------------------
+
+class Outcome(NamedTuple):
+    weights: Weights
+    funded_at: np.ndarray  # int64 us, -1 if never funded inside the window
+    turnover: float        # mean share of the previous head missing from the next ranking's top-k
+    flips: float           # mean share of pairs within the previous head that swapped order
+    unspent: float
+    elapsed_s: float
+
+def _top(score: np.ndarray, created: np.ndarray, m: int) -> np.ndarray:
+    """Positions of the m best (score desc, newest first on ties), plus anything tied with the m-th."""
+    if m < len(score):
+        cut = np.partition(score, len(score) - m)[len(score) - m]
+        pos = np.flatnonzero(score >= cut)
+    else:
+        pos = np.arange(len(score))
+    return pos[np.lexsort((-created[pos], -score[pos]))]
+
+class _Queue:
+    """
+    The open queue as parallel arrays in arrival order, live between lo and size.
+
+    Expiry only ever trims the front. Requests past the age cap have a constant
+    score until a donation changes their static part, so those scores are cached
+    and each tick only rescores the young tail. Funded requests stay in place with
+    score -1 until compaction.
+    """
+
+    def __init__(self, n: int):
+        self.row = np.empty(n, dtype=np.int64)
+        self.created = np.empty(n, dtype=np.int64)
+        self.static = np.empty(n)
+        self.score = np.empty(n)
+        self.alive = np.empty(n, dtype=bool)
+        self.lo = self.size = self.cached = 0
+
+    def __len__(self) -> int:
+        return self.size - self.lo
+
+    def push(self, rows: np.ndarray, created: np.ndarray, static: np.ndarray):
+        end = self.size + len(rows)
+        self.row[self.size:end], self.created[self.size:end], self.static[self.size:end] = rows, created, static
+        self.alive[self.size:end] = True
+        self.size = end
+
+    def expire(self, before_us: int):
+        self.lo = self.lo + int(np.searchsorted(self.created[self.lo:self.size], before_us))
+        self.cached = max(self.cached, self.lo)
+
+    def rescore(self, t: int, w: Weights):
+        # one second of slack keeps float rounding at the cap boundary on the recomputed side
+        sat = self.lo + int(np.searchsorted(self.created[self.lo:self.size], t - int(w.age_cap_h * _US_PER_H) - 10**6, side="right"))
+        for a, b in ((self.cached, sat), (max(sat, self.cached), self.size)):
+            if b > a:
+                sc = scores_at(self.static[a:b], self.created[a:b], t, w)
+                sc[~self.alive[a:b]] = -1.0
+                self.score[a:b] = sc
+        self.cached = max(self.cached, sat)
+
+    def update(self, p: int, static: float, t: int, w: Weights):
+        self.static[p] = static
+        self.score[p] = scores_at(self.static[p:p + 1], self.created[p:p + 1], t, w)[0]
+
+    def kill(self, pos: np.ndarray):
+        self.alive[pos] = False
+        self.score[pos] = -1.0
+
+    def compact(self):
+        lo, size = self.lo, self.size
+        keep = self.alive[lo:size]
+        m = int(keep.sum())
+        if m > (size - lo) // 2:
+            return
+        cached = int(keep[:self.cached - lo].sum())
+        for arr in (self.row, self.created, self.static, self.score, self.alive):
+            arr[:m] = arr[lo:size][keep]
+        self.lo, self.size, self.cached = 0, m, cached
+
+def _flips(score: np.ndarray, created: np.ndarray) -> float:
+    """Share of pairs, given in their previous order, that the current (score, created) keys put the other way round."""
+    if len(score) < 2:
+        return 0.0
+    rank = np.empty(len(score), dtype=np.int64)
+    rank[np.lexsort((-created, -score))] = np.arange(len(score))
+    upper = np.triu(np.ones((len(score), len(score)), dtype=bool), 1)
+    return float((rank[:, None] > rank[None, :])[upper].mean())
+
+def replay(ds: Dataset, w: Weights, step_us: int, max_age_us: int, top_k: int) -> Outcome:
+    started = time.perf_counter()
+    n = len(ds.created_us)
+    funded = np.zeros(n)
+    funded_at = np.full(n, -1, dtype=np.int64)
+    q = _Queue(n)
+    head: Optional[np.ndarray] = None
+    turnover: List[float] = []
+    flips: List[float] = []
+    unspent = 0.0
+    arrived = donated = 0
+    m = 4 * top_k
+
+    t = ds.start_us
+    while t < ds.end_us:
+        t = min(t + step_us, ds.end_us)
+        upto = int(np.searchsorted(ds.created_us, t, side="right"))
+        if upto > arrived:
+            new = np.arange(arrived, upto)
+            # nothing to raise for these; they count as funded on arrival
+            free = ds.goal[new] <= 0
+            funded_at[new[free]] = ds.created_us[new[free]]
+            new = new[~free]
+            q.push(new, ds.created_us[new], static_scores(ds.urgency[new], ds.severity[new], np.zeros(len(new)), w))
+            arrived = upto
+        q.expire(t - max_age_us)
+        q.compact()
+
+        d_upto = int(np.searchsorted(ds.donation_us, t, side="right"))
+        budget = float(ds.donation_amount[donated:d_upto].sum())
+        donated = d_upto
+        if not len(q):
+            unspent += budget
+            continue
+
+        q.rescore(t, w)
+        lo, score, created = q.lo, q.score[q.lo:q.size], q.created[q.lo:q.size]
+        while True:
+            pos = _top(score, created, m)
+            pos = pos[score[pos] >= 0.0]
+            rows = q.row[lo + pos]
+            need = np.cumsum(ds.goal[rows] - funded[rows])
+            full = int(np.searchsorted(need, budget, side="right"))
+            # enough of the queue ranked to spend the budget and still leave a top-k behind it
+            if len(rows) > full + top_k or m >= len(score):
+                break
+            m *= 4
+
+        if head is not None and len(head):
+            turnover.append(1.0 - len(np.intersect1d(rows[:top_k], head)) / len(head))
+            # buffer positions of the previous head, in head order; rows ascend through the buffer
+            at = np.minimum(lo + np.searchsorted(q.row[lo:q.size], head), q.size - 1)
+            at = at[(q.row[at] == head) & q.alive[at]]
+            flips.append(_flips(q.score[at], q.created[at]))
+
+        funded[rows[:full]] = ds.goal[rows[:full]]
+        funded_at[rows[:full]] = t
+        q.kill(lo + pos[:full])
+        spent = need[full - 1] if full else 0.0
+        if full < len(rows):
+            if budget > spent:
+                r = rows[full:full + 1]
+                funded[r] += budget - spent
+                q.update(lo + pos[full], static_scores(ds.urgency[r], ds.severity[r], progress_of(funded[r], ds.goal[r]), w)[0], t, w)
+        else:
+            unspent += budget - spent
+        # what donors see at the start of the next tick
+        head = rows[full:full + top_k]
+        # next tick needs about as much of the queue ranked
+        m = max(4 * top_k, 2 * (full + top_k))
+
+    return Outcome(w, funded_at, float(np.mean(turnover)) if turnover else 0.0,
+                   float(np.mean(flips)) if flips else 0.0, unspent, time.perf_counter() - started)
+
+def observed_funded_at(ds: Dataset) -> Optional[np.ndarray]:
+    """When each request actually crossed its goal, from donations that name their request."""
+    known = ds.donation_request >= 0
+    if not known.any():
+        return None
+    req, us, amt = ds.donation_request[known], ds.donation_us[known], ds.donation_amount[known]
+    order = np.lexsort((us, req))
+    req, us, amt = req[order], us[order], amt[order]
+    total = np.cumsum(amt)
+    first = np.r_[True, req[1:] != req[:-1]]
+    running = total - np.repeat(total[first] - amt[first], np.diff(np.r_[np.flatnonzero(first), len(req)]))
+    crossed = running >= ds.goal[req] - 0.005  # amounts are cents; don't miss a goal by float dust
+    out = np.full(len(ds.created_us), -1, dtype=np.int64)
+    hit = np.flatnonzero(crossed)
+    # first crossing per request: later hits for the same request are dropped by unique()
+    reqs, idx = np.unique(req[hit], return_index=True)
+    out[reqs] = us[hit[idx]]
+    out[ds.goal <= 0] = ds.created_us[ds.goal <= 0]
+    return out
+
+# --- checks and report -----------------------------------------------------------
+
+def check_scores(ds: Dataset, samples: int, seed: int = 7) -> int:
+    """Vectorized scores vs triage.rank_score on random (request, time, progress) triples; returns mismatches."""
+    rnd = random.Random(seed)
+    rows = np.array([rnd.randrange(len(ds.created_us)) for _ in range(samples)])
+    now = ds.created_us[rows] + np.array([rnd.randrange(-_US_PER_H, 12 * _US_PER_H) for _ in range(samples)])
+    goal = np.maximum(ds.goal[rows], 0.01)
+    progress = progress_of(np.round(goal * np.array([rnd.random() for _ in range(samples)]), 2), goal)
+    static = static_scores(ds.urgency[rows], ds.severity[rows], progress)
+    mismatches = 0
+    for i, r in enumerate(rows.tolist()):
+        vec = scores_at(static[i:i + 1], ds.created_us[r:r + 1], int(now[i]))[0]
+        ref = rank_score(URGENCIES[ds.urgency[r]], int(ds.severity[r]), float(progress[i]),
+                         from_us(ds.created_us[r]), from_us(now[i]))
+        mismatches += vec != ref
+    # and the batched path the replay uses, at one shared time
+    t = int(np.median(now))
+    vec = scores_at(static, ds.created_us[rows], t)
+    ref = [rank_score(URGENCIES[ds.urgency[r]], int(ds.severity[r]), float(p), from_us(ds.created_us[r]), from_us(t))
+           for r, p in zip(rows.tolist(), progress.tolist())]
+    return mismatches + int((vec != np.array(ref)).sum())
+
+def _hours(us: np.ndarray) -> str:
+    if not len(us):
+        return "      -       -"
+    p50, p90 = np.percentile(us / _US_PER_H, [50, 90])
+    return f"{p50:7.1f} {p90:7.1f}"
+
+def report(ds: Dataset, label: str, funded_at: np.ndarray, out: Optional[Outcome] = None):
+    print(f"\n{label}")
+    if out is not None:
+        print(f"  replayed in {out.elapsed_s:.2f}s; head turnover {out.turnover:.3f}, pair flips {out.flips:.3f} per tick;"
+              f" unspent donations {out.unspent:,.0f}")
+    print("  severity   funded   ttf p50h ttf p90h")
+    for sev in range(5, 0, -1):
+        mask = ds.severity == sev
+        ok = mask & (funded_at >= 0)
+        share = ok.sum() / max(1, mask.sum())
+        print(f"  {sev:>8} {share:8.1%}  {_hours(funded_at[ok] - ds.created_us[ok])}")
+    ok = funded_at >= 0
+    print(f"  {'all':>8} {ok.mean():8.1%}  {_hours(funded_at[ok] - ds.created_us[ok])}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.triage_sim")
+    src = ap.add_mutually_exclusive_group()
+    src.add_argument("--synthetic", type=int, metavar="N", help="generate N requests (default 1000000)")
+    src.add_argument("--mongo", action="store_true", help="load from MONGO_URI, --since for --days")
+    src.add_argument("--export", nargs=2, metavar=("REQUESTS", "DONATIONS"), help="NDJSON dumps from /v1/export")
+    ap.add_argument("--since", type=datetime.fromisoformat, help="start of the --mongo window (ISO date)")
+    ap.add_argument("--days", type=float, default=7.0)
+    ap.add_argument("--weights", type=Weights.parse, default=PRODUCTION,
+                    help="urgency,severity,gap,age,age_cap_h (default %s)" % PRODUCTION.label().replace("/", ","))
+    ap.add_argument("--compare", type=Weights.parse, action="append", default=[], help="another weight set to replay")
+    ap.add_argument("--step-min", type=float, default=5.0)
+    ap.add_argument("--max-age-h", type=float, default=72.0, help="drop unfunded requests from the queue after this")
+    ap.add_argument("--top-k", type=int, default=50)
+    ap.add_argument("--check", type=int, default=20000, help="scalar comparisons before replaying")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.mongo:
+        since = args.since or datetime.now(timezone.utc) - timedelta(days=args.days)
+        ds = from_mongo(since.replace(tzinfo=since.tzinfo or timezone.utc), args.days)
+    elif args.export:
+        ds = from_export(*args.export)
+    else:
+        ds = synthetic(args.synthetic or 1000000, args.days)
+    print(f"loaded {len(ds.created_us)} requests, {len(ds.donation_us)} donations "
+          f"over {(ds.end_us - ds.start_us) / _US_PER_H / 24:.1f} days in {time.perf_counter() - t0:.1f}s")
+    if not len(ds.created_us):
+        return 1
+
+    if args.check:
+        bad = check_scores(ds, args.check)
+        print(f"score check vs triage.rank_score: {bad} mismatches in {2 * args.check}")
+        if bad:
+            return 1
+
+    observed = observed_funded_at(ds)
+    if observed is not None:
+        report(ds, "observed (from donation history)", observed)
+    step_us, max_age_us = int(args.step_min * 60 * 10**6), int(args.max_age_h * _US_PER_H)
+    for w in [args.weights, *args.compare]:
+        out = replay(ds, w, step_us, max_age_us, args.top_k)
+        name = "production" if w == PRODUCTION else "candidate"
+        report(ds, f"replay, {name} weights {w.label()}", out.funded_at, out)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Cold-start time of a multi-worker deployment.
+
+Starts `uvicorn app.main:app --workers N`, then reports how long until the first
+/healthz answer (a worker is serving), until every worker has answered /healthz,
+and until /readyz reports the database reachable.
+
+    python -m bench.cold_start --workers 4 --runs 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+def _poll(url: str, until: float, ok=lambda r: r.status_code == 200):
+    while time.perf_counter() < until:
+        try:
+            r = httpx.get(url, timeout=0.5)
+            if ok(r):
+                return r
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+def one_run(port: int, workers: int, timeout: float) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=os.environ,
+    )
+    deadline = started + timeout
+    base = f"http://127.0.0.1:{port}"
+    out = {}
+    try:
+        if _poll(f"{base}/healthz", deadline):
+            out["first_healthz_s"] = time.perf_counter() - started
+        # fresh connections land on whichever worker accepts first; count distinct pids
+        pids = set()
+        while len(pids) < workers and time.perf_counter() < deadline:
+            r = _poll(f"{base}/healthz", deadline)
+            if r is not None:
+                pids.add(r.json()["pid"])
+        if len(pids) == workers:
+            out["all_workers_s"] = time.perf_counter() - started
+        if _poll(f"{base}/readyz", deadline):
+            out["readyz_s"] = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait()
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--port", type=int, default=8123)
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    runs = [one_run(args.port, args.workers, args.timeout) for _ in range(args.runs)]
+    for key in ["first_healthz_s", "all_workers_s", "readyz_s"]:
+        vals = [r[key] for r in runs if key in r]
+        if vals:
+            print(f"{key:16s} median={statistics.median(vals):.2f}s max={max(vals):.2f}s ({len(vals)}/{len(runs)} runs)")
+        else:
+            print(f"{key:16s} never reached within {args.timeout}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Lookup latency and accuracy of the near-duplicate index at realistic sizes.
+
+    python -m bench.dedup --requests 100000 --queries 5000
+
+Loads N open requests around the seed metros (texts stitched from shared phrases, so
+neighbours overlap a fair amount without being the same need), then times
+signature() + find() for new posts. Half the queries are edited reposts of an indexed
+request (case, punctuation, a dropped word) and should be flagged; the rest are new
+needs and should not be.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.dedup import DedupIndex, signature
+from bench.seed import METROS
+
+OPENERS = ["need", "urgent: need", "looking for", "we need", "please help, need", "could someone bring"]
+ITEMS = [
+    "insulin", "baby formula", "diapers", "rice", "canned soup", "bottled water", "blankets",
+    "a phone charger", "bus fare", "inhaler refill", "dog food", "tampons", "a tarp", "fresh fruit",
+    "bread and milk", "a ride to the clinic", "antibiotics", "cough syrup", "a space heater", "batteries",
+    "toilet paper", "soap", "a sleeping bag", "gas money", "eggs", "coffee", "pasta", "peanut butter",
+]
+SITUATIONS = [
+    "power has been out since tuesday", "my car broke down", "lost my job last week",
+    "just got out of the hospital", "the shelter is full", "kids are home sick",
+    "our basement flooded", "benefits are delayed", "I can't walk far", "the store near us closed",
+]
+STREETS = ["main st", "oak ave", "elm st", "5th ave", "park rd", "lake dr", "hill st", "river rd"]
+NAMES = ["maria", "james", "aisha", "chen", "olga", "david", "fatima", "luis", "grace", "omar"]
+
+def _point():
+    lat, lng, spread, _ = random.choices(METROS, weights=[m[3] for m in METROS])[0]
+    return random.gauss(lat, spread / 2), random.gauss(lng, spread / 2)
+
+def _text() -> str:
+    items = " and ".join(random.sample(ITEMS, random.randint(1, 3)))
+    return (f"{random.choice(OPENERS)} {items}, {random.choice(SITUATIONS)}. "
+            f"{random.randint(1, 999)} {random.choice(STREETS)}, ask for {random.choice(NAMES)}")
+
+def _repost(text: str) -> str:
+    words = text.split()
+    del words[random.randrange(len(words))]
+    out = " ".join(words)
+    return random.choice([out.upper(), out + "!!", out.replace(",", " -"), "please " + out])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=100000)
+    ap.add_argument("--queries", type=int, default=5000)
+    args = ap.parse_args()
+    random.seed(1)
+
+    docs = []
+    for i in range(args.requests):
+        lat, lng = _point()
+        docs.append((str(i), lat, lng, _text()))
+    index = DedupIndex()
+    t0 = time.perf_counter()
+    for rid, lat, lng, text in docs:
+        index.add(rid, lat, lng, signature(text))
+    print(f"built {len(index)} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    samples, hits, false_flags = [], 0, 0
+    half = args.queries // 2
+    for i in range(args.queries):
+        if i < half:
+            rid, lat, lng, text = random.choice(docs)
+            text, lat, lng = _repost(text), lat + random.uniform(-0.002, 0.002), lng + random.uniform(-0.002, 0.002)
+        else:
+            rid, (lat, lng), text = None, _point(), _text()
+        t0 = time.perf_counter()
+        found = index.find(lat, lng, signature(text))
+        samples.append((time.perf_counter() - t0) * 1e6)
+        if rid is not None:
+            hits += found is not None and found[0] == rid
+        else:
+            false_flags += found is not None
+    q = statistics.quantiles(samples, n=100)
+    print(f"signature+find: p50={q[49]:.0f}us p95={q[94]:.0f}us p99={q[98]:.0f}us")
+    print(f"reposts flagged: {hits}/{half}  new needs flagged: {false_flags}/{args.queries - half}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Check that the list query shapes of GET /v1/requests are served by an index.
+
+Seeds a scratch collection with the production index set and explains each shape:
+list pages (first page and a keyset page), delta sync polls, and the same two
+narrowed to a map viewport. A plan fails on a COLLSCAN, on no IXSCAN at all, or
+on an in-memory SORT stage.
+
+Map shapes (bbox) are the one exception to the SORT rule, on purpose: the planner
+may pick the 2dsphere index and sort the viewport's matches in memory. That is
+accepted only when the sort sits on the geo index scan, so its input is bounded by
+the viewport, not the collection. tests/test_explain_plans.py asserts the same rules.
+
+    python -m bench.explain_plans --docs 20000
+"""
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.cards import CARD_PROJ
+from app.cursors import PAGE_KEYS, after_watermark, before_keyset
+from app.db import LIVE_STATUSES, REQUEST_INDEXES, get_db
+from app.geo import bbox_filter, parse_bbox, to_point
+
+# requests are spread over CENTER +-SPREAD degrees; VIEWPORT is a city-sized map view inside it
+CENTER, SPREAD = (40.7, -74.0), 2.0
+VIEWPORT = "40.6,-74.1,40.8,-73.9"
+
+def seed(col, n: int, now: datetime):
+    col.drop()
+    docs = []
+    for _ in range(n):
+        created = now - timedelta(minutes=random.randint(0, 7 * 24 * 60))
+        docs.append({
+            "status": random.choice(["open", "open", "funded", "claimed", "delivered"]),
+            "rank_score": round(random.random(), 3),
+            "created_at": created,
+            "updated_at": created + (now - created) * random.random(),
+            "geo": to_point(CENTER[0] + random.uniform(-SPREAD, SPREAD), CENTER[1] + random.uniform(-SPREAD, SPREAD)),
+        })
+    col.insert_many(docs, ordered=False)
+    for keys, options in REQUEST_INDEXES:
+        col.create_index(keys, **options)
+
+def stages(plan: dict):
+    yield plan
+    for child in plan.get("inputStages", []) + [plan[k] for k in ("inputStage", "queryPlan") if k in plan]:
+        yield from stages(child)
+
+def winning_plan(col, pipeline: list) -> dict:
+    res = col.database.command("aggregate", col.name, pipeline=pipeline, explain=True)
+    # fully pushed-down pipelines report at the top level, older servers under $cursor
+    planner = res.get("queryPlanner") or res["stages"][0]["$cursor"]["queryPlanner"]
+    return planner["winningPlan"]
+
+def find_plan(col, q: dict, order: list, limit: int) -> dict:
+    return col.find(q).sort(order).limit(limit).explain()["queryPlanner"]["winningPlan"]
+
+def shapes(col):
+    """(name, is_map, $match, sort) for each list and delta query shape, as the route builds them."""
+    viewport = bbox_filter(parse_bbox(VIEWPORT))
+    for sort, keys in PAGE_KEYS.items():
+        order = [(k, -1) for k in keys]
+        # no status filter means the live statuses, as in list_requests
+        for status in (None, "open"):
+            q = {"status": status or {"$in": LIVE_STATUSES}}
+            yield f"list sort={sort} status={status}", False, q, order
+            last = next(col.find(q).sort(order).skip(500).limit(1))
+            yield f"list sort={sort} status={status} cursor", False, {"$and": [q, before_keyset(keys, [last[k] for k in keys])]}, order
+            yield f"list sort={sort} status={status} bbox", True, {**viewport, **q}, order
+    # delta sync: no status default there, finished requests have to come back as removed
+    order = [("updated_at", 1), ("_id", 1)]
+    mark = next(col.find().sort(order).skip(col.estimated_document_count() // 2).limit(1))
+    for status in (None, "open"):
+        for bbox in (False, True):
+            q = {**(viewport if bbox else {}), **({"status": status} if status else {})}
+            dq = {"$and": [q, after_watermark(mark["updated_at"], mark["_id"]), {"updated_at": {"$lte": datetime.now(timezone.utc)}}]}
+            yield f"delta status={status}{' bbox' if bbox else ''}", bbox, dq, order
+
+def problem(plan: dict, is_map: bool):
+    """Why this winning plan fails, or None."""
+    nodes = list(stages(plan))
+    names = {n.get("stage") for n in nodes}
+    if "COLLSCAN" in names:
+        return "collection scan"
+    if "IXSCAN" not in names:
+        return "no index scan"
+    for n in nodes:
+        if n.get("stage") != "SORT":
+            continue
+        if not is_map:
+            return "in-memory sort"
+        # accepted for map shapes only: the sort's input comes off the 2dsphere index
+        if not any("2dsphere" in (c.get("keyPattern") or {}).values() for c in stages(n)):
+            return "in-memory sort not bounded by the geo index"
+    return None
+
+def explain_all(col, limit: int):
+    """(name, problem or None, stage names) for every shape."""
+    for name, is_map, q, order in shapes(col):
+        if name.startswith("delta"):
+            plan = find_plan(col, q, order, limit)
+        else:
+            plan = winning_plan(col, [{"$match": q}, {"$sort": dict(order)}, {"$limit": limit}, {"$project": CARD_PROJ}])
+        yield name, problem(plan, is_map), sorted({n.get("stage") for n in stages(plan)} - {None})
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--limit", type=int, default=200)
+    args = ap.parse_args()
+
+    col = get_db()["bench_explain_plans"]
+    seed(col, args.docs, datetime.now(timezone.utc))
+
+    failed = 0
+    for name, bad, names in explain_all(col, args.limit):
+        failed += bool(bad)
+        print(f"{'FAIL' if bad else 'ok  '} {name}: {names}{f' ({bad})' if bad else ''}")
+
+    col.drop()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
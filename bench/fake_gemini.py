@@ -0,0 +1,68 @@
+"""
+Local stand-in for the Gemini generateContent API.
+
+    FAKE_GEMINI_LATENCY_MS=800 FAKE_GEMINI_FAILURE_RATE=0.2 uvicorn bench.fake_gemini:app --port 8081
+    GEMINI_BASE_URL=http://localhost:8081 GEMINI_API_KEY=fake uvicorn app.main:app --port 8000
+
+Answers with a draft (or, for batch prompts, an array of drafts) built by the
+heuristic parser, after a configurable delay,
+and fails a configurable share of calls with 503 (or hangs, to exercise timeouts).
+"""
+import asyncio
+import json
+import os
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.llm.parsers import fallback_parse
+
+LATENCY_MS = float(os.getenv("FAKE_GEMINI_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("FAKE_GEMINI_JITTER_MS", "100"))
+FAILURE_RATE = float(os.getenv("FAKE_GEMINI_FAILURE_RATE", "0"))
+HANG_RATE = float(os.getenv("FAKE_GEMINI_HANG_RATE", "0"))
+
+app = FastAPI(title="fake-gemini")
+stats = {"calls": 0, "failures": 0, "hangs": 0}
+
+def _user_text(prompt: str) -> str:
+    marker = "User text:\n"
+    start = prompt.find(marker)
+    if start == -1:
+        return prompt
+    return prompt[start + len(marker):].split("\n\nReturn ONLY", 1)[0]
+
+def _batch_texts(prompt: str) -> list:
+    marker = "User texts:\n"
+    body = prompt[prompt.find(marker) + len(marker):].split("\n\nReturn ONLY", 1)[0]
+    return [m.group(1) for m in re.finditer(r"^\[\d+\] (.*)$", body, re.M)]
+
+def _reply(text: str) -> dict:
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+
+@app.post("/v1beta/models/{model}:generateContent")
+async def generate(model: str, request: Request):
+    stats["calls"] += 1
+    body = await request.json()
+    prompt = body["contents"][0]["parts"][0]["text"]
+
+    roll = random.random()
+    if roll < HANG_RATE:
+        stats["hangs"] += 1
+        await asyncio.sleep(3600)
+    await asyncio.sleep(max(0.0, random.gauss(LATENCY_MS, JITTER_MS)) / 1000.0)
+    if roll < HANG_RATE + FAILURE_RATE:
+        stats["failures"] += 1
+        return JSONResponse({"error": {"code": 503, "message": "overloaded"}}, status_code=503)
+
+    if "User texts:\n" in prompt:
+        drafts = [{**fallback_parse(t)["draft"], "index": i} for i, t in enumerate(_batch_texts(prompt))]
+        return _reply(json.dumps(drafts))
+    draft = fallback_parse(_user_text(prompt))["draft"]
+    return _reply(json.dumps(draft))
+
+@app.get("/stats")
+def get_stats():
+    return stats
@@ -0,0 +1,64 @@
+"""
+Lookup latency of the in-memory nearby index at realistic sizes.
+
+    python -m bench.nearby --requests 100000 --queries 5000
+
+Loads N funded requests around the seed metros, then times nearest() for helpers
+placed the same way, and checks a sample against a brute-force scan.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.nearby import NearbyIndex, blend_cost, distance_km
+from bench.seed import METROS
+
+def _point():
+    lat, lng, spread, _ = random.choices(METROS, weights=[m[3] for m in METROS])[0]
+    return random.gauss(lat, spread / 2), random.gauss(lng, spread / 2)
+
+def brute_force(cards, lat, lng, k, max_km):
+    scored = []
+    for c in cards:
+        d = distance_km(lat, lng, c["lat"], c["lng"])
+        if d <= max_km:
+            scored.append((blend_cost(d, c["rank_score"]), c["id"]))
+    return [rid for _, rid in sorted(scored)[:k]]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=100000)
+    ap.add_argument("--queries", type=int, default=5000)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--radius-km", type=float, default=25.0)
+    args = ap.parse_args()
+    random.seed(1)
+
+    cards = []
+    for i in range(args.requests):
+        lat, lng = _point()
+        cards.append({"id": str(i), "status": "funded", "lat": lat, "lng": lng, "rank_score": round(random.random(), 3)})
+    index = NearbyIndex()
+    t0 = time.perf_counter()
+    for c in cards:
+        index.upsert(c)
+    print(f"built {len(index)} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+
+    samples = []
+    queries = [_point() for _ in range(args.queries)]
+    for lat, lng in queries:
+        t0 = time.perf_counter()
+        index.nearest(lat, lng, args.k, args.radius_km)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    q = statistics.quantiles(samples, n=100)
+    print(f"nearest k={args.k}: p50={q[49]:.0f}us p95={q[94]:.0f}us p99={q[98]:.0f}us")
+
+    mismatches = 0
+    for lat, lng in queries[:50]:
+        got = [c["id"] for _, _, c in index.nearest(lat, lng, args.k, args.radius_km)]
+        mismatches += got != brute_force(cards, lat, lng, args.k, args.radius_km)
+    print(f"brute-force mismatches: {mismatches}/50")
+
+if __name__ == "__main__":
+    main()
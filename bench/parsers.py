@@ -0,0 +1,134 @@
+"""
+Micro-benchmark of the fallback keyword parser against the previous substring scans.
+
+    python -m bench.parsers --texts 20000
+
+Also reports where the two disagree on a labelled corpus. The engine matches whole
+words, so it differs from the old substring scans on purpose for the texts in
+CHANGED, and nowhere else. Exits 1 if the engine gets any corpus entry wrong or
+differs from the old scans on a text outside CHANGED; tests/test_parsers.py runs
+the same checks.
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.llm import parsers
+
+# --- previous implementation, kept here only as the comparison baseline ---
+
+def legacy_category(text: str) -> str:
+    t = text.lower()
+    if any(k in t for k in ["insulin", "medicine", "meds", "prescription", "pharmacy", "antibiotic", "inhaler"]):
+        return "meds"
+    if any(k in t for k in ["grocer", "food", "rice", "milk", "bread", "eggs", "vegetable", "grocery"]):
+        return "groceries"
+    if any(k in t for k in ["shelter", "evac", "no place", "homeless", "housing"]):
+        return "shelter"
+    if any(k in t for k in ["ride", "pickup", "drive", "car", "transport", "uber"]):
+        return "transport"
+    return "other"
+
+def legacy_urgency(text: str) -> str:
+    t = text.lower()
+    if any(k in t for k in ["asap", "urgent", "now", "immediately", "tonight"]):
+        return "now"
+    if any(k in t for k in ["today", "by end of day", "this evening"]):
+        return "today"
+    return "week"
+
+def legacy_severity(category: str, text: str) -> int:
+    t = text.lower()
+    if category == "meds" and any(k in t for k in ["insulin", "oxygen", "dialysis", "heart", "seizure"]):
+        return 5
+    if category in ["shelter"] and any(k in t for k in ["evac", "unsafe", "flood", "fire"]):
+        return 5
+    if "baby" in t or "infant" in t:
+        return 4
+    if category == "meds":
+        return 4
+    return 2
+
+def legacy_signals(text: str):
+    cat = legacy_category(text)
+    return cat, legacy_urgency(text), legacy_severity(cat, text)
+
+def new_signals(text: str):
+    signals = parsers.scan_signals(text)
+    cat = parsers._category(signals)
+    return cat, parsers._urgency(signals), parsers._severity(cat, signals)
+
+# (text, expected category, urgency, severity)
+CORPUS = [
+    ("need insulin asap", "meds", "now", 5),
+    ("Need groceries: rice, milk and bread for my family", "groceries", "week", 2),
+    ("we were evacuated, flood water rising, no place to sleep tonight", "shelter", "now", 5),
+    ("need a ride to dialysis today", "transport", "today", 2),
+    ("I know my neighbour needs someone who can care for her", "other", "week", 2),
+    ("baby formula needed by end of day", "other", "today", 4),
+    ("pharmacy pickup for antibiotics this evening", "meds", "today", 4),
+    ("scared, the apartment feels unsafe after the fire", "other", "week", 2),
+    ("looking for housing, homeless since Monday", "shelter", "week", 2),
+    ("could someone drive me to the clinic immediately", "transport", "now", 2),
+    ("the fire is out; who cares", "other", "week", 2),
+    ("my neighbour cares for her mom", "other", "week", 2),
+    ("two babies and no cars, need rides to the pharmacies", "meds", "week", 4),
+    ("need a driver to get to the clinic", "transport", "week", 2),
+    ("rideshare home from the hospital", "transport", "week", 2),
+    ("carpool to work tomorrow", "transport", "week", 2),
+    ("heartburn again, need my meds", "meds", "week", 4),
+    ("no  place to stay", "shelter", "week", 2),
+]
+
+# texts where the old substring scans were wrong and the engine is right
+CHANGED = {
+    "I know my neighbour needs someone who can care for her",  # "now" in "know", "car" in "care"
+    "scared, the apartment feels unsafe after the fire",  # "car" in "scared"
+    "the fire is out; who cares",  # "car" in "cares"
+    "my neighbour cares for her mom",  # "car" in "cares"
+    "two babies and no cars, need rides to the pharmacies",  # "pharmacy" missed "pharmacies"
+    "heartburn again, need my meds",  # "heart" in "heartburn" made it a critical need
+    "no  place to stay",  # "no place" missed a double space
+}
+
+FILLER = "please help my family we are stuck near the old bridge and running low on supplies".split()
+
+def synthetic(n: int):
+    texts = []
+    for _ in range(n):
+        base = random.choice(CORPUS)[0]
+        texts.append(" ".join(random.sample(FILLER, 6)) + " " + base)
+    return texts
+
+def timed(fn, texts, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(texts) * 1e6
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--texts", type=int, default=20000)
+    args = ap.parse_args()
+
+    wrong = 0
+    for text, *expected in CORPUS:
+        old, new = legacy_signals(text), new_signals(text)
+        flag = "" if new == tuple(expected) and (old == new or text in CHANGED) else "  <-- unexpected"
+        wrong += bool(flag)
+        if old != new or flag:
+            print(f"differs: {text!r}\n  legacy={old} engine={new}{flag}")
+
+    texts = synthetic(args.texts)
+    print(f"legacy substring scans: {timed(legacy_signals, texts):.2f} us/text")
+    print(f"single-pass engine:     {timed(new_signals, texts):.2f} us/text")
+    if wrong:
+        print(f"{wrong} corpus entries parsed wrong")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
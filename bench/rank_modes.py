@@ -0,0 +1,86 @@
+"""
+Compare the stored-score and live (query-time) ranking paths for GET /v1/requests?sort=rank.
+
+Seeds a scratch collection, checks that the live aggregation reproduces
+triage.rank_score, then times both read paths.
+
+    python -m bench.rank_modes --docs 50000 --runs 20
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING, DESCENDING
+
+from app.db import get_db
+from app.ranking import SCORE_TOLERANCE, live_rank_pipeline
+from app.triage import progress_ratio, rank_reason_text, rank_score, rank_static
+
+PROJ = {"category": 1, "status": 1, "location": 1, "rank_score": 1, "created_at": 1}
+
+def seed(col, n: int, now: datetime):
+    col.drop()
+    docs = []
+    for _ in range(n):
+        urg = random.choice(["now", "today", "week"])
+        sev = random.randint(1, 5)
+        goal = round(random.uniform(0, 200), 2)
+        prog = progress_ratio(round(random.uniform(0, goal), 2), goal)
+        created = now - timedelta(minutes=random.randint(0, 12 * 60))
+        docs.append({
+            "status": random.choice(["open", "open", "funded"]),
+            "category": "other",
+            "urgency_window": urg, "severity": sev, "progress": prog,
+            "location": {"lat": random.uniform(-60, 60), "lng": random.uniform(-180, 180)},
+            "created_at": created,
+            "rank_score": rank_score(urg, sev, prog, created, now),
+            "rank_reason": rank_reason_text(urg, sev, prog, created, now),
+            "rank_static": rank_static(urg, sev, prog),
+        })
+    col.insert_many(docs, ordered=False)
+    col.create_index([("rank_score", DESCENDING)])
+    col.create_index([("status", ASCENDING)])
+
+def check_equivalence(col, now: datetime) -> int:
+    mismatches = 0
+    for d in col.aggregate(live_rank_pipeline({}, {**PROJ, "urgency_window": 1, "severity": 1, "progress": 1}, 10**9, now)):
+        # BSON stores milliseconds, so compare against the stored (truncated) created_at;
+        # $round and round() may break a tie differently, hence the tolerance
+        expected = rank_score(d["urgency_window"], d["severity"], d["progress"], d["created_at"], now)
+        if abs(d["rank_score"] - expected) > SCORE_TOLERANCE + 1e-9:
+            mismatches += 1
+    return mismatches
+
+def timed(fn, runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples), max(samples)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=50000)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--limit", type=int, default=200)
+    args = ap.parse_args()
+
+    col = get_db()["bench_rank_modes"]
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    seed(col, args.docs, now)
+    q = {"status": {"$in": ["open", "funded"]}}
+
+    print(f"live/scalar mismatches (beyond {SCORE_TOLERANCE}): {check_equivalence(col, now)}")
+
+    stored = timed(lambda: list(col.find(q, PROJ).sort("rank_score", -1).sort("created_at", -1).limit(args.limit)), args.runs)
+    live = timed(lambda: list(col.aggregate(live_rank_pipeline(q, PROJ, args.limit, datetime.now(timezone.utc)))), args.runs)
+    print(f"stored: p50={stored[0]:.1f}ms max={stored[1]:.1f}ms (plus a full /ai/rank pass to stay fresh)")
+    print(f"live:   p50={live[0]:.1f}ms max={live[1]:.1f}ms (no rewrites)")
+
+    col.drop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+How much read load MONGO_READ_ROUTING moves off the primary, and whether a device
+still reads its own writes.
+
+Needs a replica set. Either point it at one, or let it start three local mongods
+(ports --replset-port, +1, +2) in a temp directory:
+
+    python -m bench.read_routing --replset-port 27101 --seed 100000
+    python -m bench.read_routing --uri "mongodb://h1,h2,h3/?replicaSet=rs0" --modes primary,nearest
+
+For each routing mode it boots the API (as bench.suite --boot does), runs the map
+scenario plus a donate lane, and diffs `top` on every member to count the reads
+each one served on the app's collections. A read-your-writes lane donates
+to the hot request and immediately lists it back, with and without the same
+X-Device-Token, and opens its detail; a read showing less than the funded_amount the
+donate returned counts as a violation. Only the untokened list reads are allowed
+to have any. Keep --workers 1 for that check: causal stamps are per worker.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+from pymongo import MongoClient
+
+violations: Dict[str, int] = defaultdict(int)
+checks: Dict[str, int] = defaultdict(int)
+
+def start_replset(port: int, root: str, name: str = "rs0") -> Tuple[List[subprocess.Popen], str]:
+    procs = []
+    for p in range(port, port + 3):
+        path = os.path.join(root, str(p))
+        os.makedirs(path)
+        procs.append(subprocess.Popen([
+            "mongod", "--replSet", name, "--port", str(p), "--dbpath", path,
+            "--bind_ip", "127.0.0.1", "--logpath", os.path.join(path, "mongod.log"),
+        ]))
+    seeds = [f"127.0.0.1:{p}" for p in range(port, port + 3)]
+    first = MongoClient(seeds[0], directConnection=True, serverSelectionTimeoutMS=30000)
+    first.admin.command("ping")
+    first.admin.command("replSetInitiate", {
+        "_id": name,
+        "members": [{"_id": i, "host": h, "priority": 2 if i == 0 else 1} for i, h in enumerate(seeds)],
+    })
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        states = [m["stateStr"] for m in first.admin.command("replSetGetStatus").get("members", [])]
+        if states.count("PRIMARY") == 1 and states.count("SECONDARY") == 2:
+            return procs, f"mongodb://{','.join(seeds)}/?replicaSet={name}"
+        time.sleep(0.5)
+    raise SystemExit("replica set did not come up")
+
+def members(uri: str) -> Dict[str, MongoClient]:
+    hello = MongoClient(uri).admin.command("hello")
+    return {h: MongoClient(h, directConnection=True) for h in hello["hosts"]}
+
+def primary_of(conns: Dict[str, MongoClient]) -> str:
+    return next(h for h, c in conns.items() if c.admin.command("hello")["isWritablePrimary"])
+
+def read_counts(conns: Dict[str, MongoClient], db_name: str) -> Dict[str, int]:
+    # per-namespace read lock acquisitions from `top`; unlike the command counters these
+    # leave out the oplog reads secondaries make against their sync source
+    out = {}
+    for host, c in conns.items():
+        totals = c.admin.command("top")["totals"]
+        out[host] = sum(v["readLock"]["count"] for ns, v in totals.items()
+                        if isinstance(v, dict) and ns.startswith(db_name + "."))
+    return out
+
+def _funded(cols: dict, rid: str):
+    for i, x in enumerate(cols.get("id", [])):
+        if x == rid:
+            return cols["funded_amount"][i]
+    return None
+
+async def ryw_op(client: httpx.AsyncClient, ctx):
+    from bench.seed import METROS
+
+    device = "dev_bench_ryw"
+    r = await client.post(f"/v1/requests/{ctx.hot_id}/donate", json={"amount": 0.01}, headers={"X-Device-Token": device})
+    if r.status_code >= 400:
+        return "ryw donate", r
+    funded = r.json()["request"]["funded_amount"]
+    lat, lng, _, _ = METROS[0]
+    params = {"bbox": f"{lat - 0.001},{lng - 0.001},{lat + 0.001},{lng + 0.001}", "format": "columns", "limit": 1000}
+    for label, headers in [("list, same device", {"X-Device-Token": device}), ("list, no token", {})]:
+        r = await client.get("/v1/requests", params=params, headers=headers)
+        seen = _funded(r.json()["columns"], ctx.hot_id) if r.status_code == 200 else None
+        checks[label] += 1
+        violations[label] += seen is None or seen < funded
+    r = await client.get(f"/v1/requests/{ctx.hot_id}")
+    checks["detail"] += 1
+    violations["detail"] += r.status_code != 200 or r.json()["request"]["funded_amount"] < funded
+    return "ryw round", r
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uri", help="existing replica set; default starts one locally")
+    ap.add_argument("--replset-port", type=int, default=27101)
+    ap.add_argument("--modes", default="primary,secondaryPreferred")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--gemini-latency-ms", type=float, default=300)
+    ap.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0, help="wipe and seed this many requests first")
+    args = ap.parse_args()
+
+    root, mongods, uri = None, [], args.uri
+    if not uri:
+        root = tempfile.mkdtemp(prefix="rescuerun_rs_")
+        mongods, uri = start_replset(args.replset_port, root)
+    # the seeder and the booted API read these at import
+    os.environ["MONGO_URI"] = uri
+    os.environ.setdefault("DB_NAME", "rescuerun_bench")
+
+    from bench.suite import boot, donate_op, map_op, print_report, run_scenario
+
+    try:
+        if args.seed:
+            import random
+            from bench.seed import seed
+            if "bench" not in os.environ["DB_NAME"]:
+                raise SystemExit(f"refusing to wipe DB_NAME={os.environ['DB_NAME']!r}; use a *_bench database")
+            random.seed(1)
+            seed(args.seed, 3.0)
+
+        conns = members(uri)
+        primary = primary_of(conns)
+        c = args.concurrency
+        lanes = [(max(1, c * 9 // 10), map_op), (max(1, c // 10), donate_op), (1, ryw_op)]
+        port = int(args.url.rsplit(":", 1)[1])
+        moved = {}
+        for mode in args.modes.split(","):
+            os.environ["MONGO_READ_ROUTING"] = mode
+            violations.clear()
+            checks.clear()
+            procs = boot(port, port + 81, args)
+            try:
+                before = read_counts(conns, os.environ["DB_NAME"])
+                rows = asyncio.run(run_scenario(args.url, lanes, args.seconds))
+                after = read_counts(conns, os.environ["DB_NAME"])
+            finally:
+                for p in procs:
+                    p.terminate()
+                    p.wait()
+
+            print_report(f"MONGO_READ_ROUTING={mode}", rows)
+            delta = {h: after[h] - before[h] for h in conns}
+            total = sum(delta.values()) or 1
+            print(f"\n{'member':24s} {'role':10s} {'reads':>9s} {'share':>7s}")
+            for host, n in sorted(delta.items()):
+                role = "primary" if host == primary else "secondary"
+                print(f"{host:24s} {role:10s} {n:9d} {n / total:7.1%}")
+            print("\nread-your-writes violations: " + ", ".join(
+                f"{label} {violations[label]}/{checks[label]}" for label in checks))
+            moved[mode] = delta[primary] / args.seconds
+
+        base = moved.get("primary")
+        if base:
+            print("\nprimary reads/s: " + ", ".join(
+                f"{mode} {rate:.0f} ({1 - rate / base:.0%} off)" if mode != "primary" else f"{mode} {rate:.0f}"
+                for mode, rate in moved.items()))
+    finally:
+        for p in mongods:
+            p.terminate()
+            p.wait()
+        if root:
+            shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
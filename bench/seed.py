@@ -0,0 +1,116 @@
+"""
+Seed a benchmark database with realistic requests and donations.
+
+    DB_NAME=rescuerun_bench python -m bench.seed --requests 100000 --donations-per 3
+
+Requests cluster around a handful of metros, with the status mix, urgency and
+funding spread of a busy deployment. Every write goes through the same field
+builders the API uses (geo, geohash, rank fields), so the stored shape matches.
+Refuses to touch a database whose name doesn't contain "bench" unless --force.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.geo import geohash, to_point
+from app.triage import compute_funding_goal, progress_ratio, rank_reason_text, rank_score, rank_static
+
+# (lat, lng, spread in degrees, weight)
+METROS = [
+    (40.71, -74.00, 0.25, 5),   # New York
+    (34.05, -118.24, 0.35, 4),  # Los Angeles
+    (41.88, -87.63, 0.25, 3),   # Chicago
+    (29.76, -95.37, 0.30, 2),   # Houston
+    (47.61, -122.33, 0.20, 1),  # Seattle
+    (51.51, -0.13, 0.25, 2),    # London
+]
+CATEGORIES = ["meds", "groceries", "shelter", "transport", "other"]
+STATUSES = ["open"] * 6 + ["funded"] * 2 + ["claimed", "delivered"]
+TEXTS = [
+    "need groceries for my kids this week",
+    "out of insulin, pharmacy won't refill until monday",
+    "need a ride to dialysis tomorrow morning",
+    "diapers and formula for a newborn",
+    "evacuated after the flood, need hygiene kits",
+    "urgent: ran out of blood pressure meds",
+]
+
+def request_doc(now: datetime) -> dict:
+    lat0, lng0, spread, _ = random.choices(METROS, weights=[m[3] for m in METROS])[0]
+    lat, lng = random.gauss(lat0, spread / 2), random.gauss(lng0, spread / 2)
+    urg = random.choices(["now", "today", "week"], weights=[2, 3, 5])[0]
+    sev = random.choices([1, 2, 3, 4, 5], weights=[1, 2, 4, 2, 1])[0]
+    total = round(random.lognormvariate(3.8, 0.7), 2)
+    afford = round(total * random.choice([0, 0, 0.1, 0.25, 0.5]), 2)
+    goal = round(compute_funding_goal(total, afford), 2)
+    status = random.choice(STATUSES)
+    funded = goal if status != "open" else round(random.uniform(0, goal), 2)
+    prog = progress_ratio(funded, goal)
+    created = now - timedelta(minutes=random.expovariate(1 / 600))
+    claim = None
+    if status in ["claimed", "delivered"]:
+        claim = {"helper_id": f"dev_helper_{random.randint(1, 500)}", "claimed_at": created + timedelta(hours=1)}
+    return {
+        "created_at": created, "updated_at": created, "created_by": f"dev_{random.randint(1, 50000)}",
+        "raw_text": random.choice(TEXTS), "category": random.choice(CATEGORIES),
+        "urgency_window": urg, "severity": sev, "items": [],
+        "location": {"lat": lat, "lng": lng}, "geo": to_point(lat, lng), "geohash": geohash(lat, lng),
+        "status": status,
+        "estimated_total": total, "requester_afford": afford, "funding_goal": goal,
+        "funded_amount": funded, "progress": prog,
+        "rank_score": rank_score(urg, sev, prog, created, now),
+        "rank_reason": rank_reason_text(urg, sev, prog, created, now),
+        "rank_static": rank_static(urg, sev, prog),
+        "claim": claim,
+    }
+
+def donation_docs(d: dict, n: int) -> list:
+    if not n or not d["funded_amount"]:
+        return []
+    share = round(d["funded_amount"] / n, 2)
+    return [
+        {"request_id": d["_id"], "donor_id": f"dev_{random.randint(1, 50000)}", "amount": share,
+         "created_at": d["created_at"] + timedelta(minutes=random.randint(1, 120))}
+        for _ in range(n)
+    ]
+
+def seed(n: int, donations_per: float, batch: int = 5000):
+    # imported here so the load driver can reuse METROS/TEXTS without a database
+    from app.db import ARCHIVE_COLLECTIONS, ensure_indexes, get_db
+
+    now = datetime.now(timezone.utc)
+    db = get_db()
+    requests_col, donations_col = db["requests"], db["donations"]
+    for name in ["requests", "donations", *ARCHIVE_COLLECTIONS.values()]:
+        db[name].delete_many({})
+    ensure_indexes()
+
+    t0 = time.perf_counter()
+    done = donated = 0
+    while done < n:
+        docs = [request_doc(now) for _ in range(min(batch, n - done))]
+        requests_col.insert_many(docs, ordered=False)  # fills in _id
+        dons = [x for d in docs for x in donation_docs(d, int(random.expovariate(1 / donations_per)) if donations_per else 0)]
+        if dons:
+            donations_col.insert_many(dons, ordered=False)
+        done += len(docs)
+        donated += len(dons)
+        print(f"\r{done}/{n} requests, {donated} donations", end="", flush=True)
+    print(f"\nseeded in {time.perf_counter() - t0:.1f}s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=10000)
+    ap.add_argument("--donations-per", type=float, default=3.0, help="mean donations per funded request")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--force", action="store_true")
+    args = ap.parse_args()
+    from app.db import DB_NAME
+    if "bench" not in DB_NAME and not args.force:
+        raise SystemExit(f"refusing to wipe DB_NAME={DB_NAME!r}; set DB_NAME=..._bench or pass --force")
+    random.seed(args.seed)
+    seed(args.requests, args.donations_per)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Serialization cost of a GET /v1/requests page, before and after shaping cards in Mongo.
+
+    python -m bench.serialization --cards 1000 --runs 200
+
+"before" is the old path: a Python to_card() per stored document, then FastAPI's
+jsonable_encoder + json.dumps. "after" is what the route does now: Mongo returns
+ready-made cards and they go straight to orjson. "columns" adds the parallel-array
+format. Sizes are reported raw and gzipped.
+"""
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.cards import to_card, to_columns
+from app.etag import dump_json
+
+CATEGORIES = ["meds", "groceries", "shelter", "transport", "other"]
+
+def stored_doc(now: datetime) -> dict:
+    goal = round(random.uniform(5, 200), 2)
+    funded = round(random.uniform(0, goal), 2)
+    return {
+        "_id": ObjectId(),
+        "category": random.choice(CATEGORIES),
+        "urgency_window": random.choice(["now", "today", "week"]),
+        "severity": random.randint(1, 5),
+        "status": random.choice(["open", "funded"]),
+        "location": {"lat": random.uniform(40.5, 40.9), "lng": random.uniform(-74.2, -73.7)},
+        "estimated_total": goal + 10.0,
+        "requester_afford": 10.0,
+        "funding_goal": goal,
+        "funded_amount": funded,
+        "progress": round(funded / goal, 4),
+        "rank_score": round(random.random(), 3),
+        "created_at": (now - timedelta(minutes=random.randint(0, 600))).replace(tzinfo=None),
+    }
+
+def shaped(d: dict) -> dict:
+    # what the CARD_PROJ $project stage hands back
+    return {
+        "created_at": d["created_at"], "category": d["category"], "urgency_window": d["urgency_window"],
+        "severity": d["severity"], "status": d["status"], "estimated_total": d["estimated_total"],
+        "requester_afford": d["requester_afford"], "funding_goal": d["funding_goal"],
+        "funded_amount": d["funded_amount"], "progress": d["progress"], "id": str(d["_id"]),
+        "lat": d["location"]["lat"], "lng": d["location"]["lng"], "rank_score": d["rank_score"],
+    }
+
+def before(docs) -> bytes:
+    payload = {"requests": [to_card(d) for d in docs], "since": "x"}
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+def after(cards) -> bytes:
+    return dump_json({"requests": cards, "since": "x"})
+
+def columns(cards) -> bytes:
+    return dump_json({"columns": to_columns(cards), "since": "x"})
+
+def timed(fn, arg, runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cards", type=int, default=1000)
+    ap.add_argument("--runs", type=int, default=200)
+    args = ap.parse_args()
+
+    now = datetime.now(timezone.utc)
+    docs = [stored_doc(now) for _ in range(args.cards)]
+    cards = [shaped(d) for d in docs]
+
+    base = None
+    for name, fn, arg in [("before", before, docs), ("after", after, cards), ("columns", columns, cards)]:
+        ms = timed(fn, arg, args.runs)
+        body = fn(arg)
+        base = base or ms
+        print(f"{name:8s} p50={ms:7.3f}ms ({base / ms:4.1f}x)  size={len(body):7d}B  gzip={len(gzip.compress(body)):6d}B")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Scenario benchmark for the whole API, with a baseline file for regression checks.
+
+Against a local mongod, with the API and the fake Gemini server started for you:
+
+    export MONGO_URI=mongodb://localhost:27017 DB_NAME=rescuerun_bench
+    python -m bench.suite --boot --seed 100000 --save-baseline bench/baseline.json
+    # ...change things...
+    python -m bench.suite --boot --baseline bench/baseline.json
+
+Without --boot it drives whatever is listening on --url. Scenarios:
+
+    map       viewport lists (columns), cluster tiles and detail opens for popular requests
+    donate    a burst of small donations on one hot request
+    intake    /ai/invoke spike with a mix of repeated and unique texts
+    rank      back-to-back /ai/rank runs while the map keeps polling
+    mixed     all of the above at once
+
+Reports req/s and p50/p95/p99 per endpoint. With --baseline, exits non-zero when an
+endpoint's p95 grows or its req/s drops by more than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+
+from app.geo import tile_of
+from bench.seed import METROS, TEXTS
+
+Op = Callable[[httpx.AsyncClient, "Context"], Awaitable[Tuple[str, httpx.Response]]]
+
+class Context:
+    def __init__(self):
+        self.ids: List[str] = []
+        self.hot_id = ""
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+def _viewport() -> Tuple[float, float, float]:
+    lat, lng, spread, _ = random.choice(METROS)
+    return random.gauss(lat, spread / 3), random.gauss(lng, spread / 3), random.choice([0.05, 0.1, 0.2])
+
+async def map_op(client: httpx.AsyncClient, ctx: Context):
+    roll = random.random()
+    lat, lng, half = _viewport()
+    if roll < 0.6:
+        bbox = f"{lat - half},{lng - half},{lat + half},{lng + half}"
+        return "GET /requests", await client.get("/v1/requests", params={"bbox": bbox, "limit": 500, "format": "columns"})
+    if roll < 0.85:
+        z = random.choice([10, 11, 12])
+        x, y = tile_of(lat, lng, z)
+        return "GET /requests/clusters", await client.get("/v1/requests/clusters", params={"z": z, "x": x, "y": y})
+    # popular requests get most of the opens
+    rid = ctx.ids[min(int(random.expovariate(1 / 10)), len(ctx.ids) - 1)]
+    return "GET /requests/{id}", await client.get(f"/v1/requests/{rid}")
+
+async def donate_op(client: httpx.AsyncClient, ctx: Context):
+    headers = {"X-Device-Token": f"dev_bench_{random.randint(1, 10000)}"}
+    return "POST /requests/{id}/donate", await client.post(f"/v1/requests/{ctx.hot_id}/donate", json={"amount": 0.01}, headers=headers)
+
+async def intake_op(client: httpx.AsyncClient, ctx: Context):
+    text = random.choice(TEXTS)
+    if random.random() < 0.5:
+        text = f"{text} (ref {random.randint(1, 10**9)})"
+    lat, lng, _ = _viewport()
+    body = {"text": text, "location": {"lat": lat, "lng": lng}, "requester_afford": 0}
+    return "POST /ai/invoke", await client.post("/v1/ai/invoke", json=body)
+
+async def rank_op(client: httpx.AsyncClient, ctx: Context):
+    return "POST /ai/rank", await client.post("/v1/ai/rank")
+
+def scenarios(c: int) -> Dict[str, List[Tuple[int, Op]]]:
+    return {
+        "map": [(c, map_op)],
+        "donate": [(c, donate_op)],
+        "intake": [(c, intake_op)],
+        "rank": [(1, rank_op), (c, map_op)],
+        "mixed": [(max(1, c * 7 // 10), map_op), (max(1, c // 10), donate_op), (max(1, c // 5), intake_op), (1, rank_op)],
+    }
+
+async def _lane(client: httpx.AsyncClient, ctx: Context, op: Op, deadline: float):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            label, r = await op(client, ctx)
+        except Exception as e:
+            ctx.errors[type(e).__name__] += 1
+            continue
+        if r.status_code < 400:
+            ctx.samples[label].append(time.perf_counter() - t0)
+        else:
+            ctx.errors[label] += 1
+
+async def _prepare(client: httpx.AsyncClient, ctx: Context):
+    r = await client.get("/v1/requests", params={"limit": 1000, "format": "columns"})
+    r.raise_for_status()
+    ctx.ids = r.json()["columns"]["id"] or ["000000000000000000000000"]
+    lat, lng, _, _ = METROS[0]
+    hot = {
+        "raw_text": "bench hot request", "category": "groceries", "urgency_window": "now", "severity": 5,
+        "items": [], "estimated_total": 2000, "requester_afford": 0, "location": {"lat": lat, "lng": lng},
+    }
+    r = await client.post("/v1/requests", json=hot, headers={"X-Device-Token": "dev_bench_hot"})
+    r.raise_for_status()
+    ctx.hot_id = r.json()["request"]["id"]
+
+async def run_scenario(url: str, lanes: List[Tuple[int, Op]], seconds: float) -> Dict[str, dict]:
+    ctx = Context()
+    total = sum(n for n, _ in lanes)
+    limits = httpx.Limits(max_connections=total, max_keepalive_connections=total)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        await _prepare(client, ctx)
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[_lane(client, ctx, op, deadline) for n, op in lanes for _ in range(n)])
+
+    out = {}
+    for label in sorted(set(ctx.samples) | set(ctx.errors)):
+        s = ctx.samples.get(label, [])
+        q = statistics.quantiles(s, n=100) if len(s) >= 2 else [s[0] if s else 0.0] * 99
+        out[label] = {
+            "n": len(s), "errors": ctx.errors.get(label, 0), "rps": round(len(s) / seconds, 1),
+            "p50_ms": round(q[49] * 1000, 2), "p95_ms": round(q[94] * 1000, 2), "p99_ms": round(q[98] * 1000, 2),
+        }
+    return out
+
+def print_report(name: str, rows: Dict[str, dict]):
+    print(f"\n== {name}")
+    print(f"{'endpoint':30s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'errors':>7s}")
+    for label, r in rows.items():
+        print(f"{label:30s} {r['rps']:8.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['errors']:7d}")
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    found = []
+    for name, rows in baseline.items():
+        for label, base in rows.items():
+            cur = results.get(name, {}).get(label)
+            if cur is None or not base["n"]:
+                continue
+            if cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                found.append(f"{name} {label}: p95 {base['p95_ms']} -> {cur['p95_ms']} ms")
+            if cur["rps"] < base["rps"] * (1 - tolerance):
+                found.append(f"{name} {label}: req/s {base['rps']} -> {cur['rps']}")
+    return found
+
+def _wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up")
+
+def boot(port: int, gemini_port: int, args) -> List[subprocess.Popen]:
+    fake_env = {
+        **os.environ,
+        "FAKE_GEMINI_LATENCY_MS": str(args.gemini_latency_ms),
+        "FAKE_GEMINI_FAILURE_RATE": str(args.gemini_failure_rate),
+    }
+    app_env = {**os.environ, "GEMINI_BASE_URL": f"http://127.0.0.1:{gemini_port}", "GEMINI_API_KEY": "fake"}
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "bench.fake_gemini:app", "--port", str(gemini_port), "--log-level", "warning"], env=fake_env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers), "--log-level", "warning"], env=app_env),
+    ]
+    _wait_ready(f"http://127.0.0.1:{gemini_port}/stats")
+    _wait_ready(f"http://127.0.0.1:{port}/v1/requests?limit=1")
+    return procs
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--scenario", default="all", help="map|donate|intake|rank|mixed|all")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--boot", action="store_true", help="start the API and fake Gemini locally")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--gemini-latency-ms", type=float, default=300)
+    ap.add_argument("--gemini-failure-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=0, help="wipe and seed this many requests first")
+    ap.add_argument("--baseline", help="compare against this results file")
+    ap.add_argument("--save-baseline", help="write results to this file")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    args = ap.parse_args()
+
+    if args.seed:
+        from bench.seed import seed
+        from app.db import DB_NAME
+        if "bench" not in DB_NAME:
+            raise SystemExit(f"refusing to wipe DB_NAME={DB_NAME!r}; use a *_bench database")
+        random.seed(1)
+        seed(args.seed, 3.0)
+
+    procs = []
+    if args.boot:
+        port = int(args.url.rsplit(":", 1)[1])
+        procs = boot(port, port + 81, args)
+
+    try:
+        table = scenarios(args.concurrency)
+        names = list(table) if args.scenario == "all" else args.scenario.split(",")
+        results = {}
+        for name in names:
+            results[name] = asyncio.run(run_scenario(args.url, table[name], args.seconds))
+            print_report(name, results[name])
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nbaseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Closed-loop throughput probe against a running API.
+
+Start the server (one worker), then e.g.:
+
+    uvicorn app.main:app --workers 1 --port 8000
+    python -m bench.throughput --url "http://localhost:8000/v1/requests?bbox=40,-75,41,-73" --concurrency 200
+
+Run it once on the sync baseline and once on the async routes to compare req/s and
+latency at the same concurrency.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+async def worker(client: httpx.AsyncClient, url: str, deadline: float, samples: list, errors: list):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(url)
+            r.raise_for_status()
+            samples.append(time.perf_counter() - t0)
+        except Exception as e:
+            errors.append(type(e).__name__)
+
+async def run(url: str, concurrency: int, seconds: float):
+    samples, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*[worker(client, url, deadline, samples, errors) for _ in range(concurrency)])
+
+    if not samples:
+        print(f"no successful requests ({len(errors)} errors)")
+        return
+    q = statistics.quantiles(samples, n=100)
+    print(f"concurrency={concurrency} duration={seconds}s")
+    print(f"req/s={len(samples) / seconds:.1f} ok={len(samples)} errors={len(errors)}")
+    print(f"p50={q[49]*1000:.1f}ms p95={q[94]*1000:.1f}ms p99={q[98]*1000:.1f}ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000/v1/requests")
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--seconds", type=float, default=15.0)
+    args = ap.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.seconds))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { ensureDeviceToken } from './api/device';
 import { fetchRequests } from './api/requests';
+import { openRequestStream } from './api/stream';
 import MapView from './components/MapView';
 import BottomSheet from './components/BottomSheet';
 import RequestModal from './components/RequestModal';
@@ -8,6 +9,8 @@ import CreateRequestModal from './components/CreateRequestModal';
 import FloatingButtons from './components/FloatingButtons';
 
 const POLL_MS = 10000;
+// While the live stream is connected, polling is only a safety net.
+const STREAM_POLL_MS = 60000;
 
 function isHighPriority(request) {
   const severity = Number(request?.severity ?? 0);
@@ -24,29 +27,45 @@ export default function App() {
   const [pickedLocation, setPickedLocation] = useState(null);
   const [createModalOpen, setCreateModalOpen] = useState(false);
   const [crisisMode, setCrisisMode] = useState(false);
-
-  const loadRequests = useCallback(async () => {
+  const [streaming, setStreaming] = useState(false);
+
+  // Cards currently in view, keyed by id, plus the server's sync token for delta polls.
+  const cardsRef = useRef(new Map());
+  const sinceRef = useRef(null);
+
+  const showCards = useCallback(() => {
+    const visible = [...cardsRef.current.values()].filter((r) => {
+      if (crisisMode) {
+        const isActionable = r.status === 'open' || r.status === 'funded';
+        return isActionable && isHighPriority(r);
+      }
+      return r.status !== 'delivered' && r.status !== 'cancelled';
+    });
+    visible.sort((a, b) => Number(b.rank_score ?? 0) - Number(a.rank_score ?? 0));
+    setRequests(visible);
+  }, [crisisMode]);
+
+  const loadRequests = useCallback(async ({ delta = false } = {}) => {
     if (!bbox) return;
-    setLoading(true);
+    const since = delta ? sinceRef.current : null;
+    if (!since) setLoading(true);
     try {
       const data = await fetchRequests({
         bbox,
         sort: 'rank',
+        since,
       });
-      const visible = (data.requests || []).filter((r) => {
-        if (crisisMode) {
-          const isActionable = r.status === 'open' || r.status === 'funded';
-          return isActionable && isHighPriority(r);
-        }
-        return r.status !== 'delivered' && r.status !== 'cancelled';
-      });
-      setRequests(visible);
+      if (!since) cardsRef.current = new Map();
+      (data.requests || []).forEach((r) => cardsRef.current.set(r.id, r));
+      (data.removed || []).forEach((id) => cardsRef.current.delete(id));
+      sinceRef.current = data.since ?? null;
+      showCards();
     } catch {
-      setRequests([]);
+      if (!since) setRequests([]);
     } finally {
       setLoading(false);
     }
-  }, [bbox, crisisMode]);
+  }, [bbox, showCards]);
 
   useEffect(() => {
     ensureDeviceToken().catch(console.error);
@@ -58,9 +77,29 @@ export default function App() {
 
   useEffect(() => {
     if (!bbox) return;
-    const id = setInterval(loadRequests, POLL_MS);
+    const id = setInterval(() => loadRequests({ delta: true }), streaming ? STREAM_POLL_MS : POLL_MS);
     return () => clearInterval(id);
-  }, [bbox, loadRequests]);
+  }, [bbox, loadRequests, streaming]);
+
+  useEffect(() => {
+    if (!bbox) return;
+    const ws = openRequestStream(bbox, (event) => {
+      if (event.type === 'resync') {
+        loadRequests();
+        return;
+      }
+      if (!event.request) return;
+      cardsRef.current.set(event.request.id, event.request);
+      showCards();
+    });
+    ws.onopen = () => setStreaming(true);
+    ws.onclose = () => setStreaming(false);
+    return () => {
+      ws.onclose = null;
+      ws.close();
+      setStreaming(false);
+    };
+  }, [bbox, loadRequests, showCards]);
 
   const handleBoundsChange = useCallback((newBbox) => {
     setBbox(newBbox);
@@ -1,6 +1,6 @@
 import axios from 'axios';
 
-const BASE_URL = import.meta.env.VITE_API_URL || '/v1';
+export const BASE_URL = import.meta.env.VITE_API_URL || '/v1';
 
 export const api = axios.create({
   baseURL: BASE_URL,
@@ -1,12 +1,30 @@
 import api from './axios';
 
-export function fetchRequests({ bbox, status = null, sort = 'rank', limit = 200 }) {
+// Full pages come back as parallel arrays per field (smaller on the wire); rebuild the cards here.
+function fromColumns(columns) {
+  const fields = Object.keys(columns);
+  const n = fields.length ? columns[fields[0]].length : 0;
+  const rows = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const row = {};
+    for (const f of fields) row[f] = columns[f][i];
+    rows[i] = row;
+  }
+  return rows;
+}
+
+export function fetchRequests({ bbox, status = null, sort = 'rank', limit = 200, since = null }) {
   const params = new URLSearchParams();
   if (bbox) params.set('bbox', bbox);
   if (status) params.set('status', status);
+  if (since) params.set('since', since);
+  else params.set('format', 'columns');
   params.set('sort', sort);
   params.set('limit', limit);
-  return api.get(`/requests?${params}`).then((r) => r.data);
+  return api.get(`/requests?${params}`).then((r) => {
+    const data = r.data;
+    return data.columns ? { ...data, requests: fromColumns(data.columns) } : data;
+  });
 }
 
 export function fetchRequestDetail(id) {
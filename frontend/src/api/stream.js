@@ -0,0 +1,19 @@
+import { BASE_URL } from './axios';
+
+// Live request changes for a viewport: {type: created|donated|claimed|delivered|updated, request: card}
+// or {type: 'resync'} when the server had to drop events and the list should be refetched.
+export function openRequestStream(bbox, onEvent) {
+  const url = new URL(`${BASE_URL.replace(/\/$/, '')}/requests/stream`, window.location.href);
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+  url.searchParams.set('bbox', bbox);
+
+  const ws = new WebSocket(url);
+  ws.onmessage = (msg) => {
+    try {
+      onEvent(JSON.parse(msg.data));
+    } catch {
+      // ignore malformed frames
+    }
+  };
+  return ws;
+}
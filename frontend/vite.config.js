@@ -9,6 +9,7 @@ export default defineConfig({
       '/v1': {
         target: 'http://localhost:8000',
         changeOrigin: true,
+        ws: true,
       },
     },
   },
@@ -0,0 +1,63 @@
+"""
+Every list and delta query shape of GET /v1/requests is served by an index, with no
+in-memory sort (map shapes: only over the geo index scan, see bench.explain_plans).
+
+The plan rules run anywhere. The explains need a MongoDB server (MONGO_TEST_URI,
+default mongodb://localhost:27017) and are skipped when none answers.
+"""
+import os
+import random
+from datetime import datetime, timezone
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from bench.explain_plans import explain_all, problem, seed
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI", "mongodb://localhost:27017")
+
+LIST_SCAN = {"stage": "IXSCAN", "keyPattern": {"status": 1, "rank_score": -1, "created_at": -1, "_id": -1}}
+GEO_SCAN = {"stage": "IXSCAN", "keyPattern": {"geo": "2dsphere", "status": 1}}
+
+def sorted_over(scan: dict) -> dict:
+    return {"stage": "SORT", "inputStage": {"stage": "FETCH", "inputStage": scan}}
+
+def test_problem_rules():
+    assert problem({"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": LIST_SCAN}}, False) is None
+    assert problem({"stage": "COLLSCAN"}, False) == "collection scan"
+    assert problem({"stage": "EOF"}, False) == "no index scan"
+    assert problem(sorted_over(LIST_SCAN), False) == "in-memory sort"
+    assert problem(sorted_over(GEO_SCAN), False) == "in-memory sort"
+    # map shapes may sort, but only what the viewport's geo scan returned
+    assert problem(sorted_over(GEO_SCAN), True) is None
+    assert problem(sorted_over(LIST_SCAN), True) == "in-memory sort not bounded by the geo index"
+    # slot-based engine explains nest the classic tree under queryPlan
+    assert problem({"queryPlan": sorted_over(LIST_SCAN)}, False) == "in-memory sort"
+
+@pytest.fixture(scope="module")
+def plans():
+    client = MongoClient(MONGO_TEST_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no MongoDB at {MONGO_TEST_URI}")
+    col = client["rescuerun_test"]["explain_plans"]
+    random.seed(1)
+    seed(col, 5000, datetime.now(timezone.utc))
+    try:
+        yield list(explain_all(col, 200))
+    finally:
+        col.drop()
+        client.close()
+
+def test_every_shape_is_explained(plans):
+    names = [name for name, _, _ in plans]
+    assert sum(n.startswith("list") for n in names) == 12
+    assert sum(n.startswith("delta") for n in names) == 4
+    assert sum(n.endswith("bbox") for n in names) == 6
+
+@pytest.mark.parametrize("prefix", ["list", "delta"])
+def test_shapes_use_an_index_without_blocking_sort(plans, prefix):
+    failures = [(name, bad, stages) for name, bad, stages in plans if name.startswith(prefix) and bad]
+    assert not failures
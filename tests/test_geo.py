@@ -0,0 +1,15 @@
+import pytest
+
+from app.geo import bbox_contains, parse_bbox
+
+@pytest.mark.parametrize("raw", ["10,170,20,190", "10,170,20,-170"])
+def test_antimeridian_box_unwrapped_or_wrapped(raw):
+    box = parse_bbox(raw)
+    assert box == (10.0, 170.0, 20.0, -170.0)
+    assert bbox_contains(box, 15, 179) and bbox_contains(box, 15, -175)
+    assert not bbox_contains(box, 15, 0)
+
+@pytest.mark.parametrize("raw", ["10,20,20,10", "10,-170,20,-180", "20,0,10,5", "10,5,20,5"])
+def test_swapped_or_empty_box_is_rejected(raw):
+    with pytest.raises(ValueError):
+        parse_bbox(raw)
@@ -0,0 +1,38 @@
+"""
+The fallback keyword parser against its labelled corpus and the old substring scans.
+
+The engine matches whole words (plus the forms in _VARIANTS and the stems), so it
+may differ from the old scans only on the texts listed in bench.parsers.CHANGED.
+"""
+import pytest
+
+from app.llm.parsers import fallback_parse, scan_signals
+from bench.parsers import CHANGED, CORPUS, legacy_signals, new_signals
+
+@pytest.mark.parametrize("text, category, urgency, severity", CORPUS)
+def test_corpus(text, category, urgency, severity):
+    assert new_signals(text) == (category, urgency, severity)
+
+@pytest.mark.parametrize("text", [t for t, *_ in CORPUS])
+def test_matches_old_scans_except_where_changed(text):
+    if text in CHANGED:
+        assert legacy_signals(text) != new_signals(text)
+    else:
+        assert legacy_signals(text) == new_signals(text)
+
+@pytest.mark.parametrize("word", ["driver", "drivers", "rideshare", "carpool", "cars", "rides"])
+def test_transport_compounds_still_match(word):
+    assert "cat:transport" in scan_signals(f"looking for a {word} please")
+
+@pytest.mark.parametrize("text", ["who cares", "scared of the dark", "I know", "heartburn", "carefully"])
+def test_substrings_inside_other_words_do_not_match(text):
+    assert not scan_signals(text) & {"cat:transport", "urg:now", "sev:critical_med"}
+
+def test_multi_word_keywords_tolerate_extra_spaces():
+    assert "cat:shelter" in scan_signals("no  place to sleep")
+    assert "urg:today" in scan_signals("by  end of\tday")
+
+def test_fallback_parse_draft():
+    draft = fallback_parse("need insulin asap")["draft"]
+    assert (draft["category"], draft["urgency_window"], draft["severity"]) == ("meds", "now", 5)
+    assert 5.0 <= draft["estimated_total"] <= 250.0